@@ -0,0 +1,87 @@
+# benchmarks/bench_cold_start.py
+"""
+Mesure le démarrage à froid de main.py, sans fenêtre visible.
+
+Usage : python benchmarks/bench_cold_start.py [nombre_de_lancements]
+
+Chaque lancement exécute main.py dans un nouveau processus avec
+PICOCOMPTA_STARTUP_PROFILE (profil JSON des phases) et PICOCOMPTA_STARTUP_EXIT=1
+(arrêt après la première image), sur une base temporaire déjà initialisée.
+Sans écran (ni DISPLAY ni WAYLAND_DISPLAY), SDL utilise le pilote vidéo
+« offscreen ». Le script affiche la médiane du temps total du processus et
+de chaque phase.
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from db.database_utils import init_database, close_connection
+
+DEFAULT_RUNS = 10
+RUN_TIMEOUT = 60  # secondes
+
+def startup_env(db_path, profile_path):
+    env = dict(os.environ)
+    env.update({
+        'KIVY_NO_ARGS': '1',
+        'KIVY_NO_CONSOLELOG': '1',
+        'KIVY_NO_FILELOG': '1',
+        'PICOCOMPTA_DB': db_path,
+        'PICOCOMPTA_STARTUP_PROFILE': profile_path,
+        'PICOCOMPTA_STARTUP_EXIT': '1',
+    })
+    if not env.get('DISPLAY') and not env.get('WAYLAND_DISPLAY'):
+        env.setdefault('SDL_VIDEODRIVER', 'offscreen')
+    return env
+
+def run_once(db_path, profile_path):
+    """Lance main.py et retourne (durée du processus, profil des phases)."""
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, 'main.py'],
+        cwd=ROOT, env=startup_env(db_path, profile_path),
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+        timeout=RUN_TIMEOUT
+    )
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        sys.exit(f"main.py a échoué (code {result.returncode}) :\n{result.stderr[-2000:]}")
+    with open(profile_path, encoding='utf-8') as profile_file:
+        return elapsed, json.load(profile_file)
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_RUNS
+    tmp_dir = tempfile.mkdtemp(prefix='picocompta_cold_start_')
+    db_path = os.path.join(tmp_dir, 'cold_start.db')
+    profile_path = os.path.join(tmp_dir, 'profile.json')
+
+    # Base déjà créée, comme au démarrage d'un utilisateur existant
+    if not init_database(db_path):
+        sys.exit("Impossible d'initialiser la base temporaire.")
+    close_connection(db_path)
+
+    process_times = []
+    phase_times = {}
+    for _ in range(runs):
+        elapsed, profile = run_once(db_path, profile_path)
+        process_times.append(elapsed)
+        for entry in profile['phases']:
+            # Pour la première image, on retient l'instant plutôt que la durée
+            value = entry['end'] if entry['name'] == 'first frame' else entry['duration']
+            phase_times.setdefault(entry['name'], []).append(value)
+
+    print(f"{runs} démarrages à froid")
+    print(f"  processus complet        {statistics.median(process_times) * 1000:8.1f} ms (médiane)")
+    for name, values in phase_times.items():
+        label = f"{name} (instant)" if name == 'first frame' else name
+        print(f"  {label:<24} {statistics.median(values) * 1000:8.1f} ms")
+
+if __name__ == '__main__':
+    main()
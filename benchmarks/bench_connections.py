@@ -0,0 +1,72 @@
+# benchmarks/bench_connections.py
+"""
+Compte les connexions SQLite ouvertes lors d'un rafraîchissement d'écran.
+
+Usage : python benchmarks/bench_connections.py
+
+Le script travaille sur une base temporaire (variable PICOCOMPTA_DB) et
+n'ouvre aucune fenêtre. Les requêtes des écrans passent par les threads de
+db/executor.py, qui gardent chacun leur connexion : seul le premier
+rafraîchissement en ouvre.
+"""
+import os
+import sys
+import sqlite3
+import tempfile
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+os.environ.setdefault('KIVY_NO_ARGS', '1')
+os.environ.setdefault('KIVY_NO_CONSOLELOG', '1')
+os.environ.setdefault('KIVY_NO_FILELOG', '1')
+
+_opened = 0
+_sqlite_connect = sqlite3.connect
+
+def _counting_connect(*args, **kwargs):
+    global _opened
+    _opened += 1
+    return _sqlite_connect(*args, **kwargs)
+
+def count_connections(callback):
+    """Retourne le nombre de connexions ouvertes pendant callback() et ses requêtes en arrière-plan."""
+    from db.executor import get_executor
+    from kivy.clock import Clock
+    global _opened
+    _opened = 0
+    callback()
+    get_executor().wait_idle()
+    Clock.tick()  # Applique les résultats sur le thread principal
+    return _opened
+
+def main():
+    tmp_dir = tempfile.mkdtemp(prefix='picocompta_bench_')
+    os.environ['PICOCOMPTA_DB'] = os.path.join(tmp_dir, 'bench.db')
+    sqlite3.connect = _counting_connect
+
+    from kivy.lang import Builder
+    Builder.load_file(os.path.join(ROOT, 'assets', 'style.kv'))
+
+    from db.database_utils import init_database
+    init_database()
+
+    from pages.URSSAF_TVA import URSSAF_TVAPage
+    from pages.home import HomePage
+    from pages.demarrage import DemarragePage
+
+    urssaf = URSSAF_TVAPage(name='URSSAF_TVA')
+    results = {}
+    for echeance, label in ((3, 'URSSAF_TVA (trimestriel)'), (1, 'URSSAF_TVA (mensuel)')):
+        urssaf.echeance_declaration = echeance
+        results[label] = count_connections(urssaf.load_data)
+    results['home'] = count_connections(HomePage(name='home').on_enter)
+    results['demarrage'] = count_connections(DemarragePage(name='demarrage').on_enter)
+
+    print("Connexions ouvertes par rafraîchissement d'écran :")
+    for label, count in results.items():
+        print(f"  {label:<28} {count}")
+
+if __name__ == '__main__':
+    main()
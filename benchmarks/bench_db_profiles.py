@@ -0,0 +1,126 @@
+# benchmarks/bench_db_profiles.py
+"""
+Compare les profils de performance SQLite (PERFORMANCE_PROFILES).
+
+Usage : python benchmarks/bench_db_profiles.py [nombre_de_factures] [durée_s]
+
+Le script crée une base de 100000 factures par défaut (seed de
+bench_pdf_batch.py), puis, pour chaque profil, sur une copie de cette base :
+  - écritures seules : changements de statut validés un par un, comme
+    FactureRow.update_status (un commit, donc un fsync, par facture) ;
+  - lectures pendant les écritures : le thread d'écriture enchaîne les mêmes
+    commits pendant que READERS threads lisent la première page de Mes
+    factures et le tableau de bord de l'accueil, comme le pool de lecture de
+    db/executor.py. Latences de lecture en millisecondes.
+"""
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from bench_pdf_batch import seed
+
+WRITES = 500
+READERS = 2
+
+UPDATE_STATUS = "UPDATE Factures SET status = ?, date_status_set = ? WHERE id_facture = ?"
+
+def write_status(conn, rng, invoice_count):
+    is_paid = rng.random() < 0.5
+    conn.execute(UPDATE_STATUS, (is_paid, '2025-06-30' if is_paid else None, rng.randint(1, invoice_count)))
+    conn.commit()
+
+def bench_writes(db_path, invoice_count):
+    from db.database_utils import get_connection
+    conn = get_connection(db_path)
+    rng = random.Random(1)
+    start = time.perf_counter()
+    for _ in range(WRITES):
+        write_status(conn, rng, invoice_count)
+    return WRITES / (time.perf_counter() - start)
+
+def bench_read_while_write(db_path, invoice_count, duration):
+    from db.database_utils import get_connection, close_connection
+    from db.dashboard import dashboard_snapshot
+    from db.listings import fetch_factures_page
+
+    stop = threading.Event()
+    writes = [0]
+    latencies = []
+    latencies_lock = threading.Lock()
+
+    def writer():
+        conn = get_connection(db_path)
+        rng = random.Random(2)
+        while not stop.is_set():
+            write_status(conn, rng, invoice_count)
+            writes[0] += 1
+        close_connection(db_path)
+
+    def reader(index):
+        conn = get_connection(db_path)
+        local = []
+        while not stop.is_set():
+            start = time.perf_counter()
+            if index % 2:
+                dashboard_snapshot(conn=conn)
+            else:
+                fetch_factures_page('date', False, conn=conn)
+            local.append(time.perf_counter() - start)
+        with latencies_lock:
+            latencies.extend(local)
+        close_connection(db_path)
+
+    threads = [threading.Thread(target=writer)]
+    threads += [threading.Thread(target=reader, args=(index,)) for index in range(READERS)]
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    latencies.sort()
+    return (writes[0] / duration, len(latencies) / duration, statistics.median(latencies) * 1e3,
+            latencies[int(len(latencies) * 0.95)] * 1e3, latencies[-1] * 1e3)
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    duration = float(sys.argv[2]) if len(sys.argv) > 2 else 3.0
+    tmp_dir = tempfile.mkdtemp(prefix='picocompta_bench_')
+    base_path = os.path.join(tmp_dir, 'base.db')
+
+    from db.database_utils import (PERFORMANCE_PROFILES, init_database, get_connection,
+                                   close_connection)
+    # Base de référence en journal de rollback : un seul fichier à copier
+    os.environ['PICOCOMPTA_DB_PROFILE'] = 'rollback'
+    os.environ['PICOCOMPTA_DB'] = base_path
+    init_database(base_path)
+    seed(get_connection(base_path), count)
+    close_connection(base_path)
+
+    print(f"{count} factures, {WRITES} écritures, lectures pendant {duration:.0f} s avec {READERS} lecteur(s)")
+    print(f"{'profil':<10} {'écritures/s':>12} | {'écritures/s':>12} {'lectures/s':>11} "
+          f"{'médiane':>8} {'p95':>8} {'max':>8}")
+    for profile in PERFORMANCE_PROFILES:
+        os.environ['PICOCOMPTA_DB_PROFILE'] = profile
+        db_path = os.path.join(tmp_dir, f'{profile}.db')
+        shutil.copyfile(base_path, db_path)
+        os.environ['PICOCOMPTA_DB'] = db_path
+
+        write_rate = bench_writes(db_path, count)
+        close_connection(db_path)
+        concurrent_writes, reads, median, p95, worst = bench_read_while_write(db_path, count, duration)
+        print(f"{profile:<10} {write_rate:12.0f} | {concurrent_writes:12.0f} {reads:11.0f} "
+              f"{median:8.2f} {p95:8.2f} {worst:8.2f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+# benchmarks/bench_home_entry.py
+"""
+Mesure l'entrée sur l'écran d'accueil selon la taille du registre de factures.
+
+Usage : python benchmarks/bench_home_entry.py [nombre_de_factures ...]
+
+Pour chaque taille (par défaut 1000, 10000 et 50000 factures), le script crée
+une base temporaire (variable PICOCOMPTA_DB), chronomètre HomePage.on_enter
+jusqu'à l'application du résultat sur le thread principal, et vérifie avec
+PRAGMA data_version, depuis une autre connexion, que l'accueil n'a rien écrit.
+La colonne « ancienne maj » donne pour comparaison le coût de l'UPDATE de
+taux_BNC que l'accueil exécutait à chaque entrée (annulé aussitôt).
+"""
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+os.environ.setdefault('KIVY_NO_ARGS', '1')
+os.environ.setdefault('KIVY_NO_CONSOLELOG', '1')
+os.environ.setdefault('KIVY_NO_FILELOG', '1')
+# Sans limite d'images par seconde, Clock.tick() ne dort pas entre deux images
+os.environ.setdefault('KCFG_GRAPHICS_MAXFPS', '0')
+
+RUNS = 20
+TYPES = ['BNC', 'BIC marchandise', 'BIC service']
+
+# UPDATE exécuté auparavant par HomePage.update_taux_bnc à chaque entrée
+OLD_HOME_UPDATE = """
+    UPDATE Factures SET taux_BNC = 2640
+    WHERE date_emission > '2025-01-01' AND taux_BNC != 2640
+"""
+
+def seed(conn, count, seed=1):
+    """
+    Remplit une base vide : TVA déjà active avec un numéro, factures payées et
+    déclarées de petits montants, pour qu'aucune alerte ni mise à jour de
+    statut ne se déclenche pendant la mesure.
+    """
+    from db.rates import rates_for
+    rng = random.Random(seed)
+    cursor = conn.cursor()
+    cursor.execute("""
+        INSERT INTO Info_Personnelle (nom, prenom, adresse, CP, pays, email, telephone,
+                                      iban, bic, ntva, status_tva, debut_activite_TVA,
+                                      debut_activite)
+        VALUES ('Bench', 'Bench', 'x', 'x', 'x', 'x', 'x', 'x', 'x', 'FR00000000000', 1,
+                '2015-01-01', '2015-01-01')
+    """)
+    cursor.execute("INSERT INTO Clients (nom) VALUES ('client bench')")
+    id_client = cursor.lastrowid
+
+    rows = []
+    for _ in range(count):
+        date_emission = f"{rng.randint(2016, 2025)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+        type_activite = rng.choice(TYPES)
+        montant_ht = rng.randint(100, 500)  # centimes : sous les seuils de TVA
+        rates = rates_for(date_emission, conn)
+        rows.append((
+            id_client, date_emission, type_activite,
+            montant_ht if type_activite == 'BIC service' else 0,
+            montant_ht if type_activite == 'BIC marchandise' else 0,
+            montant_ht if type_activite == 'BNC' else 0,
+            montant_ht, rates['taux_BICs'], rates['taux_BICm'], rates['taux_BNC'],
+        ))
+    cursor.executemany("""
+        INSERT INTO Factures (id_client, status, date_emission, type_activite,
+                              montant_htBICs, montant_htBICm, montant_htBNC, montant_total,
+                              status_declaration_URSSAF, status_declaration_TVA,
+                              taux_BICs, taux_BICm, taux_BNC)
+        VALUES (?, 1, ?, ?, ?, ?, ?, ?, 1, 1, ?, ?, ?)
+    """, rows)
+    conn.commit()
+
+def time_home_entry(home):
+    """Durée de on_enter jusqu'à l'exécution du callback sur le thread principal."""
+    from db.executor import get_executor
+    from kivy.clock import Clock
+    start = time.perf_counter()
+    home.on_enter()
+    get_executor().wait_idle()
+    Clock.tick()
+    return time.perf_counter() - start
+
+def time_old_update(conn):
+    start = time.perf_counter()
+    conn.execute("BEGIN")
+    conn.execute(OLD_HOME_UPDATE)
+    elapsed = time.perf_counter() - start
+    conn.rollback()
+    return elapsed
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1000, 10000, 50000]
+    tmp_dir = tempfile.mkdtemp(prefix='picocompta_bench_')
+
+    from kivy.lang import Builder
+    Builder.load_file(os.path.join(ROOT, 'assets', 'style.kv'))
+
+    from db import database_utils
+    from db.executor import shutdown_executor
+    from pages.home import HomePage
+
+    print(f"{'factures':>9} {'accueil (médiane)':>18} {'ancienne maj':>13} {'écritures':>10}")
+    for count in sizes:
+        # Nouvelle base : les threads de l'exécuteur rouvrent leurs connexions
+        shutdown_executor()
+        database_utils.close_connection()
+        os.environ['PICOCOMPTA_DB'] = os.path.join(tmp_dir, f'home_{count}.db')
+        database_utils.init_database()
+        seed(database_utils.get_connection(), count)
+
+        observer = sqlite3.connect(os.environ['PICOCOMPTA_DB'], isolation_level=None)
+        home = HomePage(name='home')
+        time_home_entry(home)  # Ouvre les connexions des threads
+
+        version_before = observer.execute("PRAGMA data_version").fetchone()[0]
+        timings = [time_home_entry(home) for _ in range(RUNS)]
+        version_after = observer.execute("PRAGMA data_version").fetchone()[0]
+        old_update = statistics.median(time_old_update(observer) for _ in range(5))
+        observer.close()
+
+        writes = "aucune" if version_after == version_before else "oui"
+        print(f"{count:>9} {statistics.median(timings) * 1000:>15.2f} ms "
+              f"{old_update * 1000:>10.2f} ms {writes:>10}")
+    shutdown_executor()
+
+if __name__ == '__main__':
+    main()
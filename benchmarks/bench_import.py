@@ -0,0 +1,149 @@
+# benchmarks/bench_import.py
+"""
+Mesure l'import en masse de factures (picocompta/core/importer.py).
+
+Usage : python benchmarks/bench_import.py [nombre_de_factures] [nombre_de_clients]
+
+Le script écrit un CSV et un fichier JSON Lines de 100000 factures par
+défaut, puis les importe chacun dans une base neuve (profil et clients de
+benchmarks/ledger.py). Pour comparaison, il enregistre aussi SAISIES
+factures une à une avec create_invoice, comme NouvelleFacturePage (une
+recherche du client, un INSERT, une mise à jour du profil et un commit
+par facture). Le pic de mémoire Python (tracemalloc) de l'import CSV est
+relevé pour le dixième du fichier puis pour le fichier entier ; le script
+échoue si l'un d'eux dépasse la borne de memory_bound(), qui ne dépend que
+de la taille d'un paquet et du nombre de clients.
+"""
+import csv
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from ledger import YEARS, generate_ledger
+
+SAISIES = 1000
+
+# Borne du pic mémoire de l'import, en octets (mesures : ~1,8 Ko par ligne
+# du paquet en cours, ~120 octets par client, ~0,4 Mo fixes)
+MEMORY_BASE = 500_000
+MEMORY_PER_ROW = 2_000
+MEMORY_PER_CLIENT = 200
+
+COLUMNS = ('client', 'date_emission', 'type_activite', 'montant_ht', 'taux_tva', 'mission', 'date_paiement')
+
+def invoice_records(count, clients, seed=1):
+    """Factures à importer, produites une à une (dates croissantes)."""
+    rng = random.Random(seed)
+    first_day = date(YEARS[0], 1, 1)
+    span = (date(YEARS[-1], 12, 31) - first_day).days + 1
+    for numero in range(count):
+        date_emission = first_day + timedelta(days=numero * span // count)
+        paid = rng.random() < 0.8
+        yield {
+            'client': f"Client {rng.randint(1, clients):05d}",
+            'date_emission': date_emission.isoformat(),
+            'type_activite': rng.choice(('BNC', 'BIC service', 'BIC marchandise')),
+            'montant_ht': f"{rng.randint(5000, 800000) / 100:.2f}",
+            'taux_tva': '20' if date_emission.year >= YEARS[-2] else '',
+            'mission': f"Mission {numero + 1}",
+            'date_paiement': (date_emission + timedelta(days=rng.randint(0, 60))).isoformat() if paid else '',
+        }
+
+def memory_bound(clients):
+    """Pic mémoire Python admis pour un import, quelle que soit la taille du fichier."""
+    from picocompta.core.importer import BATCH_SIZE
+    return MEMORY_BASE + BATCH_SIZE * MEMORY_PER_ROW + clients * MEMORY_PER_CLIENT
+
+def write_files(directory, count, clients):
+    csv_path = os.path.join(directory, 'factures.csv')
+    jsonl_path = os.path.join(directory, 'factures.jsonl')
+    with open(csv_path, 'w', newline='', encoding='utf-8') as csv_file, \
+            open(jsonl_path, 'w', encoding='utf-8') as jsonl_file:
+        writer = csv.DictWriter(csv_file, COLUMNS, delimiter=';')
+        writer.writeheader()
+        for record in invoice_records(count, clients):
+            writer.writerow(record)
+            jsonl_file.write(json.dumps(record, ensure_ascii=False) + '\n')
+    return csv_path, jsonl_path
+
+def fresh_database(directory, name, clients):
+    """Base migrée avec un profil et `clients` clients, sans facture."""
+    from db.database_utils import init_database, get_connection
+    db_path = os.path.join(directory, name)
+    init_database(db_path)
+    generate_ledger(get_connection(db_path), 0, clients)
+    return db_path
+
+def run_import(path, fmt, db_path, limit=None):
+    """Importe `path` (ses `limit` premières factures) ; retourne (importées, rejetées, secondes)."""
+    from itertools import islice
+    from db.database_utils import get_connection
+    from picocompta.core.importer import read_records, import_invoices, INVOICE_REQUIRED
+
+    def report(line_number, message):
+        raise AssertionError(f"ligne {line_number} : {message}")
+
+    with open(path, newline='', encoding='utf-8') as stream:
+        records = islice(read_records(stream, fmt, report, INVOICE_REQUIRED), limit)
+        start = time.perf_counter()
+        imported, rejected = import_invoices(records, report, conn=get_connection(db_path))
+        return imported, rejected, time.perf_counter() - start
+
+def run_saisies(db_path, count, clients):
+    """create_invoice facture par facture, comme l'écran de saisie."""
+    from db.database_utils import get_connection
+    from db.money import Money
+    from picocompta.core.invoices import create_invoice, invoice_amounts
+    conn = get_connection(db_path)
+    start = time.perf_counter()
+    for record in invoice_records(count, clients):
+        prix_ht, montant_tva, total_ttc = invoice_amounts(Money.from_euros(record['montant_ht']), 2000, 1)
+        create_invoice(record['client'], record['type_activite'], prix_ht, montant_tva, total_ttc,
+                       record['mission'], 2000, 1, date.fromisoformat(record['date_emission']), conn)
+    return time.perf_counter() - start
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    clients = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    tmp_dir = tempfile.mkdtemp(prefix='picocompta_bench_')
+    csv_path, jsonl_path = write_files(tmp_dir, count, clients)
+
+    results = []
+    for fmt, path in (('csv', csv_path), ('jsonl', jsonl_path)):
+        db_path = fresh_database(tmp_dir, f'{fmt}.db', clients)
+        imported, rejected, elapsed = run_import(path, fmt, db_path)
+        results.append((f"import {fmt}", imported, elapsed))
+
+    db_path = fresh_database(tmp_dir, 'saisies.db', clients)
+    results.append(("create_invoice", SAISIES, run_saisies(db_path, SAISIES, clients)))
+
+    peaks = []
+    for limit in (count // 10, count):
+        db_path = fresh_database(tmp_dir, f'memoire_{limit}.db', clients)
+        tracemalloc.start()
+        run_import(csv_path, 'csv', db_path, limit)
+        peaks.append((limit, tracemalloc.get_traced_memory()[1]))
+        tracemalloc.stop()
+
+    print(f"\n{count} factures, {clients} clients")
+    print(f"{'chemin':<16} {'factures':>9} {'secondes':>9} {'factures/s':>11}")
+    for name, imported, elapsed in results:
+        print(f"{name:<16} {imported:9d} {elapsed:9.2f} {imported / elapsed:11.0f}")
+    bound = memory_bound(clients)
+    for limit, peak in peaks:
+        print(f"pic mémoire Python, import de {limit} factures : {peak / 1e6:.1f} Mo "
+              f"(borne {bound / 1e6:.1f} Mo)")
+    for limit, peak in peaks:
+        assert peak <= bound, f"import de {limit} factures : pic de {peak / 1e6:.1f} Mo > {bound / 1e6:.1f} Mo"
+
+if __name__ == '__main__':
+    main()
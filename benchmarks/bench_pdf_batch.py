@@ -0,0 +1,84 @@
+# benchmarks/bench_pdf_batch.py
+"""
+Mesure la régénération d'une année de factures PDF selon la taille du pool.
+
+Usage : python benchmarks/bench_pdf_batch.py [nombre_de_factures]
+
+Le script crée une base temporaire (variable PICOCOMPTA_DB) contenant une
+année de factures (500 par défaut), puis chronomètre regenerate_invoices avec
+1, 2, 4... processus jusqu'au nombre de cœurs. Le gain attendu est presque
+linéaire : chaque processus rend ses PDF indépendamment, seule la lecture des
+données (une requête) reste séquentielle.
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+YEAR = 2025
+
+def seed(conn, count, seed=1):
+    rng = random.Random(seed)
+    cursor = conn.cursor()
+    cursor.execute("""
+        INSERT INTO Info_Personnelle (nom, prenom, adresse, CP, pays, email, telephone,
+                                      nsiret, codeape, ntva, iban, bic, status_tva)
+        VALUES ('Bench', 'Entreprise', '1 rue du Banc', '75001', 'France', 'bench@example.org',
+                '0100000000', '00000000000000', '6201Z', 'FR00000000000',
+                'FR7600000000000000000000000', 'BENCHFRPP', 1)
+    """)
+    client_ids = []
+    for index in range(20):
+        cursor.execute("INSERT INTO Clients (nom, adresse, CP, pays, ntva) VALUES (?, ?, ?, ?, ?)",
+                       (f"Client {index}", f"{index} avenue du Test", '69000', 'France', ''))
+        client_ids.append(cursor.lastrowid)
+
+    rows = []
+    for numero in range(1, count + 1):
+        montant_ht = rng.randint(10000, 500000)
+        tva = (montant_ht * 2000 + 5000) // 10000
+        rows.append((rng.choice(client_ids), f"{YEAR}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+                     montant_ht, tva, montant_ht + tva, f"Mission {numero}", numero))
+    cursor.executemany("""
+        INSERT INTO Factures (id_client, status, date_emission, type_activite, montant_htBNC, tva,
+                              montant_total, mission, taux_tva, tva_status, numero_facture)
+        VALUES (?, 1, ?, 'BNC', ?, ?, ?, ?, 2000, 1, ?)
+    """, rows)
+    conn.commit()
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    tmp_dir = tempfile.mkdtemp(prefix='picocompta_bench_')
+    os.environ['PICOCOMPTA_DB'] = os.path.join(tmp_dir, 'bench.db')
+
+    from db.database_utils import init_database, get_connection
+    from pages.pdf_batch import regenerate_invoices
+    init_database()
+    seed(get_connection(), count)
+
+    cores = os.cpu_count() or 1
+    pool_sizes = [1]
+    while pool_sizes[-1] * 2 <= cores:
+        pool_sizes.append(pool_sizes[-1] * 2)
+    if pool_sizes[-1] != cores:
+        pool_sizes.append(cores)
+
+    print(f"{count} factures de {YEAR}, {cores} cœur(s)")
+    baseline = None
+    for processes in pool_sizes:
+        output_dir = os.path.join(tmp_dir, f'pdfs_{processes}')
+        start = time.perf_counter()
+        generated, failed = regenerate_invoices(start_date=f"{YEAR}-01-01", end_date=f"{YEAR}-12-31",
+                                                output_dir=output_dir, processes=processes)
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        print(f"{processes:>3} processus  {elapsed:7.2f} s  {len(generated) / elapsed:7.1f} PDF/s  "
+              f"accélération x{baseline / elapsed:.2f}  ({len(failed)} échec(s))")
+
+if __name__ == '__main__':
+    main()
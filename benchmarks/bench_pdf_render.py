@@ -0,0 +1,74 @@
+# benchmarks/bench_pdf_render.py
+"""
+Micro-benchmark du rendu des factures PDF, en factures par seconde.
+
+Usage : python benchmarks/bench_pdf_render.py [nombre_de_factures]
+
+Le script réutilise la base synthétique de bench_pdf_batch.py (une année de
+factures, 200 par défaut) et mesure :
+  - la création d'un InvoicePDFGenerator (styles et gabarits partagés) ;
+  - le rendu unitaire, comme NouvelleFacturePage : generate_invoice(id, chemin)
+    pour chaque facture, lecture en base comprise ;
+  - le rendu en mémoire (render_bytes) à partir des données préchargées par
+    fetch_invoices_data, sans requête ni écriture de fichier ;
+  - le rendu par lot dans le processus courant (regenerate_invoices, 1 processus)
+    puis avec un processus par cœur.
+"""
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from bench_pdf_batch import YEAR, seed
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    tmp_dir = tempfile.mkdtemp(prefix='picocompta_bench_')
+    os.environ['PICOCOMPTA_DB'] = os.path.join(tmp_dir, 'bench.db')
+
+    from db.database_utils import init_database, get_connection
+    from pages.invoice_pdf import generate_invoice, load_pdf_generator
+    from pages.pdf_batch import fetch_invoices_data, regenerate_invoices
+    init_database()
+    seed(get_connection(), count)
+    invoice_ids = [row[0] for row in get_connection().execute("SELECT id_facture FROM Factures ORDER BY id_facture")]
+
+    generator_class = load_pdf_generator()
+    generator_class()  # Premier appel : construction des styles partagés
+    start = time.perf_counter()
+    for _ in range(100):
+        generator_class()
+    construction = (time.perf_counter() - start) / 100
+    print(f"{count} factures de {YEAR}, {os.cpu_count() or 1} cœur(s)")
+    print(f"  InvoicePDFGenerator()      {construction * 1e6:9.1f} µs")
+
+    single_dir = os.path.join(tmp_dir, 'single')
+    os.makedirs(single_dir)
+    start = time.perf_counter()
+    for invoice_id in invoice_ids:
+        generate_invoice(invoice_id, os.path.join(single_dir, f"facture_{invoice_id}.pdf"))
+    elapsed = time.perf_counter() - start
+    print(f"  rendu unitaire             {count / elapsed:9.1f} factures/s")
+
+    generator = generator_class()
+    invoices = fetch_invoices_data(invoice_ids)
+    start = time.perf_counter()
+    for invoice_data in invoices:
+        generator.render_bytes(invoice_data)
+    elapsed = time.perf_counter() - start
+    print(f"  en mémoire, préchargées    {count / elapsed:9.1f} factures/s")
+
+    for processes, label in ((1, "lot, 1 processus"), (None, "lot, 1 processus par cœur")):
+        start = time.perf_counter()
+        generated, _ = regenerate_invoices(start_date=f"{YEAR}-01-01", end_date=f"{YEAR}-12-31",
+                                           output_dir=os.path.join(tmp_dir, f'batch_{processes}'),
+                                           processes=processes)
+        elapsed = time.perf_counter() - start
+        print(f"  {label:<26} {len(generated) / elapsed:9.1f} factures/s")
+
+if __name__ == '__main__':
+    main()
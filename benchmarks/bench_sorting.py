@@ -0,0 +1,65 @@
+# benchmarks/bench_sorting.py
+"""
+Mesure le retri en mémoire de la liste des factures (ListingColumns).
+
+Usage : python benchmarks/bench_sorting.py [nombre_de_lignes]
+
+Le script génère des lignes synthétiques au format de fetch_factures_page,
+sans base de données, et chronomètre le chemin de MesFacturesPage.trier_par :
+l'ajout de toutes les lignes en colonnes (sans dictionnaires d'affichage),
+puis pour chaque critère de tri le premier tri (calcul de la permutation) et
+l'inversion de l'ordre (permutation en cache), chacun avec la création des
+PAGE_SIZE enregistrements de la première page.
+"""
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from db.listings import ListingColumns, FACTURE_COLUMNS, FACTURE_SORT_COLUMNS, PAGE_SIZE
+
+def synthetic_rows(count, seed=1):
+    rng = random.Random(seed)
+    types = ['BNC', 'BIC marchandise', 'BIC service']
+    rows = []
+    for facture_id in range(1, count + 1):
+        # Montants en centimes, comme dans Factures
+        montant_ht = rng.randint(1000, 500000)
+        tva = (montant_ht * 2000 + 5000) // 10000
+        rows.append((
+            facture_id,
+            f"client {rng.randint(1, 200)}",
+            f"{rng.randint(2020, 2025)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            montant_ht,
+            tva,
+            montant_ht + tva,
+            rng.randint(0, 1),
+            rng.choice(types),
+        ))
+    return rows
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    listing = ListingColumns(FACTURE_COLUMNS, 'facture_id',
+                             lambda row: dict(zip(FACTURE_COLUMNS, row)))
+    rows = synthetic_rows(count)
+    start = time.perf_counter()
+    listing.extend(rows)
+    print(f"{count} factures en colonnes en {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    for tri, column in FACTURE_SORT_COLUMNS.items():
+        start = time.perf_counter()
+        listing.sorted_records(column, True, 0, PAGE_SIZE)
+        first = time.perf_counter() - start
+
+        start = time.perf_counter()
+        listing.sorted_records(column, False, 0, PAGE_SIZE)
+        toggle = time.perf_counter() - start
+
+        print(f"{tri:<14} premier tri {first * 1000:7.1f} ms   inversion {toggle * 1000:6.1f} ms")
+
+if __name__ == '__main__':
+    main()
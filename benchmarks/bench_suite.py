@@ -0,0 +1,184 @@
+# benchmarks/bench_suite.py
+"""
+Suite de benchmarks des requêtes fréquentes sur des registres synthétiques.
+
+Usage : python benchmarks/bench_suite.py [--tailles N ...] [--bases DOSSIER]
+                                         [--json FICHIER] [--comparer ANCIEN.json]
+
+Pour chaque taille (1000, 100000 et 1000000 factures par défaut), le script
+génère un registre avec benchmarks/ledger.py (gardé dans --bases pour les
+exécutions suivantes : le million de factures prend une quarantaine de
+secondes) puis chronomètre, sans Kivy, les services appelés
+par les écrans (picocompta.core et db/) :
+  - urssaf_period_data / tva_period_data (un trimestre, derrière
+    URSSAF_TVAPage.calculate_urssaf_data / calculate_tva_data) et
+    aggregate_periods (l'année, comme URSSAF_TVAPage.load_data) ;
+  - client_statistics, derrière DemarragePage.get_client_statistics ;
+  - dashboard_snapshot, lu par DemarragePage.update_progress_bars ;
+  - fetch_factures_page, la première page de MesFacturesPage.charger_factures ;
+  - InvoicePDFGenerator.fetch_invoice_data.
+
+Comme pytest-benchmark, chaque fonction est appelée une fois à vide puis
+répétée au moins MIN_ROUNDS fois et pendant au moins MIN_TIME secondes. Les
+statistiques (secondes) sont écrites en JSON ; --comparer affiche l'écart des
+médianes avec un fichier précédent et signale les régressions.
+"""
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from ledger import YEARS, generate_ledger
+
+SIZES = (1000, 100000, 1000000)
+CLIENTS = 500
+MIN_ROUNDS = 5
+MAX_ROUNDS = 10000
+MIN_TIME = 0.5
+# Écart de médiane au-delà duquel --comparer signale une régression
+REGRESSION_RATIO = 1.20
+
+def ledger_path(directory, size):
+    """Base du registre de `size` factures, générée si elle n'existe pas encore."""
+    from db.database_utils import init_database, get_connection, close_connection
+    path = os.path.join(directory, f'registre_{size}.db')
+    if not os.path.exists(path):
+        building = path + '.tmp'
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(building + suffix):
+                os.remove(building + suffix)
+        print(f"Génération du registre de {size} factures...")
+        if not init_database(building):
+            sys.exit("Impossible d'initialiser la base du registre.")
+        generate_ledger(get_connection(building), size, min(CLIENTS, size))
+        get_connection(building).execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        close_connection(building)
+        os.replace(building, path)
+    return path
+
+def measure(fn):
+    """Chronomètre fn() ; retourne les statistiques au format de pytest-benchmark."""
+    fn()  # Appel à vide : caches SQLite et requêtes préparées
+    timings = []
+    started = time.perf_counter()
+    while len(timings) < MAX_ROUNDS and (len(timings) < MIN_ROUNDS or time.perf_counter() - started < MIN_TIME):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    mean = statistics.mean(timings)
+    return {
+        'min': min(timings),
+        'max': max(timings),
+        'mean': mean,
+        'stddev': statistics.stdev(timings) if len(timings) > 1 else 0.0,
+        'median': statistics.median(timings),
+        'rounds': len(timings),
+        'ops': 1 / mean if mean else None,
+    }
+
+def hot_paths(db_path):
+    """Fonctions à mesurer sur la base `db_path`, par nom."""
+    from db.aggregations import aggregate_periods
+    from db.dashboard import dashboard_snapshot
+    from db.listings import fetch_factures_page
+    from pages.pdf_generator import InvoicePDFGenerator
+    from picocompta.core.clients import client_statistics
+    from picocompta.core.declarations import declaration_periods, urssaf_period_data, tva_period_data
+
+    periods = declaration_periods(YEARS[-2], 3)  # Dernière année complète, par trimestre
+    quarter = periods[1]
+    invoice_count = sqlite3.connect(db_path).execute("SELECT MAX(id_facture) FROM Factures").fetchone()[0]
+    generator = InvoicePDFGenerator(db_path)
+    next_id = iter(range(10 ** 9))
+
+    return {
+        'calculate_urssaf_data': lambda: urssaf_period_data(quarter['start_date'], quarter['end_date']),
+        'calculate_tva_data': lambda: tva_period_data(quarter['start_date'], quarter['end_date']),
+        'aggregate_periods': lambda: aggregate_periods(periods, 3),
+        'get_client_statistics': lambda: client_statistics(),
+        'update_progress_bars': lambda: dashboard_snapshot(),
+        'charger_factures': lambda: fetch_factures_page('date', True),
+        # Factures différentes à chaque appel, réparties sur tout le registre
+        'fetch_invoice_data': lambda: generator.fetch_invoice_data(next(next_id) * 7919 % invoice_count + 1),
+    }
+
+def machine_info():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                text=True, cwd=ROOT).stdout.strip() or None
+    except OSError:
+        commit = None
+    from db.database_utils import get_performance_profile
+    return {
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'profil_base': get_performance_profile(),
+        'commit': commit,
+    }
+
+def compare(results, previous_path):
+    """Affiche l'écart des médianes avec un fichier de résultats précédent."""
+    with open(previous_path, encoding='utf-8') as f:
+        previous = {(bench['name'], bench['params']['factures']): bench['stats']['median']
+                    for bench in json.load(f)['benchmarks']}
+    regressions = 0
+    print(f"\nComparaison avec {previous_path} (médianes) :")
+    for bench in results:
+        key = (bench['name'], bench['params']['factures'])
+        if key not in previous:
+            continue
+        ratio = bench['stats']['median'] / previous[key]
+        flag = ""
+        if ratio > REGRESSION_RATIO:
+            flag = "  régression"
+            regressions += 1
+        print(f"  {key[0]:<24} {key[1]:>8}  x{ratio:6.2f}{flag}")
+    return regressions
+
+def main(argv):
+    parser = argparse.ArgumentParser(prog='python benchmarks/bench_suite.py',
+                                     description="Benchmarks des requêtes fréquentes.")
+    parser.add_argument('--tailles', type=int, nargs='+', default=list(SIZES), help="nombres de factures")
+    parser.add_argument('--bases', default=os.path.join(tempfile.gettempdir(), 'picocompta_registres'),
+                        help="dossier des registres générés (réutilisés d'une exécution à l'autre)")
+    parser.add_argument('--json', help="fichier de résultats (défaut : bench_suite.json dans --bases)")
+    parser.add_argument('--comparer', help="résultats précédents à comparer")
+    args = parser.parse_args(argv[1:])
+    os.makedirs(args.bases, exist_ok=True)
+    args.json = args.json or os.path.join(args.bases, 'bench_suite.json')
+
+    results = []
+    for size in args.tailles:
+        db_path = ledger_path(args.bases, size)
+        os.environ['PICOCOMPTA_DB'] = db_path
+
+        print(f"\n{size} factures")
+        for name, fn in hot_paths(db_path).items():
+            stats = measure(fn)
+            results.append({'name': name, 'group': str(size), 'params': {'factures': size}, 'stats': stats})
+            print(f"  {name:<24} médiane {stats['median'] * 1e3:9.3f} ms  "
+                  f"min {stats['min'] * 1e3:9.3f} ms  ({stats['rounds']} tours)")
+
+    with open(args.json, 'w', encoding='utf-8') as f:
+        json.dump({'datetime': datetime.now().isoformat(timespec='seconds'),
+                   'machine_info': machine_info(), 'benchmarks': results}, f, indent=2)
+    print(f"\nRésultats écrits dans {args.json}")
+
+    if args.comparer and compare(results, args.comparer):
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main(sys.argv)
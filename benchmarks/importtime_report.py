@@ -0,0 +1,105 @@
+# benchmarks/importtime_report.py
+"""
+Rapport des temps d'import au démarrage (python -X importtime).
+
+Usage : python benchmarks/importtime_report.py [fichier_rapport]
+
+Le script lance dans un sous-processus le chemin de démarrage de l'application
+(import de main et construction du ScreenManager) sur une base temporaire,
+écrit le journal brut de -X importtime suivi d'un résumé dans `fichier_rapport`
+(par défaut importtime_report.txt dans un dossier temporaire) et affiche le
+résumé. Il se termine en erreur si un module interdit au démarrage (reportlab)
+a été importé. tests/test_startup_imports.py fait la même vérification sous pytest.
+"""
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Modules qui ne doivent pas être chargés avant le premier écran
+FORBIDDEN_AT_STARTUP = ('reportlab', 'pages.pdf_generator')
+
+TOP_N = 20
+
+STARTUP_SNIPPET = """
+from db.database_utils import init_database
+init_database()
+import main
+main.MainApp().build()
+"""
+
+def run_importtime(db_path):
+    env = dict(os.environ)
+    env.update({
+        'KIVY_NO_ARGS': '1',
+        'KIVY_NO_CONSOLELOG': '1',
+        'KIVY_NO_FILELOG': '1',
+        'PICOCOMPTA_DB': db_path,
+    })
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', STARTUP_SNIPPET],
+        cwd=ROOT, env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Le démarrage a échoué :\n{result.stderr[-2000:]}")
+    return [line for line in result.stderr.splitlines() if line.startswith('import time:')]
+
+def parse(lines):
+    """Retourne une liste de (module, self_us, cumulative_us, profondeur)."""
+    entries = []
+    for line in lines:
+        fields = line[len('import time:'):].split('|')
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # ligne d'en-tête
+        name = fields[2].rstrip()
+        depth = (len(name) - len(name.lstrip())) // 2
+        entries.append((name.strip(), int(fields[0]), int(fields[1]), depth))
+    return entries
+
+def summarize(entries):
+    total_us = sum(self_us for _, self_us, _, _ in entries)
+    top_level = sorted((e for e in entries if e[3] <= 1), key=lambda e: e[2], reverse=True)
+    by_self = sorted(entries, key=lambda e: e[1], reverse=True)
+
+    lines = [f"{len(entries)} modules importés, {total_us / 1000:.1f} ms au total", ""]
+    lines.append("Imports de premier niveau les plus coûteux (cumulé) :")
+    lines += [f"  {cumulative / 1000:8.1f} ms  {name}" for name, _, cumulative, _ in top_level[:TOP_N]]
+    lines.append("")
+    lines.append("Modules les plus coûteux (propre) :")
+    lines += [f"  {self_us / 1000:8.1f} ms  {name}" for name, self_us, _, _ in by_self[:TOP_N]]
+    return lines
+
+def forbidden_modules(entries):
+    """Modules de FORBIDDEN_AT_STARTUP (ou leurs sous-modules) présents dans `entries`."""
+    return sorted({name for name, _, _, _ in entries
+                   if name.split('.')[0] in FORBIDDEN_AT_STARTUP or name in FORBIDDEN_AT_STARTUP})
+
+def write_report(output, raw, summary):
+    """Écrit le résumé puis le journal brut de -X importtime dans `output`."""
+    with open(output, 'w', encoding='utf-8') as report:
+        report.write("\n".join(summary) + "\n\n")
+        report.write("\n".join(raw) + "\n")
+
+def main():
+    tmp_dir = tempfile.mkdtemp(prefix='picocompta_importtime_')
+    output = sys.argv[1] if len(sys.argv) > 1 else os.path.join(tmp_dir, 'importtime_report.txt')
+
+    try:
+        raw = run_importtime(os.path.join(tmp_dir, 'startup.db'))
+    except RuntimeError as e:
+        sys.exit(str(e))
+    entries = parse(raw)
+    summary = summarize(entries)
+    write_report(output, raw, summary)
+
+    print("\n".join(summary))
+    print(f"\nRapport complet : {output}")
+
+    forbidden = forbidden_modules(entries)
+    if forbidden:
+        sys.exit(f"Modules chargés au démarrage alors qu'ils devraient être différés : {', '.join(forbidden)}")
+
+if __name__ == '__main__':
+    main()
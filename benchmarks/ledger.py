@@ -0,0 +1,174 @@
+# benchmarks/ledger.py
+"""
+Générateur déterministe de registres synthétiques (profil, clients, factures).
+
+Usage : python benchmarks/ledger.py chemin.db [nombre_de_factures] [nombre_de_clients]
+
+Pour une même graine, le contenu généré est identique d'une exécution à
+l'autre. Les factures couvrent plusieurs années et les trois types
+d'activité ; les taux URSSAF viennent du barème (db/rates.py). Les factures
+des années passées sont payées et déclarées, l'année en cours mélange impayées,
+payées non déclarées et déclarées ; les trimestres sans facture payée ont
+leur déclaration URSSAF à zéro.
+
+Les factures sont produites à la volée et insérées par paquets de
+CHUNK_SIZE ; les triggers de Factures_Rollup sont suspendus pendant
+l'insertion et le cumul recalculé une fois à la fin (un million de factures :
+une quarantaine de secondes sur un cœur).
+"""
+import os
+import random
+import sys
+from datetime import date, timedelta
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+# Quatre dernières années, l'année en cours comprise : les tableaux de bord
+# (année et trimestre courants) ont des données à agréger
+YEARS = tuple(range(date.today().year - 3, date.today().year + 1))
+# Types d'activité et leur poids dans le registre
+ACTIVITY_WEIGHTS = {'BNC': 5, 'BIC service': 3, 'BIC marchandise': 2}
+# Colonne de montant HT (et de montant TTC) de chaque type d'activité
+ACTIVITY_COLUMNS = {'BNC': 'BNC', 'BIC service': 'BICs', 'BIC marchandise': 'BICm'}
+CHUNK_SIZE = 50000
+
+INSERT_FACTURE = """
+    INSERT INTO Factures (id_client, status, status_declaration_URSSAF, status_declaration_TVA,
+                          date_status_set, date_emission, date_echeance,
+                          montant_htBICs, montant_htBICm, montant_htBNC, tva,
+                          montant_totalBICs, montant_totalBICm, montant_totalBNC, montant_total,
+                          mission, tva_status, taux_tva, type_activite,
+                          taux_BICs, taux_BICm, taux_BNC, numero_facture)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Trimestres des années générées sans facture payée : déclaration URSSAF à zéro
+ZERO_DECLARATIONS = """
+    WITH quarters (date_debut, date_fin) AS (
+        SELECT years.value || '-' || q.debut, years.value || '-' || q.fin
+        FROM json_each(:years) AS years
+        CROSS JOIN (SELECT '01-01' AS debut, '03-31' AS fin UNION ALL SELECT '04-01', '06-30'
+                    UNION ALL SELECT '07-01', '09-30' UNION ALL SELECT '10-01', '12-31') AS q
+    )
+    INSERT INTO Declarations_Zero (type, date_debut, date_fin, commentaire)
+    SELECT 'URSSAF', date_debut, date_fin, 'registre synthétique'
+    FROM quarters
+    WHERE NOT EXISTS (
+        SELECT 1 FROM Factures
+        WHERE status = 1 AND date_emission BETWEEN quarters.date_debut AND quarters.date_fin
+    )
+"""
+
+def _invoice_rows(count, client_ids, years, rng, rates_at):
+    """Lignes d'INSERT_FACTURE, produites une à une dans l'ordre de numérotation."""
+    activities = list(ACTIVITY_WEIGHTS)
+    weights = list(ACTIVITY_WEIGHTS.values())
+    # Activité commencée en avril : le 1er trimestre est déclaré à zéro
+    first_day = date(years[0], 4, 1)
+    span = (date(years[-1], 12, 31) - first_day).days + 1
+    current_year = years[-1]
+
+    for numero in range(1, count + 1):
+        # Dates d'émission croissantes avec les numéros, comme une saisie réelle
+        date_emission = first_day + timedelta(days=int((numero - 1 + rng.random()) * span / count))
+        type_activite = rng.choices(activities, weights)[0]
+        montant_ht = rng.randint(5000, 800000)  # 50 € à 8 000 €
+        tva_status = 1 if date_emission.year >= years[-2] else 0
+        taux_tva = 2000 if tva_status else 0
+        tva = (montant_ht * taux_tva + 5000) // 10000
+        total = montant_ht + tva
+
+        if date_emission.year < current_year:
+            status, declared = 1, 1
+        else:
+            status = 1 if rng.random() < 0.7 else 0
+            declared = 1 if status and date_emission.month <= 6 else 0
+        date_status_set = (date_emission + timedelta(days=rng.randint(0, 90))).isoformat() if status else None
+
+        amounts = {column: (montant_ht, total) if column == ACTIVITY_COLUMNS[type_activite] else (0, 0)
+                   for column in ('BICs', 'BICm', 'BNC')}
+        emission = date_emission.isoformat()
+        rates = rates_at(emission)
+        yield (
+            rng.choice(client_ids), status, declared, declared if tva_status else 0,
+            date_status_set, emission, (date_emission + timedelta(days=30)).isoformat(),
+            amounts['BICs'][0], amounts['BICm'][0], amounts['BNC'][0], tva,
+            amounts['BICs'][1], amounts['BICm'][1], amounts['BNC'][1], total,
+            f"Mission {numero}", tva_status, taux_tva, type_activite,
+            rates['taux_BICs'], rates['taux_BICm'], rates['taux_BNC'], numero,
+        )
+
+def generate_ledger(conn, invoices=1000, clients=50, years=YEARS, seed=1):
+    """
+    Remplit une base migrée et vide avec un registre synthétique.
+
+    Ajoute un profil (Info_Personnelle), `clients` clients et `invoices`
+    factures réparties sur `years`, puis les déclarations à zéro et le cumul
+    Factures_Rollup. Retourne le nombre de factures insérées.
+    """
+    import json
+    from db.rates import rates_for
+    from db.rollup import create_rollup
+
+    rng = random.Random(seed)
+    years = tuple(sorted(years))
+    cursor = conn.cursor()
+    cursor.execute("""
+        INSERT INTO Info_Personnelle (nom, prenom, adresse, CP, pays, email, telephone,
+                                      nsiret, codeape, ntva, iban, bic, debut_activite,
+                                      status_tva, debut_activite_TVA, echeance_declaration,
+                                      dernier_numero_facture, activite_principal)
+        VALUES ('Synthétique', 'Registre', '1 rue des Tests', '75001', 'France',
+                'registre@example.org', '0100000000', '00000000000000', '6201Z',
+                'FR00000000000', 'FR7600000000000000000000000', 'SYNTFRPP', ?, 1, ?, 3, ?, 'BNC')
+    """, (f"{years[0]}-01-01", f"{years[-2] if len(years) > 1 else years[0]}-01-01", invoices))
+
+    client_ids = []
+    for index in range(1, clients + 1):
+        cursor.execute("""
+            INSERT INTO Clients (nom, adresse, CP, pays, email, nsiret, ntva)
+            VALUES (?, ?, ?, 'France', ?, ?, ?)
+        """, (f"Client {index:05d}", f"{index} avenue du Test", f"{69000 + index % 1000:05d}",
+              f"client{index}@example.org", f"{index:014d}", f"FR{index:011d}" if index % 4 else ''))
+        client_ids.append(cursor.lastrowid)
+
+    rates_cache = {}
+    def rates_at(emission):
+        if emission not in rates_cache:
+            rates_cache[emission] = rates_for(emission, conn)
+        return rates_cache[emission]
+
+    # Cumul recalculé en une requête à la fin plutôt que ligne à ligne
+    cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'trg_factures_rollup_%'")
+    for (name,) in cursor.fetchall():
+        cursor.execute(f"DROP TRIGGER {name}")
+    rows = _invoice_rows(invoices, client_ids, years, rng, rates_at)
+    while True:
+        chunk = [row for _, row in zip(range(CHUNK_SIZE), rows)]
+        if not chunk:
+            break
+        cursor.executemany(INSERT_FACTURE, chunk)
+    create_rollup(cursor)
+
+    cursor.execute(ZERO_DECLARATIONS, {'years': json.dumps(list(years))})
+    conn.commit()
+    return invoices
+
+def main(argv):
+    if len(argv) < 2:
+        sys.exit("Usage : python benchmarks/ledger.py chemin.db [nombre_de_factures] [nombre_de_clients]")
+    db_path = argv[1]
+    invoices = int(argv[2]) if len(argv) > 2 else 1000
+    clients = int(argv[3]) if len(argv) > 3 else 50
+    if os.path.exists(db_path):
+        sys.exit(f"{db_path} existe déjà : le registre est généré dans une base neuve.")
+
+    from db.database_utils import init_database, get_connection
+    if not init_database(db_path):
+        sys.exit("Impossible d'initialiser la base.")
+    generate_ledger(get_connection(db_path), invoices, clients)
+    print(f"{invoices} factures et {clients} clients générés dans {db_path}")
+
+if __name__ == '__main__':
+    main(sys.argv)
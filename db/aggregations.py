@@ -0,0 +1,147 @@
+#db/aggregations.py
+
+import sqlite3
+from db.database_utils import get_connection
+from db.money import Money
+
+# Taux URSSAF par défaut lorsque la facture n'en porte pas, en points de base
+DEFAULT_TAUX = {
+    'BNC': 2200,
+    'BIC marchandise': 1300,
+    'BIC service': 2450,
+}
+
+# Une seule requête : les cumuls mensuels des factures payées de l'année
+# (Factures_Rollup) regroupés par période et par type d'activité, suivis des
+# déclarations à zéro URSSAF de la même année. Le coût ne dépend plus du
+# nombre de factures mais du nombre de lignes de cumul (quelques dizaines).
+PERIOD_AGGREGATION_QUERY = """
+    SELECT 'F' AS kind,
+           ((annee - :start_year) * 12 + mois - :start_month) / :step AS bucket,
+           NULLIF(type_activite, '') AS type_activite,
+           SUM(nb_factures) AS nb_factures,
+           SUM(total_ht) AS total_ht,
+           SUM(total_tva) AS total_tva,
+           SUM(total_charge) AS total_charge,
+           MIN(status_declaration_URSSAF) AS urssaf_declared,
+           MIN(status_declaration_TVA) AS tva_declared,
+           NULL AS date_debut,
+           NULL AS date_fin
+    FROM Factures_Rollup
+    WHERE (annee, mois) BETWEEN (:start_year, :start_month) AND (:end_year, :end_month)
+      AND status = 1
+    GROUP BY bucket, type_activite
+
+    UNION ALL
+
+    SELECT 'Z', NULL, NULL, NULL, NULL, NULL, NULL, NULL, NULL, date_debut, date_fin
+    FROM Declarations_Zero
+    WHERE type = 'URSSAF' AND date_debut BETWEEN :start_date AND :end_date
+"""
+
+def year_month(date_str):
+    """('2024-03-31') -> (2024, 3), clé (annee, mois) de Factures_Rollup."""
+    return int(date_str[:4]), int(date_str[5:7])
+
+def _empty_urssaf_totals():
+    return {
+        "nb_factures": 0,
+        "total_ht": Money(0),
+        "total_charge": Money(0),
+        "total_bnc": Money(0),
+        "total_bicm": Money(0),
+        "total_bics": Money(0),
+        "all_declared": True
+    }
+
+def _empty_tva_totals():
+    return {
+        "nb_factures": 0,
+        "total_ht": Money(0),
+        "total_tva": Money(0),
+        "all_declared": None
+    }
+
+def aggregate_periods(periods, months_per_period, conn=None):
+    """
+    Calcule en un seul aller-retour les chiffres URSSAF et TVA de chaque période.
+
+    `periods` est la liste ordonnée de périodes consécutives de
+    `months_per_period` mois entiers chacune, comme celles de
+    picocompta.core.declarations.declaration_periods (mois ou trimestres).
+
+    Retourne une liste de tuples (urssaf_data, tva_data) alignée sur `periods`,
+    avec les mêmes clés que calculate_urssaf_data et calculate_tva_data ; les
+    montants sont des Money.
+    """
+    if not periods:
+        return []
+
+    urssaf = [_empty_urssaf_totals() for _ in periods]
+    tva = [_empty_tva_totals() for _ in periods]
+    has_invoices = [False] * len(periods)
+    zero_declared = [False] * len(periods)
+    index_by_dates = {(p['start_date'], p['end_date']): i for i, p in enumerate(periods)}
+
+    try:
+        cursor = (conn or get_connection()).cursor()
+        start_year, start_month = year_month(periods[0]['start_date'])
+        end_year, end_month = year_month(periods[-1]['end_date'])
+        cursor.execute(PERIOD_AGGREGATION_QUERY, {
+            'step': months_per_period,
+            'start_date': periods[0]['start_date'],
+            'end_date': periods[-1]['end_date'],
+            'start_year': start_year,
+            'start_month': start_month,
+            'end_year': end_year,
+            'end_month': end_month,
+        })
+        rows = cursor.fetchall()
+    except sqlite3.Error as e:
+        print(f"Erreur lors de l'agrégation des périodes : {e}")
+        rows = []
+
+    for (kind, bucket, activity_type, nb_factures, total_ht, total_tva,
+         total_charge, urssaf_declared, tva_declared, date_debut, date_fin) in rows:
+        if kind == 'Z':
+            index = index_by_dates.get((date_debut, date_fin))
+            if index is not None:
+                zero_declared[index] = True
+            continue
+
+        if bucket is None or not 0 <= bucket < len(periods):
+            continue
+
+        has_invoices[bucket] = True
+        total_ht, total_tva, total_charge = Money(total_ht), Money(total_tva), Money(total_charge)
+        totals = urssaf[bucket]
+        totals["nb_factures"] += nb_factures
+        totals["total_ht"] += total_ht
+        totals["total_charge"] += total_charge
+        if activity_type == 'BNC':
+            totals["total_bnc"] += total_charge
+        elif activity_type == 'BIC marchandise':
+            totals["total_bicm"] += total_charge
+        elif activity_type == 'BIC service':
+            totals["total_bics"] += total_charge
+        if not urssaf_declared:
+            totals["all_declared"] = False
+
+        tva_totals = tva[bucket]
+        tva_totals["nb_factures"] += nb_factures
+        tva_totals["total_ht"] += total_ht
+        tva_totals["total_tva"] += total_tva
+        if tva_declared is not None:
+            if tva_totals["all_declared"] is None:
+                tva_totals["all_declared"] = tva_declared
+            else:
+                tva_totals["all_declared"] = min(tva_totals["all_declared"], tva_declared)
+
+    for index in range(len(periods)):
+        if has_invoices[index]:
+            urssaf[index]["all_declared"] = urssaf[index]["all_declared"] or zero_declared[index]
+        else:
+            urssaf[index]["all_declared"] = zero_declared[index]
+        tva[index]["all_declared"] = bool(tva[index]["all_declared"])
+
+    return list(zip(urssaf, tva))
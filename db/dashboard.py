@@ -0,0 +1,167 @@
+#db/dashboard.py
+"""
+Instantané des indicateurs affichés par l'accueil et la page de démarrage.
+
+dashboard_snapshot() part du profil en cache (db/profile.py) et lit en une
+seule transaction de lecture (donc sur un état cohérent de la base) : les
+factures impayées, les factures de la dernière période non déclarées et le
+chiffre d'affaires des années N, N-1 et N-2. Ces requêtes portent sur
+Factures_Rollup, par plages de sa clé (annee, mois).
+apply_tva_status() applique ensuite, sur le thread d'écriture, le passage à
+la TVA que l'instantané a détecté.
+"""
+import sqlite3
+from datetime import datetime
+from db.database_utils import get_connection
+from db.money import Money
+from db.profile import get_profile, load_profile, invalidate_profile
+from picocompta.core.thresholds import tva_required as thresholds_exceeded
+
+# Valeur de ntva tant que le numéro n'a pas été attribué
+NTVA_PENDING = "en cours d'acquisition"
+
+# Impayés (toutes années) et factures payées de la période non déclarées
+COUNTS_QUERY = """
+    SELECT
+        COALESCE(SUM(CASE WHEN status = 0 THEN nb_factures END), 0),
+        COALESCE(SUM(CASE WHEN status = 1
+                           AND (annee, mois) BETWEEN (:start_year, :start_month) AND (:end_year, :end_month)
+                           AND (status_declaration_URSSAF = 0 OR status_declaration_TVA = 0)
+                          THEN nb_factures END), 0)
+    FROM Factures_Rollup
+"""
+
+TURNOVER_QUERY = """
+    SELECT annee,
+           COALESCE(SUM(total_htBICm), 0) AS total_sales,
+           COALESCE(SUM(total_htBICs), 0) + COALESCE(SUM(total_htBNC), 0) AS total_services
+    FROM Factures_Rollup
+    WHERE annee BETWEEN ? AND ?
+    GROUP BY annee
+"""
+
+def declaration_period(current_date, echeance_declaration):
+    """Retourne (début, fin) de la période de déclaration vérifiée à la date donnée."""
+    current_year = current_date.year
+    current_month = current_date.month
+
+    if echeance_declaration == 3:  # Trimestriel
+        quarter = (current_month - 1) // 3
+        period_end = datetime(current_year, (quarter * 3) + 3, 1).replace(
+            day=28 if (quarter * 3) + 3 == 2 else 30 if (quarter * 3) + 3 in [4, 6, 9, 11] else 31
+        )
+        period_start = datetime(current_year, (quarter * 3) + 1, 1)
+    else:  # Mensuel
+        if current_month == 1:
+            period_start = datetime(current_year - 1, 12, 1)
+            period_end = datetime(current_year - 1, 12, 31)
+        else:
+            period_start = datetime(current_year, current_month - 1, 1)
+            last_day = 28 if current_month - 1 == 2 else 30 if current_month - 1 in [4, 6, 9, 11] else 31
+            period_end = datetime(current_year, current_month - 1, last_day)
+    return period_start, period_end
+
+def dashboard_snapshot(now=None, conn=None):
+    """
+    Calcule l'instantané du tableau de bord ; retourne None en cas d'erreur.
+
+    Clés du dictionnaire retourné :
+      unpaid_count          nombre de factures impayées
+      pending_declarations  {'start', 'end', 'count'} si la période est échue
+                            et contient des factures non déclarées, sinon None
+      turnover              {année: (ventes, services)} pour N, N-1 et N-2,
+                            en Money ; N inclut caNm/caNs la première année
+      status_tva, ntva, debut_activite_tva
+                            valeurs du profil
+      has_info              False si aucun profil n'est enregistré
+      tva_required          un seuil de TVA est dépassé
+      missing_tva_number    TVA requise et active mais sans numéro attribué
+    """
+    now = now or datetime.now()
+    current_year = now.year
+    own_transaction = False
+    try:
+        profile = get_profile() if conn is None else load_profile(conn)
+        conn = conn or get_connection()
+        own_transaction = not conn.in_transaction
+        if own_transaction:
+            conn.execute("BEGIN")  # Toutes les lectures voient le même état
+        cursor = conn.cursor()
+
+        echeance = profile.echeance_declaration if profile else None
+        period_start, period_end = declaration_period(now, echeance if echeance else 3)
+        cursor.execute(COUNTS_QUERY, {
+            'start_year': period_start.year, 'start_month': period_start.month,
+            'end_year': period_end.year, 'end_month': period_end.month,
+        })
+        unpaid_count, pending_count = cursor.fetchone()
+
+        cursor.execute(TURNOVER_QUERY, (current_year - 2, current_year))
+        turnover = {year: (Money(0), Money(0)) for year in range(current_year - 2, current_year + 1)}
+        for year, sales, services in cursor.fetchall():
+            turnover[year] = (Money(sales), Money(services))
+        debut_activite = profile.debut_activite_date if profile else None
+        debut_activite_year = debut_activite.year if debut_activite else None
+    except (sqlite3.Error, ValueError) as e:
+        print(f"Erreur lors du calcul du tableau de bord : {e}")
+        return None
+    finally:
+        if own_transaction and conn.in_transaction:
+            conn.rollback()  # Lecture seule : rien à valider
+
+    # caNm et caNs (euros) complètent l'année de début d'activité
+    if debut_activite_year == current_year:
+        sales, services = turnover[current_year]
+        turnover[current_year] = (sales + Money.from_euros(profile.caNm or 0),
+                                  services + Money.from_euros(profile.caNs or 0))
+
+    status_tva = profile.status_tva if profile else None
+    ntva = profile.ntva if profile else None
+    tva_required = profile is not None and thresholds_exceeded(turnover, current_year)
+    pending = None
+    if now > period_end and pending_count > 0:
+        pending = {'start': period_start, 'end': period_end, 'count': pending_count}
+
+    return {
+        'unpaid_count': unpaid_count,
+        'pending_declarations': pending,
+        'turnover': turnover,
+        'status_tva': status_tva,
+        'ntva': ntva,
+        'debut_activite_tva': profile.debut_activite_TVA if profile else None,
+        'has_info': profile is not None,
+        'tva_required': tva_required,
+        'missing_tva_number': (tva_required and status_tva == 1 and
+                               (ntva is None or ntva.strip() == NTVA_PENDING)),
+    }
+
+def apply_tva_status(snapshot, conn=None):
+    """
+    Active la TVA dans Info_Personnelle si l'instantané l'exige (thread d'écriture).
+
+    La date de début d'assujettissement est renseignée si la TVA était déjà
+    active sans date. Retourne snapshot['missing_tva_number'].
+    """
+    if not snapshot or not snapshot['tva_required']:
+        return False
+    conn = conn or get_connection()
+    try:
+        cursor = conn.cursor()
+        if snapshot['status_tva'] != 1:
+            cursor.execute("""
+                UPDATE Info_personnelle
+                SET status_tva = 1
+                WHERE id_personnelle = (SELECT MAX(id_personnelle) FROM Info_personnelle)
+            """)
+        elif not snapshot['debut_activite_tva']:
+            cursor.execute("""
+                UPDATE Info_personnelle
+                SET debut_activite_TVA = ?
+                WHERE id_personnelle = (SELECT MAX(id_personnelle) FROM Info_personnelle)
+            """, (datetime.now().strftime('%Y-%m-%d'),))
+        conn.commit()
+        invalidate_profile()
+    except sqlite3.Error as e:
+        conn.rollback()
+        print(f"Erreur lors de la mise à jour du statut TVA : {e}")
+    return snapshot['missing_tva_number']
@@ -2,21 +2,282 @@
 
 import sqlite3
 import os
+import threading
+
+# Nombre de requêtes préparées gardées en cache par connexion
+STATEMENT_CACHE_SIZE = 256
+
+# Profils de performance : pragmas appliqués une seule fois, à l'ouverture de
+# chaque connexion. La variable PICOCOMPTA_DB_PROFILE choisit le profil.
+PERFORMANCE_PROFILES = {
+    # Journal de rollback et fsync complet à chaque commit (ancien comportement) :
+    # une écriture bloque les lectures jusqu'à son commit
+    'rollback': (
+        "PRAGMA journal_mode = DELETE",
+        "PRAGMA synchronous = FULL",
+        "PRAGMA busy_timeout = 5000",
+        "PRAGMA temp_store = MEMORY",
+        "PRAGMA cache_size = -8000",
+    ),
+    # WAL avec fsync à chaque commit : lectures concurrentes, durabilité maximale
+    'wal_full': (
+        "PRAGMA journal_mode = WAL",
+        "PRAGMA synchronous = FULL",
+        "PRAGMA busy_timeout = 5000",
+        "PRAGMA temp_store = MEMORY",
+        "PRAGMA cache_size = -16000",
+        "PRAGMA mmap_size = 268435456",
+    ),
+    # WAL, fsync aux seuls checkpoints : la base reste cohérente après une
+    # coupure, seuls les derniers commits peuvent être perdus
+    'wal': (
+        "PRAGMA journal_mode = WAL",
+        "PRAGMA synchronous = NORMAL",
+        "PRAGMA busy_timeout = 5000",
+        "PRAGMA temp_store = MEMORY",
+        "PRAGMA cache_size = -16000",  # 16 Mo
+        "PRAGMA mmap_size = 268435456",  # 256 Mo
+    ),
+}
+DEFAULT_PERFORMANCE_PROFILE = 'wal'
+
+# Table Factures : montants en centimes (INTEGER), taux en points de base
+# (1 % = 100 pb), voir db/money.py. {table} permet la reconstruction en migration.
+FACTURES_TABLE = '''
+    CREATE TABLE IF NOT EXISTS {table} (
+        id_facture INTEGER PRIMARY KEY AUTOINCREMENT,
+        id_client INTEGER,
+        status INTEGER DEFAULT 0,
+        status_declaration_URSSAF INTEGER DEFAULT 0,
+        status_declaration_TVA INTEGER DEFAULT 0,
+        date_status_set DATE,
+        date_emission DATE,
+        date_echeance DATE,
+        montant_htBICs INTEGER DEFAULT 0,
+        montant_htBICm INTEGER DEFAULT 0,
+        montant_htBNC INTEGER DEFAULT 0,
+        montant_ht INTEGER GENERATED ALWAYS AS (COALESCE(montant_htBICs, 0) + COALESCE(montant_htBICm, 0) + COALESCE(montant_htBNC, 0)) STORED,
+        tva INTEGER DEFAULT 0,
+        montant_totalBICs INTEGER DEFAULT 0,
+        montant_totalBICm INTEGER DEFAULT 0,
+        montant_totalBNC INTEGER DEFAULT 0,
+        montant_total INTEGER DEFAULT 0,
+        mission TEXT DEFAULT '',
+        urssaf_status INTEGER DEFAULT 0,
+        tva_status INTEGER DEFAULT 0,
+        taux_tva INTEGER DEFAULT 0,
+        type_activite VARCHAR(50),
+        taux_BICs INTEGER DEFAULT 2150,
+        taux_BICm INTEGER DEFAULT 1240,
+        taux_BNC INTEGER DEFAULT 2480,
+        numero_facture INTEGER,
+        FOREIGN KEY (id_client) REFERENCES Clients(id_client)
+    );
+'''
+
+# Colonnes converties par la migration 4 : euros -> centimes, taux -> points de base
+FACTURES_CENTS_COLUMNS = ('montant_htBICs', 'montant_htBICm', 'montant_htBNC', 'tva',
+                          'montant_totalBICs', 'montant_totalBICm', 'montant_totalBNC',
+                          'montant_total')
+FACTURES_RATE_COLUMNS = ('taux_BICs', 'taux_BICm', 'taux_BNC')  # fractions (0.248)
+FACTURES_PERCENT_COLUMNS = ('taux_tva',)  # pourcentages (20.0)
+
+def _create_factures_rollup(cursor):
+    # Import tardif : db.rollup importe ce module
+    from db.rollup import create_rollup
+    create_rollup(cursor)
+
+def _create_rate_schedule(cursor):
+    # Import tardif : db.rates importe ce module
+    from db.rates import create_rate_schedule
+    create_rate_schedule(cursor)
+
+def _restore_bnc_boundary(cursor):
+    # Import tardif : db.rates importe ce module
+    from db.rates import restore_bnc_boundary
+    restore_bnc_boundary(cursor)
+
+def _convert_factures_to_cents(cursor):
+    """Reconstruit Factures avec des colonnes entières si elle est encore en DECIMAL."""
+    cursor.execute("PRAGMA table_info(Factures)")
+    declared = {row[1]: row[2].upper() for row in cursor.fetchall()}
+    if not declared.get('montant_total', '').startswith('DECIMAL'):
+        return  # Base créée directement avec le schéma en centimes
+
+    converted = {name: f"CAST(ROUND(COALESCE({name}, 0) * 100) AS INTEGER)"
+                 for name in FACTURES_CENTS_COLUMNS}
+    converted.update({name: f"CAST(ROUND({name} * 10000) AS INTEGER)"
+                      for name in FACTURES_RATE_COLUMNS})
+    converted.update({name: f"CAST(ROUND({name} * 100) AS INTEGER)"
+                      for name in FACTURES_PERCENT_COLUMNS})
+    # Toutes les colonnes sauf montant_ht, recalculée par la table
+    columns = [name for name in declared if name != 'montant_ht']
+
+    cursor.execute(FACTURES_TABLE.format(table='Factures_cents'))
+    cursor.execute(f"""
+        INSERT INTO Factures_cents ({', '.join(columns)})
+        SELECT {', '.join(converted.get(name, name) for name in columns)}
+        FROM Factures
+    """)
+    # Supprime aussi les index et les triggers de cumul de l'ancienne table
+    cursor.execute("DROP TABLE Factures")
+    cursor.execute("ALTER TABLE Factures_cents RENAME TO Factures")
+
+    for version, _, steps in MIGRATIONS:
+        if version in (1, 2):
+            for step in steps:
+                cursor.execute(step)
+    # Les sommes du cumul passent elles aussi en centimes
+    cursor.execute("DROP TABLE IF EXISTS Factures_Rollup")
+    _create_factures_rollup(cursor)
+
+# Migrations versionnées, appliquées dans l'ordre par apply_migrations().
+# Chaque entrée est (version, description, étapes) ; une étape est soit une
+# requête SQL, soit une fonction recevant le curseur. La version atteinte est
+# enregistrée dans PRAGMA user_version.
+MIGRATIONS = [
+    (1, "Index couvrants pour les requêtes par période, année et client", [
+        # Factures payées d'une période (URSSAF/TVA, déclarations, impayés)
+        """
+        CREATE INDEX IF NOT EXISTS idx_factures_status_date
+        ON Factures (status, date_emission, type_activite, montant_ht, tva)
+        """,
+        # Chiffre d'affaires par année (seuils TVA, plafonds)
+        """
+        CREATE INDEX IF NOT EXISTS idx_factures_date_montants
+        ON Factures (date_emission, montant_htBICm, montant_htBICs, montant_htBNC)
+        """,
+        # Jointures et statistiques par client
+        """
+        CREATE INDEX IF NOT EXISTS idx_factures_client_date
+        ON Factures (id_client, date_emission)
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_clients_nom ON Clients (nom)",
+        """
+        CREATE INDEX IF NOT EXISTS idx_declarations_zero_periode
+        ON Declarations_Zero (type, date_debut, date_fin)
+        """,
+    ]),
+    (2, "Index de tri pour la pagination des listes de factures", [
+        # Chaque index contient implicitement id_facture (rowid) après la clé,
+        # ce qui couvre l'ordre (clé de tri, id_facture) de la pagination
+        "CREATE INDEX IF NOT EXISTS idx_factures_date ON Factures (date_emission)",
+        "CREATE INDEX IF NOT EXISTS idx_factures_montant_ht ON Factures (montant_ht)",
+        "CREATE INDEX IF NOT EXISTS idx_factures_montant_total ON Factures (montant_total)",
+        "CREATE INDEX IF NOT EXISTS idx_factures_status ON Factures (status)",
+    ]),
+    (3, "Table de cumuls Factures_Rollup maintenue par triggers", [
+        _create_factures_rollup,
+    ]),
+    (4, "Montants en centimes et taux en points de base dans Factures", [
+        _convert_factures_to_cents,
+    ]),
+    (5, "Barème des taux URSSAF (Taux_URSSAF) appliqué aux factures existantes", [
+        _create_rate_schedule,
+    ]),
+    (6, "Index des PDF de factures en cache (Factures_PDF)", [
+        # PDF courant de chaque facture : empreinte des données rendues et
+        # chemin du fichier (voir pages/pdf_cache.py)
+        """
+        CREATE TABLE IF NOT EXISTS Factures_PDF (
+            id_facture INTEGER PRIMARY KEY,
+            empreinte TEXT NOT NULL,
+            chemin TEXT NOT NULL,
+            date_generation TEXT NOT NULL
+        )
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_factures_pdf_delete
+        AFTER DELETE ON Factures
+        BEGIN
+            DELETE FROM Factures_PDF WHERE id_facture = OLD.id_facture;
+        END
+        """,
+    ]),
+    (7, "Statut et déclarations NULL des factures ramenés à 0 (valeur par défaut)", [
+        # Le cumul range déjà ces factures avec les 0 (COALESCE, voir db/rollup.py)
+        # et la liste les affiche impayées : les requêtes `= 0` les comptent désormais aussi
+        "UPDATE Factures SET status = 0 WHERE status IS NULL",
+        "UPDATE Factures SET status_declaration_URSSAF = 0 WHERE status_declaration_URSSAF IS NULL",
+        "UPDATE Factures SET status_declaration_TVA = 0 WHERE status_declaration_TVA IS NULL",
+    ]),
+    (8, "Taux BNC de 26,4 % à partir du 2 janvier 2025, comme avant le barème", [
+        _restore_bnc_boundary,
+    ]),
+]
+
+_local = threading.local()
+_stats_lock = threading.Lock()
+_connections_opened = 0
 
 def get_db_path():
     """Retourne le chemin relatif de la base de données."""
+    # La variable PICOCOMPTA_DB permet de pointer vers une autre base (benchmarks, scripts)
+    env_path = os.environ.get('PICOCOMPTA_DB')
+    if env_path:
+        return env_path
     # Utilisation d'un chemin relatif pour la portabilité
     return os.path.join(os.path.dirname(__file__), '..', 'db', 'picocompta.db')
 
-def init_database():
+def get_performance_profile():
+    """Nom du profil appliqué aux nouvelles connexions (PICOCOMPTA_DB_PROFILE ou 'wal')."""
+    profile = os.environ.get('PICOCOMPTA_DB_PROFILE') or DEFAULT_PERFORMANCE_PROFILE
+    if profile not in PERFORMANCE_PROFILES:
+        print(f"Profil de base de données inconnu : {profile}, profil '{DEFAULT_PERFORMANCE_PROFILE}' utilisé.")
+        return DEFAULT_PERFORMANCE_PROFILE
+    return profile
+
+def get_connection(db_path=None):
+    """
+    Retourne la connexion partagée du thread courant.
+
+    La connexion est ouverte au premier appel puis réutilisée : les pragmas du
+    profil de performance ne sont appliqués qu'une fois et les requêtes
+    préparées restent en cache.
+    """
+    db_path = os.path.abspath(db_path if db_path else get_db_path())
+    connections = getattr(_local, 'connections', None)
+    if connections is None:
+        connections = _local.connections = {}
+
+    conn = connections.get(db_path)
+    if conn is None:
+        global _connections_opened
+        conn = sqlite3.connect(db_path, cached_statements=STATEMENT_CACHE_SIZE)
+        for pragma in PERFORMANCE_PROFILES[get_performance_profile()]:
+            conn.execute(pragma)
+        connections[db_path] = conn
+        with _stats_lock:
+            _connections_opened += 1
+    return conn
+
+def close_connection(db_path=None):
+    """Ferme la ou les connexions du thread courant (toutes si db_path est None)."""
+    connections = getattr(_local, 'connections', None)
+    if not connections:
+        return
+    if db_path is None:
+        paths = list(connections)
+    else:
+        paths = [os.path.abspath(db_path)]
+    for path in paths:
+        conn = connections.pop(path, None)
+        if conn is not None:
+            conn.close()
+
+def connections_opened():
+    """Retourne le nombre de connexions ouvertes depuis le démarrage du processus."""
+    return _connections_opened
+
+def init_database(db_path=None):
     """Initialise la base de données et crée toutes les tables nécessaires."""
-    db_path = get_db_path()  # Utilisation du chemin relatif
+    db_path = db_path if db_path else get_db_path()  # Utilisation du chemin relatif
     try:
         # Créer le dossier db s'il n'existe pas
         os.makedirs(os.path.dirname(db_path), exist_ok=True)
         print(f"Chemin de la base de données : {db_path}")
 
-        conn = sqlite3.connect(db_path)
+        conn = get_connection(db_path)
         cursor = conn.cursor()
         print("Connexion à la base de données réussie.")
         
@@ -81,40 +342,11 @@ def init_database():
         print("Table Déclaration vérifiée/créée avec succès.")
 
         # Création de la table Factures
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS Factures (
-                id_facture INTEGER PRIMARY KEY AUTOINCREMENT,
-                id_client INTEGER,
-                status INTEGER DEFAULT 0,
-                status_declaration_URSSAF INTEGER DEFAULT 0,
-                status_declaration_TVA INTEGER DEFAULT 0,
-                date_status_set DATE,
-                date_emission DATE,
-                date_echeance DATE,
-                montant_htBICs DECIMAL(15, 2) DEFAULT 0,
-                montant_htBICm DECIMAL(15, 2) DEFAULT 0,
-                montant_htBNC DECIMAL(15, 2) DEFAULT 0,
-                montant_ht DECIMAL(15, 2) GENERATED ALWAYS AS (COALESCE(montant_htBICs, 0) + COALESCE(montant_htBICm, 0) + COALESCE(montant_htBNC, 0)) STORED,
-                tva DECIMAL(5, 2) DEFAULT 0,
-                montant_totalBICs DECIMAL(15, 2) DEFAULT 0,
-                montant_totalBICm DECIMAL(15, 2) DEFAULT 0,
-                montant_totalBNC DECIMAL(15, 2) DEFAULT 0,
-                montant_total DECIMAL(15, 2) DEFAULT 0,
-                mission TEXT DEFAULT '',
-                urssaf_status INTEGER DEFAULT 0,
-                tva_status INTEGER DEFAULT 0,
-                taux_tva DECIMAL(15, 2) DEFAULT 0,
-                type_activite VARCHAR(50),
-                taux_BICs DECIMAL(15, 2) DEFAULT 0.215,
-                taux_BICm DECIMAL(15, 2) DEFAULT 0.124,
-                taux_BNC DECIMAL(15, 2) DEFAULT 0.248,
-                numero_facture INTEGER,
-                FOREIGN KEY (id_client) REFERENCES Clients(id_client)
-            );
-        ''')
+        cursor.execute(FACTURES_TABLE.format(table='Factures'))
         print("Table Factures vérifiée/créée avec succès.")
 
-    
+        conn.commit()
+        apply_migrations(conn)
         print("Toutes les tables ont été vérifiées/créées avec succès.")
         return True
 
@@ -122,21 +354,44 @@ def init_database():
         print(f"Erreur lors de l'initialisation de la base de données : {e}")
         return False
 
-    finally:
-        if conn:
-            conn.close()
+def get_schema_version(conn):
+    """Retourne la version du schéma enregistrée dans PRAGMA user_version."""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def apply_migrations(conn=None):
+    """Applique les migrations dont la version dépasse celle de la base."""
+    conn = conn or get_connection()
+    current_version = get_schema_version(conn)
+    for version, description, steps in MIGRATIONS:
+        if version <= current_version:
+            continue
+        cursor = conn.cursor()
+        try:
+            cursor.execute("BEGIN")
+            for step in steps:
+                if callable(step):
+                    step(cursor)
+                else:
+                    cursor.execute(step)
+            cursor.execute(f"PRAGMA user_version = {int(version)}")
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+        current_version = version
+        print(f"Migration {version} appliquée : {description}")
+    return current_version
 
 def table_exists(db_path, table_name):
     """Vérifie si une table existe dans la base de données."""
     try:
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
+        cursor = get_connection(db_path).cursor()
 
-        cursor.execute(f"""
+        cursor.execute("""
             SELECT name 
             FROM sqlite_master 
-            WHERE type='table' AND name='{table_name}'
-        """)
+            WHERE type='table' AND name=?
+        """, (table_name,))
 
         return cursor.fetchone() is not None
 
@@ -144,16 +399,11 @@ def table_exists(db_path, table_name):
         print(f"Erreur lors de la vérification de la table : {e}")
         return False
 
-    finally:
-        if conn:
-            conn.close()
-
 def get_all_tables(db_path=None):
     """Retourne la liste de toutes les tables dans la base de données."""
     db_path = db_path if db_path else get_db_path()
     try:
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
+        cursor = get_connection(db_path).cursor()
 
         cursor.execute("""
             SELECT name 
@@ -167,8 +417,4 @@ def get_all_tables(db_path=None):
 
     except sqlite3.Error as e:
         print(f"Erreur lors de la récupération des tables : {e}")
-        return []
-
-    finally:
-        if conn:
-            conn.close()
\ No newline at end of file
+        return []
\ No newline at end of file
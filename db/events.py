@@ -0,0 +1,34 @@
+#db/events.py
+
+import weakref
+
+# Abonnés aux modifications de factures : callback(facture_id, **champs)
+_facture_listeners = []
+
+def _reference(callback):
+    # Les méthodes liées (écrans) sont gardées par référence faible
+    if hasattr(callback, '__self__'):
+        return weakref.WeakMethod(callback)
+    return lambda: callback
+
+def subscribe_facture_changed(callback):
+    """Abonne `callback` aux modifications de factures."""
+    _facture_listeners.append(_reference(callback))
+
+def unsubscribe_facture_changed(callback):
+    """Désabonne `callback` s'il était abonné."""
+    _facture_listeners[:] = [ref for ref in _facture_listeners if ref() not in (None, callback)]
+
+def notify_facture_changed(facture_id, **fields):
+    """
+    Signale qu'une facture a été modifiée en base.
+
+    `fields` contient les nouvelles valeurs des colonnes modifiées (par exemple
+    status et date_status_set) ; chaque abonné ne met à jour que cette facture.
+    """
+    for ref in list(_facture_listeners):
+        callback = ref()
+        if callback is None:
+            _facture_listeners.remove(ref)
+            continue
+        callback(facture_id, **fields)
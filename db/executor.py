@@ -0,0 +1,104 @@
+#db/executor.py
+"""
+Exécution des requêtes hors de la boucle principale de Kivy.
+
+Un thread unique d'écriture et un petit pool de lecture exécutent les
+fonctions soumises ; chaque thread a sa propre connexion, get_connection()
+étant locale au thread. Les écritures restent ainsi sérialisées dans l'ordre
+de soumission. Le résultat (ou l'exception) revient au thread principal via
+Clock.schedule_once : les callbacks peuvent donc modifier les widgets.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from functools import partial
+from db.database_utils import close_connection
+
+# Lectures simultanées : la liste des factures et un tableau de bord par exemple
+READER_THREADS = 2
+
+def _kivy_dispatch(callback):
+    # Import tardif : db/ reste utilisable sans Kivy (scripts, benchmarks)
+    from kivy.clock import Clock
+    Clock.schedule_once(lambda dt: callback())
+
+class DatabaseExecutor:
+    """Thread d'écriture et pool de lecture, avec retour des résultats par callback."""
+
+    def __init__(self, readers=READER_THREADS, dispatch=None):
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='db-writer')
+        self._readers = ThreadPoolExecutor(max_workers=readers, thread_name_prefix='db-reader')
+        self._dispatch = dispatch or _kivy_dispatch
+        self._pending = set()
+        self._pending_lock = threading.Lock()
+
+    def submit_read(self, fn, *args, callback=None, error_callback=None, **kwargs):
+        """Exécute fn(*args, **kwargs) sur un thread de lecture ; retourne un Future."""
+        return self._submit(self._readers, fn, args, kwargs, callback, error_callback)
+
+    def submit_write(self, fn, *args, callback=None, error_callback=None, **kwargs):
+        """Exécute fn(*args, **kwargs) sur le thread d'écriture ; retourne un Future."""
+        return self._submit(self._writer, fn, args, kwargs, callback, error_callback)
+
+    def _submit(self, pool, fn, args, kwargs, callback, error_callback):
+        future = pool.submit(fn, *args, **kwargs)
+        with self._pending_lock:
+            self._pending.add(future)
+        future.add_done_callback(partial(self._on_done, callback=callback, error_callback=error_callback))
+        return future
+
+    def _on_done(self, future, callback, error_callback):
+        with self._pending_lock:
+            self._pending.discard(future)
+        self._dispatch(partial(self._deliver, future, callback, error_callback))
+
+    @staticmethod
+    def _deliver(future, callback, error_callback):
+        """Appelé sur le thread principal une fois le Future terminé."""
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is not None:
+            if error_callback is not None:
+                error_callback(error)
+            else:
+                print(f"Erreur lors d'une requête en arrière-plan : {error!r}")
+            return
+        if callback is not None:
+            callback(future.result())
+
+    def wait_idle(self, timeout=None):
+        """Attend la fin des requêtes déjà soumises (scripts et benchmarks)."""
+        with self._pending_lock:
+            pending = list(self._pending)
+        wait(pending, timeout)
+
+    def shutdown(self, wait=True):
+        """Abandonne les lectures en attente, termine les écritures puis ferme les connexions."""
+        self._readers.shutdown(wait=wait, cancel_futures=True)
+        self._writer.submit(close_connection)
+        self._writer.shutdown(wait=wait)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def get_executor():
+    """Retourne l'exécuteur partagé, créé au premier appel."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = DatabaseExecutor()
+        return _executor
+
+def submit_read(fn, *args, **kwargs):
+    return get_executor().submit_read(fn, *args, **kwargs)
+
+def submit_write(fn, *args, **kwargs):
+    return get_executor().submit_write(fn, *args, **kwargs)
+
+def shutdown_executor(wait=True):
+    """Arrête l'exécuteur partagé s'il a été créé (fermeture de l'application)."""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=wait)
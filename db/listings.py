@@ -0,0 +1,272 @@
+#db/listings.py
+
+from datetime import date
+from db.database_utils import get_connection
+
+# Nombre de lignes lues par page dans les listes de factures et de clients
+PAGE_SIZE = 100
+
+# Clé de tri SQL de chaque colonne triable de Mes Factures. La pagination se fait
+# par clé (keyset) sur (clé de tri, id_facture), que les index de tri couvrent.
+FACTURE_SORT_KEYS = {
+    'client': 'c.nom',
+    'montant_ht': 'f.montant_ht',
+    'montant_total': 'f.montant_total',
+    'status': 'f.status',
+    'date': 'f.date_emission',
+}
+
+# Colonnes triables de Mes Clients (alias de la sous-requête ci-dessous)
+CLIENT_SORT_KEYS = {
+    'nom': 'nom',
+    'date': 'premiere_facture',
+    'ca_n': 'ca_n',
+    'ca_total': 'ca_total',
+    'impayes': 'impayes',
+}
+
+# Colonnes en mémoire (ListingColumns) des deux listes, dans l'ordre des requêtes
+FACTURE_COLUMNS = ('facture_id', 'client', 'date', 'montant_ht', 'tva',
+                   'montant_total', 'status', 'type_activite')
+CLIENT_COLUMNS = ('client_id', 'nom', 'premiere_facture', 'ca_n', 'ca_total', 'impayes')
+
+# Critère de tri de chaque page -> colonne en mémoire correspondante
+FACTURE_SORT_COLUMNS = {tri: tri for tri in FACTURE_SORT_KEYS}
+CLIENT_SORT_COLUMNS = dict(CLIENT_SORT_KEYS)
+
+FACTURES_PAGE_QUERY = """
+    SELECT
+        f.id_facture,
+        c.nom AS client,
+        f.date_emission AS date,
+        f.montant_ht,
+        f.tva,
+        f.montant_total,
+        f.status,
+        f.type_activite,
+        {key} AS sort_key
+    FROM {source}
+    {where}
+    ORDER BY {key} {order}, f.id_facture {order}
+    LIMIT :limit
+"""
+
+# Ordre de jointure de FACTURES_PAGE_QUERY. Trié par client, Clients est lu dans
+# l'ordre de idx_clients_nom (CROSS JOIN fixe l'ordre des tables dans SQLite) :
+# sinon SQLite trie toutes les factures avant de rendre la première page.
+FACTURES_SOURCE = "Factures f JOIN Clients c ON f.id_client = c.id_client"
+FACTURES_SOURCE_BY_CLIENT = "Clients c CROSS JOIN Factures f ON f.id_client = c.id_client"
+
+def factures_source(tri):
+    """Tables (et ordre de jointure) de FACTURES_PAGE_QUERY pour le tri `tri`."""
+    return FACTURES_SOURCE_BY_CLIENT if tri == 'client' else FACTURES_SOURCE
+
+CLIENTS_PAGE_QUERY = """
+    SELECT id_client, nom, premiere_facture, ca_n, ca_total, impayes, {key} AS sort_key
+    FROM (
+        SELECT
+            c.id_client,
+            c.nom,
+            COALESCE((SELECT MIN(f.date_emission) FROM Factures f
+                      WHERE f.id_client = c.id_client), '') AS premiere_facture,
+            COALESCE((SELECT SUM(f.montant_total) FROM Factures f
+                      WHERE f.id_client = c.id_client
+                      AND f.date_emission BETWEEN :year_start AND :year_end), 0) AS ca_n,
+            COALESCE((SELECT SUM(f.montant_total) FROM Factures f
+                      WHERE f.id_client = c.id_client), 0) AS ca_total,
+            COALESCE((SELECT SUM(f.montant_total) FROM Factures f
+                      WHERE f.id_client = c.id_client AND f.status = 0), 0) AS impayes
+        FROM Clients c
+    )
+    {where}
+    ORDER BY {key} {order}, id_client {order}
+    LIMIT :limit
+"""
+
+# Passé comme `limit`, lit toutes les lignes restantes (LIMIT négatif = sans borne)
+NO_LIMIT = -1
+
+def _keyset_clause(key, id_column, ascending, after, continuation=False):
+    """
+    Construit la condition de reprise après la dernière ligne lue.
+
+    SQLite range les clés NULL en premier en ordre croissant (en dernier en
+    décroissant) et une comparaison avec NULL n'est jamais vraie : les lignes
+    NULL forment leur propre plage, parcourue par id. Chaque condition reste
+    une seule recherche dans l'index de tri ; `continuation` désigne la plage
+    qui suit celle du curseur (voir _fetch_page).
+    """
+    if continuation:
+        return f"WHERE {key} IS NOT NULL" if ascending else f"WHERE {key} IS NULL"
+    if after is None:
+        return ""
+    comparison = '>' if ascending else '<'
+    if after[0] is None:
+        return f"WHERE {key} IS NULL AND {id_column} {comparison} :after_id"
+    return f"WHERE ({key}, {id_column}) {comparison} (:after_key, :after_id)"
+
+def factures_page_query(tri, ascending, after, continuation=False):
+    """Requête d'une page de factures (paramètres :limit, et :after_key, :after_id après la première page)."""
+    key = FACTURE_SORT_KEYS[tri]
+    return FACTURES_PAGE_QUERY.format(
+        source=factures_source(tri),
+        key=key,
+        order='ASC' if ascending else 'DESC',
+        where=_keyset_clause(key, 'f.id_facture', ascending, after, continuation),
+    )
+
+def clients_page_query(tri, ascending, after, continuation=False):
+    """Requête d'une page de clients (paramètres :year_start, :year_end et ceux des factures)."""
+    key = CLIENT_SORT_KEYS[tri]
+    return CLIENTS_PAGE_QUERY.format(
+        key=key,
+        order='ASC' if ascending else 'DESC',
+        where=_keyset_clause(key, 'id_client', ascending, after, continuation),
+    )
+
+def _fetch_page(build_query, params, ascending, after, limit, conn):
+    """
+    Exécute build_query(after, continuation) et retourne (lignes, curseur suivant).
+
+    Un curseur sur une clé NULL en ordre croissant, ou sur une clé non NULL en
+    ordre décroissant, ne couvre que sa propre plage : si la page n'est pas
+    pleine, elle est complétée par la plage suivante (non NULL, ou NULL).
+    """
+    cursor = (conn or get_connection()).cursor()
+    query_params = dict(params, limit=limit)
+    if after is not None:
+        query_params['after_key'], query_params['after_id'] = after
+    cursor.execute(build_query(after, False), query_params)
+    rows = cursor.fetchall()
+
+    if after is not None and (after[0] is None) == ascending and (limit < 0 or len(rows) < limit):
+        remaining = limit if limit < 0 else limit - len(rows)
+        cursor.execute(build_query(None, True), dict(params, limit=remaining))
+        rows += cursor.fetchall()
+
+    next_cursor = (rows[-1][-1], rows[-1][0]) if len(rows) == limit else None
+    return [row[:-1] for row in rows], next_cursor
+
+def fetch_factures_page(tri='date', ascending=True, after=None, limit=PAGE_SIZE, conn=None):
+    """
+    Lit une page de factures triées par `tri`.
+
+    `after` est le curseur (clé de tri, id_facture) renvoyé par l'appel
+    précédent, ou None pour la première page. Retourne (lignes, curseur
+    suivant) ; le curseur vaut None quand la liste est épuisée. Avec
+    limit=NO_LIMIT, toutes les lignes restantes sont lues d'un coup.
+    """
+    def build_query(after, continuation):
+        return factures_page_query(tri, ascending, after, continuation)
+
+    return _fetch_page(build_query, {}, ascending, after, limit, conn)
+
+def fetch_clients_page(tri='nom', ascending=True, after=None, limit=PAGE_SIZE, conn=None):
+    """
+    Lit une page de clients avec leurs totaux, triés par `tri`.
+
+    Même contrat que fetch_factures_page, avec un curseur (clé de tri, id_client).
+    """
+    def build_query(after, continuation):
+        return clients_page_query(tri, ascending, after, continuation)
+
+    current_year = date.today().year
+    params = {
+        'year_start': f"{current_year}-01-01",
+        'year_end': f"{current_year}-12-31",
+    }
+    return _fetch_page(build_query, params, ascending, after, limit, conn)
+
+class ListingColumns:
+    """
+    Lignes d'une liste chargées en mémoire, rangées colonne par colonne.
+
+    Les dictionnaires d'affichage, partagés avec les données du RecycleView,
+    ne sont créés qu'à la demande (`records`) : une liste entièrement chargée
+    pour être triée ne coûte que ses colonnes. Les permutations de tri sont
+    calculées à partir des colonnes et mises en cache par colonne ; l'ordre
+    décroissant est l'inverse de l'ordre croissant, départagé par
+    l'identifiant comme en SQL.
+    """
+
+    def __init__(self, names, id_column, make_record):
+        self.names = names
+        self.id_column = id_column
+        self.columns = {name: [] for name in names}
+        self._records = {}
+        self._make_record = make_record
+        self._positions = {}
+        self._permutations = {}
+
+    def __len__(self):
+        return len(self.columns[self.id_column])
+
+    def extend(self, rows):
+        """Ajoute des lignes (tuples dans l'ordre de `names`) et retourne leurs positions."""
+        start = len(self)
+        for name, values in zip(self.names, zip(*rows)):
+            self.columns[name].extend(values)
+        ids = self.columns[self.id_column]
+        self._positions.update((ids[i], i) for i in range(start, len(ids)))
+        self._permutations.clear()
+        return range(start, len(ids))
+
+    def records(self, positions):
+        """Enregistrements d'affichage des lignes aux positions données (créés au premier accès)."""
+        records = self._records
+        result = []
+        for position in positions:
+            record = records.get(position)
+            if record is None:
+                row = tuple(self.columns[name][position] for name in self.names)
+                record = records[position] = self._make_record(row)
+            result.append(record)
+        return result
+
+    def permutation(self, column, ascending=True):
+        """Positions des lignes triées sur `column` (puis sur l'identifiant)."""
+        cached = self._permutations.get((column, ascending))
+        if cached is not None:
+            return cached
+
+        if ascending:
+            values = self.columns[column]
+            if None in values:
+                # NULL passe en premier, comme dans SQLite
+                values = [(value is not None, value) for value in values]
+            if column == self.id_column:
+                order = sorted(range(len(values)), key=values.__getitem__)
+            else:
+                # Tri stable de l'ordre par identifiant (lui-même en cache)
+                order = list(self.permutation(self.id_column, True))
+                order.sort(key=values.__getitem__)
+        else:
+            order = self.permutation(column, True)[::-1]
+
+        self._permutations[(column, ascending)] = order
+        return order
+
+    def sorted_records(self, column, ascending=True, start=0, stop=None):
+        """Enregistrements d'affichage des rangs start:stop dans l'ordre de tri demandé."""
+        return self.records(self.permutation(column, ascending)[start:stop])
+
+    def update(self, row_id, **fields):
+        """
+        Modifie une ligne en place et oublie les tris des colonnes touchées.
+
+        Les champs qui ne sont pas des colonnes de la liste sont ignorés.
+        Retourne l'enregistrement d'affichage modifié, ou None si la ligne
+        n'est pas chargée ou pas encore affichée.
+        """
+        position = self._positions.get(row_id)
+        if position is None:
+            return None
+        record = self._records.get(position)
+        for name, value in fields.items():
+            if name in self.columns:
+                if record is not None:
+                    record[name] = value
+                self.columns[name][position] = value
+                self._permutations.pop((name, True), None)
+                self._permutations.pop((name, False), None)
+        return record
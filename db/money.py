@@ -0,0 +1,130 @@
+#db/money.py
+"""
+Montants en centimes entiers et taux en points de base.
+
+Factures stocke ses montants en centimes (INTEGER) et ses taux en points de
+base (1 % = 100 pb) : les sommes SQL sont exactes et identiques quel que soit
+l'ordre d'addition. Money enveloppe un nombre de centimes pour les calculs et
+l'affichage ; f"{montant:.2f}" fonctionne comme avec un float.
+"""
+from decimal import Decimal, ROUND_HALF_UP, InvalidOperation
+from fractions import Fraction
+from functools import total_ordering
+
+CENTS_PER_EURO = 100
+BASIS_POINTS = 10000  # 100 % en points de base
+
+def _round_half_up(numerator, denominator):
+    """Division entière arrondie au plus proche (0,5 vers l'extérieur)."""
+    quotient, remainder = divmod(abs(numerator), denominator)
+    if remainder * 2 >= denominator:
+        quotient += 1
+    return quotient if numerator >= 0 else -quotient
+
+@total_ordering
+class Money:
+    """Montant en euros représenté par un nombre entier de centimes."""
+    __slots__ = ('cents',)
+
+    def __init__(self, cents=0):
+        self.cents = int(cents or 0)
+
+    @classmethod
+    def from_euros(cls, value):
+        """
+        Convertit un montant en euros (texte saisi, Decimal, int ou float).
+
+        Le texte accepte la virgule décimale ; lève ValueError si le montant
+        n'est pas un nombre.
+        """
+        if isinstance(value, Money):
+            return value
+        if isinstance(value, str):
+            value = value.strip().replace(',', '.') or '0'
+        try:
+            euros = Decimal(str(value))
+        except InvalidOperation:
+            raise ValueError(f"Montant invalide : {value!r}")
+        if not euros.is_finite():
+            raise ValueError(f"Montant invalide : {value!r}")
+        return cls(int((euros * CENTS_PER_EURO).quantize(Decimal('1'), rounding=ROUND_HALF_UP)))
+
+    @property
+    def euros(self):
+        """Valeur exacte en euros (Decimal)."""
+        return Decimal(self.cents) / CENTS_PER_EURO
+
+    def apply_rate(self, basis_points):
+        """Montant multiplié par un taux en points de base, arrondi au centime."""
+        return Money(_round_half_up(self.cents * int(basis_points or 0), BASIS_POINTS))
+
+    def __add__(self, other):
+        if isinstance(other, Money):
+            return Money(self.cents + other.cents)
+        if other == 0:
+            return self
+        return NotImplemented
+
+    __radd__ = __add__  # sum() commence à 0
+
+    def __sub__(self, other):
+        if isinstance(other, Money):
+            return Money(self.cents - other.cents)
+        return NotImplemented
+
+    def __neg__(self):
+        return Money(-self.cents)
+
+    # Comparaisons avec les nombres à la valeur exacte en euros, comme entre
+    # int, float et Decimal : Money(100) == 1 et hash(Money(100)) == hash(1)
+    def _exact(self):
+        return Fraction(self.cents, CENTS_PER_EURO)
+
+    def __eq__(self, other):
+        if isinstance(other, Money):
+            return self.cents == other.cents
+        if isinstance(other, (int, float, Decimal)):
+            return self._exact() == other
+        return NotImplemented
+
+    def __lt__(self, other):
+        if isinstance(other, Money):
+            return self.cents < other.cents
+        if isinstance(other, (int, float, Decimal)):
+            return self._exact() < other
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self._exact())
+
+    def __bool__(self):
+        return self.cents != 0
+
+    def __float__(self):
+        return self.cents / CENTS_PER_EURO
+
+    def __format__(self, spec):
+        return format(self.euros, spec or '.2f')
+
+    def __str__(self):
+        return format(self, '.2f')
+
+    def __repr__(self):
+        return f"Money({self.cents})"
+
+def rate_to_basis_points(rate):
+    """Taux en fraction (0.248) -> points de base (2480)."""
+    return int((Decimal(str(rate or 0)) * BASIS_POINTS).quantize(Decimal('1'), rounding=ROUND_HALF_UP))
+
+def percent_to_basis_points(percent):
+    """Taux en pourcentage saisi (texte ou nombre, 20.0) -> points de base (2000)."""
+    if isinstance(percent, str):
+        percent = percent.strip().replace(',', '.') or '0'
+    try:
+        return rate_to_basis_points(Decimal(str(percent)) / 100)
+    except InvalidOperation:
+        raise ValueError(f"Taux invalide : {percent!r}")
+
+def basis_points_to_percent(basis_points):
+    """Points de base (2000) -> pourcentage affichable (Decimal('20'))."""
+    return Decimal(int(basis_points or 0)) / 100
@@ -0,0 +1,103 @@
+#db/profile.py
+"""
+Profil de l'entreprise : la dernière ligne d'Info_Personnelle.
+
+Le profil est lu une fois puis gardé en mémoire pour tout le processus (un
+par base). Chaque écriture dans Info_Personnelle doit être suivie d'un appel
+à invalidate_profile() après le commit ; la lecture suivante recharge la ligne.
+"""
+import os
+import threading
+from dataclasses import dataclass, fields
+from datetime import date, datetime
+from typing import Optional
+from db.database_utils import get_connection, get_db_path
+
+@dataclass(frozen=True, slots=True)
+class Profile:
+    """Ligne d'Info_Personnelle, telle que stockée (dates au format AAAA-MM-JJ)."""
+    id_personnelle: int
+    nom: Optional[str] = None
+    prenom: Optional[str] = None
+    adresse: Optional[str] = None
+    CP: Optional[str] = None
+    pays: Optional[str] = None
+    email: Optional[str] = None
+    telephone: Optional[str] = None
+    nsiret: Optional[str] = None
+    codeape: Optional[str] = None
+    nss: Optional[str] = None
+    ntva: Optional[str] = None
+    rib: Optional[str] = None
+    iban: Optional[str] = None
+    bic: Optional[str] = None
+    debut_activite: Optional[str] = None
+    status_tva: Optional[int] = None
+    debut_activite_TVA: Optional[str] = None
+    echeance_declaration: Optional[int] = None
+    dernier_numero_facture: Optional[int] = None
+    caNs: Optional[int] = None  # CA services et ventes avant l'application, en euros
+    caNm: Optional[int] = None  # (colonnes INTEGER, non converties en centimes)
+    activite_principal: Optional[str] = None
+
+    @property
+    def full_name(self):
+        return f"{self.nom} {self.prenom}"
+
+    @property
+    def debut_activite_date(self) -> Optional[date]:
+        return _parse_date(self.debut_activite)
+
+    @property
+    def debut_activite_tva_date(self) -> Optional[date]:
+        return _parse_date(self.debut_activite_TVA)
+
+PROFILE_COLUMNS = tuple(field.name for field in fields(Profile))
+
+PROFILE_QUERY = f"""
+    SELECT {', '.join(PROFILE_COLUMNS)}
+    FROM Info_Personnelle
+    ORDER BY id_personnelle DESC
+    LIMIT 1
+"""
+
+def _parse_date(value):
+    return datetime.strptime(value, "%Y-%m-%d").date() if value else None
+
+def load_profile(conn=None):
+    """Lit le profil dans la base, sans cache ; None si Info_Personnelle est vide."""
+    cursor = (conn or get_connection()).cursor()
+    cursor.execute(PROFILE_QUERY)
+    row = cursor.fetchone()
+    return Profile(*row) if row else None
+
+_profiles = {}
+_generation = 0
+_lock = threading.Lock()
+
+def get_profile(db_path=None):
+    """
+    Retourne le profil en cache, lu au premier appel ; None si aucun profil.
+
+    Utilisable depuis n'importe quel thread. Lève sqlite3.Error si la lecture
+    échoue (rien n'est alors mis en cache).
+    """
+    key = os.path.abspath(db_path or get_db_path())
+    with _lock:
+        if key in _profiles:
+            return _profiles[key]
+        generation = _generation
+
+    profile = load_profile(get_connection(db_path))
+    with _lock:
+        # Une invalidation pendant la lecture rend la ligne lue peut-être périmée
+        if generation == _generation:
+            _profiles[key] = profile
+    return profile
+
+def invalidate_profile():
+    """Oublie les profils en cache, après une écriture dans Info_Personnelle."""
+    global _generation
+    with _lock:
+        _generation += 1
+        _profiles.clear()
@@ -0,0 +1,121 @@
+#db/rates.py
+"""
+Barème des taux de cotisation URSSAF par type d'activité.
+
+La table Taux_URSSAF donne, pour chaque type d'activité, le taux en points
+de base applicable entre date_debut et date_fin (bornes incluses, NULL pour
+une période ouverte). Les taux d'une facture sont résolus une fois, à
+l'enregistrement, pour sa date d'émission ; un changement de barème passe
+par une nouvelle ligne et une migration versionnée qui l'applique aux
+factures existantes (apply_rate_schedule).
+"""
+from db.database_utils import get_connection
+
+CREATE_RATES_TABLE = """
+    CREATE TABLE IF NOT EXISTS Taux_URSSAF (
+        id_taux INTEGER PRIMARY KEY AUTOINCREMENT,
+        type_activite VARCHAR(50) NOT NULL,
+        taux INTEGER NOT NULL,
+        date_debut DATE,
+        date_fin DATE
+    )
+"""
+
+CREATE_RATES_INDEX = """
+    CREATE INDEX IF NOT EXISTS idx_taux_urssaf_type_date
+    ON Taux_URSSAF (type_activite, date_debut)
+"""
+
+# Barème initial : (type d'activité, taux en points de base, début, fin).
+# Le taux BNC de 26,4 % s'applique aux factures émises après le 1er janvier
+# 2025, comme l'ancienne mise à jour au démarrage (date_emission > '2025-01-01').
+DEFAULT_SCHEDULE = (
+    ('BIC service', 2150, None, None),
+    ('BIC marchandise', 1240, None, None),
+    ('BNC', 2480, None, '2025-01-01'),
+    ('BNC', 2640, '2025-01-02', None),
+)
+
+# Colonne de Factures qui porte le taux de chaque type d'activité
+RATE_COLUMNS = {
+    'BIC service': 'taux_BICs',
+    'BIC marchandise': 'taux_BICm',
+    'BNC': 'taux_BNC',
+}
+
+# Valeurs par défaut de ces colonnes (FACTURES_TABLE), hors barème
+COLUMN_DEFAULTS = {'taux_BICs': 2150, 'taux_BICm': 1240, 'taux_BNC': 2480}
+
+def _rate_expression(activity_type, date_expression):
+    """Sous-requête SQL du taux de `activity_type` à la date `date_expression`."""
+    return f"""(
+        SELECT taux FROM Taux_URSSAF
+        WHERE type_activite = '{activity_type}'
+          AND (date_debut IS NULL OR date_debut <= {date_expression})
+          AND (date_fin IS NULL OR date_fin >= {date_expression})
+        ORDER BY date_debut DESC
+        LIMIT 1
+    )"""
+
+RATES_AT_DATE_QUERY = "SELECT " + ", ".join(
+    f"{_rate_expression(activity_type, ':date')} AS {column}"
+    for activity_type, column in RATE_COLUMNS.items()
+)
+
+def create_rate_schedule(cursor):
+    """Crée et remplit Taux_URSSAF, puis l'applique aux factures (étape de migration)."""
+    cursor.execute(CREATE_RATES_TABLE)
+    cursor.execute(CREATE_RATES_INDEX)
+    cursor.execute("SELECT COUNT(*) FROM Taux_URSSAF")
+    if cursor.fetchone()[0] == 0:
+        cursor.executemany("""
+            INSERT INTO Taux_URSSAF (type_activite, taux, date_debut, date_fin)
+            VALUES (?, ?, ?, ?)
+        """, DEFAULT_SCHEDULE)
+    apply_rate_schedule(cursor)
+
+def restore_bnc_boundary(cursor):
+    """
+    Ramène la bascule BNC 2025 des barèmes créés par la migration 5 au
+    lendemain du 1er janvier, puis réaligne les factures (étape de migration).
+    """
+    cursor.execute("""
+        UPDATE Taux_URSSAF SET date_fin = '2025-01-01'
+        WHERE type_activite = 'BNC' AND taux = 2480 AND date_fin = '2024-12-31'
+    """)
+    cursor.execute("""
+        UPDATE Taux_URSSAF SET date_debut = '2025-01-02'
+        WHERE type_activite = 'BNC' AND taux = 2640 AND date_debut = '2025-01-01'
+    """)
+    apply_rate_schedule(cursor)
+
+def apply_rate_schedule(cursor):
+    """
+    Aligne les taux des factures existantes sur le barème.
+
+    Seules les lignes dont un taux change sont réécrites (les triggers de
+    Factures_Rollup ne mettent à jour que ces factures). Retourne leur nombre.
+    """
+    assignments = ", ".join(
+        f"{column} = COALESCE({_rate_expression(activity_type, 'date_emission')}, {column})"
+        for activity_type, column in RATE_COLUMNS.items()
+    )
+    changed = " OR ".join(
+        f"{column} IS NOT COALESCE({_rate_expression(activity_type, 'date_emission')}, {column})"
+        for activity_type, column in RATE_COLUMNS.items()
+    )
+    cursor.execute(f"UPDATE Factures SET {assignments} WHERE {changed}")
+    return cursor.rowcount
+
+def rates_for(date_emission, conn=None):
+    """
+    Retourne les taux {colonne de Factures: points de base} en vigueur à une date.
+
+    Un type d'activité sans ligne de barème applicable garde la valeur par
+    défaut de sa colonne.
+    """
+    cursor = (conn or get_connection()).cursor()
+    cursor.execute(RATES_AT_DATE_QUERY, {'date': str(date_emission)})
+    row = cursor.fetchone()
+    return {column: COLUMN_DEFAULTS[column] if rate is None else rate
+            for column, rate in zip(RATE_COLUMNS.values(), row)}
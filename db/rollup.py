@@ -0,0 +1,204 @@
+#db/rollup.py
+"""
+Table de cumuls Factures_Rollup, tenue à jour par des triggers sur Factures.
+
+Une ligne par (année, mois, statut, type d'activité, déclarations URSSAF/TVA)
+avec le nombre de factures et les sommes HT, TVA et charges URSSAF. Les
+tableaux de bord lisent ces quelques lignes au lieu de ré-agréger Factures.
+
+Usage : python -m db.rollup verify|rebuild
+"""
+import sys
+import sqlite3
+from db.database_utils import get_connection, init_database
+from db.aggregations import DEFAULT_TAUX
+
+KEY_COLUMNS = ('annee', 'mois', 'status', 'type_activite',
+               'status_declaration_URSSAF', 'status_declaration_TVA')
+SUM_COLUMNS = ('nb_factures', 'total_ht', 'total_htBICs', 'total_htBICm',
+               'total_htBNC', 'total_tva', 'total_charge')
+
+CREATE_ROLLUP_TABLE = """
+    CREATE TABLE IF NOT EXISTS Factures_Rollup (
+        annee INTEGER NOT NULL,
+        mois INTEGER NOT NULL,
+        status INTEGER NOT NULL,
+        type_activite VARCHAR(50) NOT NULL,
+        status_declaration_URSSAF INTEGER NOT NULL,
+        status_declaration_TVA INTEGER NOT NULL,
+        nb_factures INTEGER NOT NULL DEFAULT 0,
+        total_ht INTEGER NOT NULL DEFAULT 0,
+        total_htBICs INTEGER NOT NULL DEFAULT 0,
+        total_htBICm INTEGER NOT NULL DEFAULT 0,
+        total_htBNC INTEGER NOT NULL DEFAULT 0,
+        total_tva INTEGER NOT NULL DEFAULT 0,
+        total_charge INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (annee, mois, status, type_activite,
+                     status_declaration_URSSAF, status_declaration_TVA)
+    ) WITHOUT ROWID
+"""
+
+# Colonnes de Factures dont dépend le cumul (les autres mises à jour ne le touchent pas)
+TRACKED_COLUMNS = ('date_emission', 'status', 'type_activite',
+                   'status_declaration_URSSAF', 'status_declaration_TVA',
+                   'montant_htBICs', 'montant_htBICm', 'montant_htBNC', 'tva',
+                   'taux_BNC', 'taux_BICm', 'taux_BICs')
+
+def charge_expression(row):
+    """
+    Charge URSSAF de la facture `row` en centimes (expression SQL).
+
+    Seul point d'arrondi des charges : chaque facture est arrondie au centime
+    le plus proche (taux en points de base), puis les charges sont sommées.
+    Le cumul, les totaux par période et le détail des périodes l'utilisent.
+    """
+    charge_rate = f"""CASE {row}.type_activite
+                WHEN 'BNC' THEN COALESCE(NULLIF({row}.taux_BNC, 0), {DEFAULT_TAUX['BNC']})
+                WHEN 'BIC marchandise' THEN COALESCE(NULLIF({row}.taux_BICm, 0), {DEFAULT_TAUX['BIC marchandise']})
+                WHEN 'BIC service' THEN COALESCE(NULLIF({row}.taux_BICs, 0), {DEFAULT_TAUX['BIC service']})
+                ELSE 0
+            END"""
+    return f"((COALESCE({row}.montant_ht, 0) * {charge_rate} + 5000) / 10000)"
+
+def _row_values(row, sign=''):
+    """
+    Expressions de clé et de sommes du cumul pour la facture `row` (NEW, OLD ou alias).
+
+    Les montants sont en centimes ; voir charge_expression pour les charges.
+    Un statut ou une déclaration NULL compte comme 0, comme dans Factures
+    depuis la migration 7.
+    """
+    keys = [
+        f"COALESCE(CAST(substr({row}.date_emission, 1, 4) AS INTEGER), 0)",
+        f"COALESCE(CAST(substr({row}.date_emission, 6, 2) AS INTEGER), 0)",
+        f"COALESCE({row}.status, 0)",
+        f"COALESCE({row}.type_activite, '')",
+        f"CASE WHEN {row}.status_declaration_URSSAF = 1 THEN 1 ELSE 0 END",
+        f"CASE WHEN {row}.status_declaration_TVA = 1 THEN 1 ELSE 0 END",
+    ]
+    sums = [
+        f"{sign}1",
+        f"{sign}COALESCE({row}.montant_ht, 0)",
+        f"{sign}COALESCE({row}.montant_htBICs, 0)",
+        f"{sign}COALESCE({row}.montant_htBICm, 0)",
+        f"{sign}COALESCE({row}.montant_htBNC, 0)",
+        f"{sign}COALESCE({row}.tva, 0)",
+        f"{sign}{charge_expression(row)}",
+    ]
+    return keys, sums
+
+def _upsert(row, sign=''):
+    keys, sums = _row_values(row, sign)
+    updates = ",\n            ".join(f"{name} = {name} + excluded.{name}" for name in SUM_COLUMNS)
+    return f"""
+        INSERT INTO Factures_Rollup ({', '.join(KEY_COLUMNS + SUM_COLUMNS)})
+        VALUES ({', '.join(keys + sums)})
+        ON CONFLICT ({', '.join(KEY_COLUMNS)}) DO UPDATE SET
+            {updates};"""
+
+# Les lignes vidées par une suppression ou une modification sont retirées
+_PURGE_EMPTY = "DELETE FROM Factures_Rollup WHERE nb_factures = 0;"
+
+ROLLUP_TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_factures_rollup_insert
+    AFTER INSERT ON Factures
+    BEGIN{_upsert('NEW')}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_factures_rollup_delete
+    AFTER DELETE ON Factures
+    BEGIN{_upsert('OLD', '-')}
+        {_PURGE_EMPTY}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_factures_rollup_update
+    AFTER UPDATE OF {', '.join(TRACKED_COLUMNS)} ON Factures
+    BEGIN{_upsert('OLD', '-')}{_upsert('NEW')}
+        {_PURGE_EMPTY}
+    END
+    """,
+]
+
+def _recompute_query():
+    keys, sums = _row_values('f')
+    select = ",\n            ".join(
+        [f"{expr} AS {name}" for expr, name in zip(keys, KEY_COLUMNS)] +
+        [f"SUM({expr}) AS {name}" for expr, name in zip(sums, SUM_COLUMNS)]
+    )
+    return f"""
+        SELECT
+            {select}
+        FROM Factures f
+        GROUP BY {', '.join(KEY_COLUMNS)}
+    """
+
+RECOMPUTE_QUERY = _recompute_query()
+
+def create_rollup(cursor):
+    """Crée la table de cumuls et ses triggers, puis la remplit (étape de migration)."""
+    cursor.execute(CREATE_ROLLUP_TABLE)
+    for trigger in ROLLUP_TRIGGERS:
+        cursor.execute(trigger)
+    cursor.execute("DELETE FROM Factures_Rollup")
+    cursor.execute(f"""
+        INSERT INTO Factures_Rollup ({', '.join(KEY_COLUMNS + SUM_COLUMNS)})
+        {RECOMPUTE_QUERY}
+    """)
+
+def rebuild_rollup(conn=None):
+    """Recalcule entièrement Factures_Rollup à partir de Factures."""
+    conn = conn or get_connection()
+    try:
+        conn.execute("BEGIN")
+        create_rollup(conn.cursor())
+        conn.commit()
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+
+def verify_rollup(conn=None):
+    """
+    Compare Factures_Rollup à un recalcul complet.
+
+    Les sommes étant des entiers (centimes), la comparaison est exacte.
+    Retourne la liste des écarts (clé, valeurs du cumul, valeurs recalculées) ;
+    une liste vide signifie que le cumul est exact.
+    """
+    conn = conn or get_connection()
+    width = len(KEY_COLUMNS)
+    stored = {row[:width]: row[width:] for row in conn.execute(
+        f"SELECT {', '.join(KEY_COLUMNS + SUM_COLUMNS)} FROM Factures_Rollup")}
+    expected = {row[:width]: row[width:] for row in conn.execute(RECOMPUTE_QUERY)}
+
+    empty = (0,) * len(SUM_COLUMNS)
+    mismatches = []
+    for key in sorted(set(stored) | set(expected), key=repr):
+        actual, wanted = stored.get(key, empty), expected.get(key, empty)
+        if actual != wanted:
+            mismatches.append((key, actual, wanted))
+    return mismatches
+
+def main(argv):
+    command = argv[1] if len(argv) > 1 else 'verify'
+    if command not in ('verify', 'rebuild'):
+        sys.exit("Usage : python -m db.rollup verify|rebuild")
+    # Crée la table de cumuls si la base n'est pas encore migrée
+    if not init_database():
+        sys.exit("Impossible d'ouvrir la base de données.")
+
+    if command == 'rebuild':
+        rebuild_rollup()
+        print("Table Factures_Rollup reconstruite.")
+
+    mismatches = verify_rollup()
+    for key, actual, wanted in mismatches:
+        print(f"Écart pour {dict(zip(KEY_COLUMNS, key))} : cumul {actual}, recalcul {wanted}")
+    if mismatches:
+        sys.exit(f"{len(mismatches)} ligne(s) de cumul incorrecte(s).")
+    print("Table Factures_Rollup conforme au recalcul complet.")
+
+if __name__ == '__main__':
+    main(sys.argv)
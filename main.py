@@ -1,6 +1,10 @@
-from kivy.app import App
-from kivy.uix.screenmanager import ScreenManager
-from kivy.lang import Builder
+import startup_profile
+from startup_profile import phase
+
+with phase('import kivy'):
+    from kivy.app import App
+    from kivy.uix.screenmanager import ScreenManager
+    from kivy.lang import Builder
 
 import os
 import sys
@@ -18,74 +22,141 @@ def resource_path(relative_path):
 
     return os.path.join(base_path, relative_path)
 
-print(sys.path)
 print("Python executable:", sys.executable)
 print("Python version:", sys.version)
 
 # Load the global style file
-style_path = resource_path('assets/style.kv')
-if os.path.exists(style_path):
-    try:
-        Builder.load_file(style_path)
-        print(f"Global style file 'style.kv' loaded from: {style_path}")
-    except Exception as e:
-        print(f"Error loading 'style.kv': {e}")
-else:
-    print(f"Error: 'style.kv' file not found at {style_path}")
-
-# Import screens
-from pages.demarrage import DemarragePage
-from pages.home import HomePage
-from pages.inscription import InscriptionPage
-from pages.nouveau_client import NouveauClientPage
-from pages.mes_factures import MesFacturesPage
-from pages.mes_clients import MesClientsPage
-from pages.URSSAF_TVA import URSSAF_TVAPage
-from pages.mes_infos import MesInfosPage
-from pages.modifier_client import ModifierClientPage
-from pages.nouvelle_facture import NouvelleFacturePage
-from pages.modification_facture import ModificationFacturePage
-from pages.modif_inscription import ModifInscriptionPage
+with phase('load style.kv'):
+    style_path = resource_path('assets/style.kv')
+    if os.path.exists(style_path):
+        try:
+            Builder.load_file(style_path)
+            print(f"Global style file 'style.kv' loaded from: {style_path}")
+        except Exception as e:
+            print(f"Error loading 'style.kv': {e}")
+    else:
+        print(f"Error: 'style.kv' file not found at {style_path}")
+
+# Page modules themselves are imported lazily by LazyScreenManager
+with phase('import pages'):
+    from kivy.clock import Clock
+    from importlib import import_module
+    from db.database_utils import close_connection
+    from db.executor import shutdown_executor
+    from pages.invoice_pdf import preload_pdf_generator
+
+# Screen registry: name -> (module, class, modules whose kv rules it needs).
+# Each page module loads its kv file at import, so a page is only imported
+# and built the first time it is shown (or pre-warmed).
+SCREENS = {
+    'demarrage': ('pages.demarrage', 'DemarragePage', ()),
+    'home': ('pages.home', 'HomePage', ()),
+    'inscription': ('pages.inscription', 'InscriptionPage', ()),
+    'nouvelle_facture': ('pages.nouvelle_facture', 'NouvelleFacturePage', ()),
+    'nouveau_client': ('pages.nouveau_client', 'NouveauClientPage', ()),
+    'mes_factures': ('pages.mes_factures', 'MesFacturesPage', ('pages.mes_clients',)),  # SortButton
+    'mes_clients': ('pages.mes_clients', 'MesClientsPage', ()),
+    'URSSAF_TVA': ('pages.URSSAF_TVA', 'URSSAF_TVAPage', ()),
+    'mes_infos': ('pages.mes_infos', 'MesInfosPage', ()),
+    'modifier_client': ('pages.modifier_client', 'ModifierClientPage', ()),
+    'modif_inscription': ('pages.modif_inscription', 'ModifInscriptionPage', ()),
+    'modification_facture': ('pages.modification_facture', 'ModificationFacturePage', ()),
+}
+
+# Likely next screens, built in the background once a screen is shown
+PREWARM_SCREENS = {
+    'demarrage': ('home',),
+    'home': ('nouvelle_facture', 'mes_factures'),
+}
+PREWARM_DELAY = 1.0  # seconds between two pre-warmed screens
+PDF_PRELOAD_DELAY = 3.0  # reportlab is loaded in the background after this delay
+
+class LazyScreenManager(ScreenManager):
+    """ScreenManager that builds registered screens on first use."""
+
+    def __init__(self, registry, prewarm=None, **kwargs):
+        self.registry = registry
+        self.prewarm = prewarm or {}
+        self._prewarm_queue = []
+        super().__init__(**kwargs)
+
+    def _build_screen(self, name):
+        module_name, class_name, requires = self.registry[name]
+        for required in requires:
+            import_module(required)
+        screen_class = getattr(import_module(module_name), class_name)
+        screen = screen_class(name=name)
+        self.add_widget(screen)
+        print(f"Page '{name}' added to ScreenManager")
+        return screen
+
+    def _is_built(self, name):
+        return any(screen.name == name for screen in self.screens)
+
+    def get_screen(self, name):
+        if name in self.registry and not self._is_built(name):
+            return self._build_screen(name)
+        return super().get_screen(name)
+
+    def has_screen(self, name):
+        return name in self.registry or super().has_screen(name)
+
+    def on_current_screen(self, instance, screen):
+        if screen is None:
+            return
+        self._prewarm_queue = [name for name in self.prewarm.get(screen.name, ())
+                               if not self._is_built(name)]
+        if self._prewarm_queue:
+            Clock.schedule_once(self._prewarm_next, PREWARM_DELAY)
+
+    def _prewarm_next(self, dt):
+        # One screen per callback, so a frame never pays for more than one build
+        while self._prewarm_queue:
+            name = self._prewarm_queue.pop(0)
+            if not self._is_built(name):
+                self._build_screen(name)
+                break
+        if self._prewarm_queue:
+            Clock.schedule_once(self._prewarm_next, PREWARM_DELAY)
 
 class MainApp(App):
     def build(self):
         print("Building ScreenManager")
-        sm = ScreenManager()
-        
-        # Define pages and add them to the screen manager
-        pages = [
-            DemarragePage(name='demarrage'),
-            HomePage(name='home'),
-            InscriptionPage(name='inscription'),
-            NouvelleFacturePage(name='nouvelle_facture'),
-            NouveauClientPage(name='nouveau_client'),
-            MesFacturesPage(name='mes_factures'),
-            MesClientsPage(name='mes_clients'),
-            URSSAF_TVAPage(name='URSSAF_TVA'),
-            MesInfosPage(name='mes_infos'),
-            ModifierClientPage(name='modifier_client'),
-            ModifInscriptionPage(name='modif_inscription'),
-            ModificationFacturePage(name='modification_facture')
-        ]
-        
-        # Add each page with debugging information
-        for page in pages:
-            sm.add_widget(page)
-            print(f"Page '{page.name}' added to ScreenManager")
-        
-        # Set the initial screen
-        sm.current = 'demarrage'
+        with phase('build ScreenManager'):
+            sm = LazyScreenManager(SCREENS, prewarm=PREWARM_SCREENS)
+            
+            # Set the initial screen: only DemarragePage is built at startup
+            sm.current = 'demarrage'
         print("Initial screen set to 'demarrage'")
         
         return sm
 
+    def on_start(self):
+        # Load reportlab off the UI thread once the first screens are up
+        Clock.schedule_once(lambda dt: preload_pdf_generator(), PDF_PRELOAD_DELAY)
+        # Runs on the next Clock tick, once the first frame has been drawn
+        Clock.schedule_once(self._on_first_frame, 0)
+
+    def _on_first_frame(self, dt):
+        startup_profile.mark('first frame')
+        startup_profile.dump()
+        if startup_profile.exit_requested():
+            self.stop()
+
+    def on_stop(self):
+        # Terminer les écritures en cours, puis fermer la connexion partagée
+        shutdown_executor()
+        close_connection()
+
 # Initialize and run the app
 if __name__ == '__main__':
     print("Starting the application")
 
     # Initialize the database
     from db.database_utils import init_database
-    if init_database():
+    with phase('init_database'):
+        initialized = init_database()
+    if initialized:
         print("Database initialized successfully.")
     else:
         print("Database initialization failed.")
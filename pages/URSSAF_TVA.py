@@ -12,6 +12,14 @@ from kivy.uix.textinput import TextInput
 import sqlite3
 import os
 from datetime import datetime
+from db.database_utils import get_connection
+from db.aggregations import aggregate_periods
+from db.profile import get_profile
+from db.money import Money
+from db.executor import submit_read
+from picocompta.core.declarations import (declaration_periods, months_per_period, declare_period,
+                                          declare_zero_period, urssaf_period_data, urssaf_period_invoices,
+                                          tva_period_data)
 from utils import resource_path
 
 
@@ -19,18 +27,17 @@ from utils import resource_path
 from kivy.lang import Builder
 
 kv_file = resource_path(os.path.join('pages', 'URSSAF_TVA.kv'))
-print(f"Chemin du fichier KV : {kv_file}")  # Optionnel, pour débogage
 Builder.load_file(kv_file)
 
 class URSSAF_TVAPage(Screen):
     selected_year = NumericProperty(datetime.now().year)
     echeance_declaration = NumericProperty(3)  # Default to quarterly
     urssaf_total_factures = NumericProperty(0)
-    urssaf_total_ht = NumericProperty(0)
-    urssaf_total_charge = NumericProperty(0)
+    urssaf_total_ht = ObjectProperty(Money(0))
+    urssaf_total_charge = ObjectProperty(Money(0))
     tva_total_factures = NumericProperty(0)
-    tva_total_ht = NumericProperty(0)
-    tva_total_tva = NumericProperty(0)
+    tva_total_ht = ObjectProperty(Money(0))
+    tva_total_tva = ObjectProperty(Money(0))
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
@@ -42,30 +49,51 @@ class URSSAF_TVAPage(Screen):
         self.load_data()
 
     def load_user_preferences(self):
-        db_path = self.get_db_path()
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        cursor.execute("SELECT echeance_declaration FROM Info_personnelle ORDER BY id_personnelle DESC LIMIT 1")
-        result = cursor.fetchone()
-        self.echeance_declaration = result[0] if result else 3
-        conn.close()
+        profile = get_profile()
+        self.echeance_declaration = profile.echeance_declaration if profile else 3
+
+    _load_token = 0  # Incrémenté à chaque chargement : seul le dernier résultat est affiché
 
     def load_data(self):
         self.ids.urssaf_container.clear_widgets()
         self.ids.tva_container.clear_widgets()
+        # Affiché tout de suite, remplacé par les lignes au retour de la requête
+        self.ids.urssaf_container.add_widget(Label(text="Chargement...", size_hint_y=None, height=40))
+        self.ids.tva_container.add_widget(Label(text="Chargement...", size_hint_y=None, height=40))
 
+        self._load_token += 1
         periods = self.generate_periods()
-        for period in periods:
-            self._add_urssaf_row(period)
-            self._add_tva_row(period)
+        submit_read(self._fetch_year, periods, months_per_period(self.echeance_declaration),
+                    callback=lambda result, token=self._load_token: self._show_year(token, periods, result))
+
+    def _fetch_year(self, periods, months_per_period):
+        """Return (activity_dates, figures) for the selected year (database thread)."""
+        try:
+            activity_dates = self.get_activity_dates()
+        except (sqlite3.Error, ValueError) as e:
+            print(f"Error loading activity dates: {e}")
+            activity_dates = None
+
+        # Tous les chiffres de l'année en une seule requête
+        return activity_dates, aggregate_periods(periods, months_per_period)
+
+    def _show_year(self, token, periods, result):
+        if token != self._load_token:
+            return  # L'année ou l'échéance a changé depuis
+        activity_dates, figures = result
+        self.ids.urssaf_container.clear_widgets()
+        self.ids.tva_container.clear_widgets()
+        for period, (urssaf_data, tva_data) in zip(periods, figures):
+            self._add_urssaf_row(period, urssaf_data, activity_dates)
+            self._add_tva_row(period, tva_data, activity_dates)
         
         self.update_totals()
 
-    def _add_urssaf_row(self, period):
+    def _add_urssaf_row(self, period, urssaf_data, activity_dates=None):
         period_label = f"{period['name']} {self.selected_year}"
-        urssaf_data = self.calculate_urssaf_data(period['start_date'], period['end_date'])
         
-        row_color = self.get_row_color(period['start_date'], period['end_date'], urssaf_data['all_declared'], is_tva=False)
+        row_color = self.get_row_color(period['start_date'], period['end_date'], urssaf_data['all_declared'], is_tva=False,
+                                       activity_dates=activity_dates)
 
         urssaf_row = PeriodRow(
             period_label=period_label,
@@ -78,11 +106,11 @@ class URSSAF_TVAPage(Screen):
         )
         self.ids.urssaf_container.add_widget(urssaf_row)
 
-    def _add_tva_row(self, period):
+    def _add_tva_row(self, period, tva_data, activity_dates=None):
         period_label = f"{period['name']} {self.selected_year}"
-        tva_data = self.calculate_tva_data(period['start_date'], period['end_date'])
         
-        row_color = self.get_row_color(period['start_date'], period['end_date'], tva_data['all_declared'], is_tva=True)
+        row_color = self.get_row_color(period['start_date'], period['end_date'], tva_data['all_declared'], is_tva=True,
+                                       activity_dates=activity_dates)
 
         tva_row = PeriodRow(
             period_label=period_label,
@@ -95,32 +123,22 @@ class URSSAF_TVAPage(Screen):
         )
         self.ids.tva_container.add_widget(tva_row)
 
-    def get_db_path(self):
-        """Return the path to the database."""
-        return os.path.join(os.path.dirname(os.path.dirname(__file__)), 'db', 'picocompta.db')
+    def get_activity_dates(self):
+        """Return (debut_activite, debut_activite_TVA, status_tva) from the cached profile."""
+        profile = get_profile()
+
+        # If no profile, initialize with default values
+        if not profile:
+            return None, None, None
+        return profile.debut_activite_date, profile.debut_activite_tva_date, profile.status_tva
 
-    def get_row_color(self, start_date, end_date, all_declared, is_tva=False):
+    def get_row_color(self, start_date, end_date, all_declared, is_tva=False, activity_dates=None):
         """Determine row color based on the period status and dates"""
         try:
-            db_path = self.get_db_path()
-            conn = sqlite3.connect(db_path)
-            cursor = conn.cursor()
-            
-            # Retrieve the activity start dates and TVA status
-            cursor.execute("""
-                SELECT debut_activite, debut_activite_TVA, status_tva
-                FROM Info_Personnelle 
-                ORDER BY id_personnelle DESC LIMIT 1
-            """)
-            result = cursor.fetchone()
-
-            # If no result, initialize with default values
-            if not result:
-                debut_activite, debut_activite_tva, status_tva = None, None, None
-            else:
-                debut_activite = datetime.strptime(result[0], "%Y-%m-%d").date() if result[0] else None
-                debut_activite_tva = datetime.strptime(result[1], "%Y-%m-%d").date() if result[1] else None
-                status_tva = result[2]
+            # Retrieve the activity start dates and TVA status, unless already loaded for the whole refresh
+            if activity_dates is None:
+                activity_dates = self.get_activity_dates()
+            debut_activite, debut_activite_tva, status_tva = activity_dates
 
             # Pour les lignes TVA, vérifier d'abord le status_tva
             if is_tva:
@@ -152,127 +170,24 @@ class URSSAF_TVAPage(Screen):
         except (sqlite3.Error, ValueError) as e:
             print(f"Error in get_row_color: {e}")
             return "red"
-        finally:
-            if conn:
-                conn.close()
 
     def update_totals(self):
         """Update URSSAF and TVA totals"""
         self.urssaf_total_factures = sum(child.nb_factures for child in self.ids.urssaf_container.children)
-        self.urssaf_total_ht = sum(child.total_ht for child in self.ids.urssaf_container.children)
-        self.urssaf_total_charge = sum(child.total_charge for child in self.ids.urssaf_container.children)
+        self.urssaf_total_ht = sum((child.total_ht for child in self.ids.urssaf_container.children), Money(0))
+        self.urssaf_total_charge = sum((child.total_charge for child in self.ids.urssaf_container.children), Money(0))
         self.tva_total_factures = sum(child.nb_factures for child in self.ids.tva_container.children)
-        self.tva_total_ht = sum(child.total_ht for child in self.ids.tva_container.children)
-        self.tva_total_tva = sum(child.total_tva for child in self.ids.tva_container.children)
+        self.tva_total_ht = sum((child.total_ht for child in self.ids.tva_container.children), Money(0))
+        self.tva_total_tva = sum((child.total_tva for child in self.ids.tva_container.children), Money(0))
 
     def generate_periods(self):
-        if self.echeance_declaration == 3:  # Quarterly
-            return [
-                {"name": "1er Trimestre", "start_date": f"{self.selected_year}-01-01", "end_date": f"{self.selected_year}-03-31"},
-                {"name": "2ème Trimestre", "start_date": f"{self.selected_year}-04-01", "end_date": f"{self.selected_year}-06-30"},
-                {"name": "3ème Trimestre", "start_date": f"{self.selected_year}-07-01", "end_date": f"{self.selected_year}-09-30"},
-                {"name": "4ème Trimestre", "start_date": f"{self.selected_year}-10-01", "end_date": f"{self.selected_year}-12-31"}
-            ]
-        else:  # Monthly
-            return [
-                {
-                    "name": ["Janvier", "Février", "Mars", "Avril", "Mai", "Juin",
-                            "Juillet", "Août", "Septembre", "Octobre", "Novembre", "Décembre"][month - 1],
-                    "start_date": f"{self.selected_year}-{month:02d}-01",
-                    "end_date": f"{self.selected_year}-{month:02d}-{self.days_in_month(month)}"
-                }
-                for month in range(1, 13)
-            ]
-
-    def days_in_month(self, month):
-        if month in [4, 6, 9, 11]:
-            return 30
-        elif month == 2:
-            return 29 if self.selected_year % 4 == 0 else 28
-        return 31
+        return declaration_periods(self.selected_year, self.echeance_declaration)
 
     def calculate_urssaf_data(self, start_date, end_date):
-        db_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'db', 'picocompta.db')
-        with sqlite3.connect(db_path) as conn:
-            cursor = conn.cursor()
-
-            # Vérifier déclaration à zéro
-            cursor.execute("""
-                SELECT COUNT(*) FROM Declarations_Zero 
-                WHERE type = 'URSSAF' 
-                AND date_debut = ? 
-                AND date_fin = ?
-            """, (start_date, end_date))
-            zero_declaration = cursor.fetchone()[0] > 0
-
-            cursor.execute("""
-                SELECT COUNT(*) as total_factures,
-                    SUM(montant_ht) as total_ht,
-                    type_activite,
-                    MIN(CASE WHEN status_declaration_URSSAF = 1 THEN 1 ELSE 0 END) as all_declared,
-                    taux_BNC, taux_BICm, taux_BICs
-                FROM Factures
-                WHERE date_emission BETWEEN ? AND ? AND status = 1
-                GROUP BY type_activite
-            """, (start_date, end_date))
-            rows = cursor.fetchall()
-
-            totals = {
-                "nb_factures": 0,
-                "total_ht": 0,
-                "total_charge": 0,
-                "total_bnc": 0,
-                "total_bicm": 0,
-                "total_bics": 0,
-                "all_declared": True
-            }
-
-            if not rows:
-                totals["all_declared"] = zero_declaration
-                return totals
-
-            for row in rows:
-                nb_factures, montant_ht, activity_type, declared_status, taux_bnc, taux_bicm, taux_bics = row
-                montant_ht = montant_ht or 0
-                charge = 0
-
-                totals["nb_factures"] += nb_factures or 0
-                totals["total_ht"] += montant_ht
-
-                if activity_type == 'BNC':
-                    charge = montant_ht * (taux_bnc or 0.22)
-                    totals["total_bnc"] += charge
-                elif activity_type == 'BIC marchandise':
-                    charge = montant_ht * (taux_bicm or 0.13)
-                    totals["total_bicm"] += charge
-                elif activity_type == 'BIC service':
-                    charge = montant_ht * (taux_bics or 0.245)
-                    totals["total_bics"] += charge
-
-                totals["total_charge"] += charge
-                if not declared_status:
-                    totals["all_declared"] = False
-
-            totals["all_declared"] = totals["all_declared"] or zero_declaration
-            return totals
+        return urssaf_period_data(start_date, end_date)
 
     def calculate_tva_data(self, start_date, end_date):
-        db_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'db', 'picocompta.db')
-        with sqlite3.connect(db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT COUNT(*), SUM(montant_ht), SUM(tva), MIN(status_declaration_TVA) AS all_declared
-                FROM Factures
-                WHERE date_emission BETWEEN ? AND ? AND status = 1
-            """, (start_date, end_date))
-            row = cursor.fetchone()
-
-        return {
-            "nb_factures": row[0] or 0,
-            "total_ht": row[1] or 0,
-            "total_tva": row[2] or 0,
-            "all_declared": bool(row[3])
-        }
+        return tva_period_data(start_date, end_date)
 
     def show_details(self, type_declaration, period, data):
         if type_declaration == "URSSAF":
@@ -291,9 +206,9 @@ class URSSAF_TVAPage(Screen):
 class PeriodRow(BoxLayout):
     period_label = StringProperty()
     nb_factures = NumericProperty()
-    total_ht = NumericProperty()
-    total_charge = NumericProperty()
-    total_tva = NumericProperty()
+    total_ht = ObjectProperty(Money(0))
+    total_charge = ObjectProperty(Money(0))
+    total_tva = ObjectProperty(Money(0))
     all_declared = BooleanProperty()
     details_callback = ObjectProperty()
     row_color = StringProperty("red")  # Default color
@@ -385,31 +300,23 @@ class BaseDetailsPopup(Popup):
 
     def get_nb_factures(self):
         """Récupère le nombre de factures pour la période"""
-        db_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'db', 'picocompta.db')
         try:
-            with sqlite3.connect(db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    SELECT COUNT(*)
-                    FROM Factures
-                    WHERE date_emission BETWEEN ? AND ?
-                    AND status = 1
-                """, (self.period['start_date'], self.period['end_date']))
-                return cursor.fetchone()[0]
+            conn = get_connection()
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT COUNT(*)
+                FROM Factures
+                WHERE date_emission BETWEEN ? AND ?
+                AND status = 1
+            """, (self.period['start_date'], self.period['end_date']))
+            return cursor.fetchone()[0]
         except sqlite3.Error:
             return 0
     
 
     def declare_zero_period(self, instance):
         """Déclare directement la période à zéro sans popup"""
-        db_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'db', 'picocompta.db')
-        with sqlite3.connect(db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                INSERT INTO Declarations_Zero (type, date_debut, date_fin, commentaire)
-                VALUES (?, ?, ?, ?)
-            """, (self.declaration_type, self.period['start_date'], self.period['end_date'], 'Déclaration à zéro'))
-            conn.commit()
+        declare_zero_period(self.declaration_type, self.period['start_date'], self.period['end_date'])
             
         if self.refresh_callback:
             self.refresh_callback()
@@ -434,15 +341,6 @@ class URSSAFDetailsPopup(BaseDetailsPopup):
         self.declaration_type = "URSSAF"
         self.title = f"URSSAF Détails - {self.period['name']}"
 
-    def _calculate_charge(self, montant_ht, type_activite, taux_bnc, taux_bicm, taux_bics):
-        if type_activite == 'BNC':
-            return montant_ht * (taux_bnc or 0.22)
-        elif type_activite == 'BIC marchandise':
-            return montant_ht * (taux_bicm or 0.13)
-        elif type_activite == 'BIC service':
-            return montant_ht * (taux_bics or 0.245)
-        return 0
-
     def _add_header(self, layout):
         header_layout = GridLayout(cols=6, size_hint_y=None, height=40, spacing=5)
         headers = ["Client", "N°", "Date Paiement", "Montant HT", "Type d'activité", "Charge URSSAF"]
@@ -455,77 +353,52 @@ class URSSAFDetailsPopup(BaseDetailsPopup):
         grid = GridLayout(cols=6, size_hint_y=None, spacing=5, row_default_height=40)
         grid.bind(minimum_height=grid.setter('height'))
 
-        db_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'db', 'picocompta.db')
-        with sqlite3.connect(db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT c.nom, f.numero_facture, f.date_status_set, 
-                       f.montant_ht, f.type_activite,
-                       f.taux_BNC, f.taux_BICm, f.taux_BICs
-                FROM Factures f
-                JOIN Clients c ON f.id_client = c.id_client
-                WHERE f.date_emission BETWEEN ? AND ?
-                  AND f.status = 1
-                ORDER BY f.date_emission
-            """, (self.period['start_date'], self.period['end_date']))
-            
-            for row in cursor.fetchall():
-                nom, num_facture, date, montant_ht, type_activite, taux_bnc, taux_bicm, taux_bics = row
-                charge = self._calculate_charge(montant_ht, type_activite, taux_bnc, taux_bicm, taux_bics)
-                
-                for text in [str(nom), str(num_facture), str(date), f"{montant_ht:.2f} €", 
-                           str(type_activite), f"{charge:.2f} €"]:
-                    label = Label(
-                        text=text,
-                        size_hint_y=None,
-                        height=40,
-                        text_size=(None, None)
-                    )
-                    grid.add_widget(label)
+        # Charges arrondies par facture, comme le total de la période (db/rollup.py)
+        invoices = urssaf_period_invoices(self.period['start_date'], self.period['end_date'])
+        for nom, num_facture, date, montant_ht, type_activite, charge in invoices:
+            for text in [str(nom), str(num_facture), str(date), f"{montant_ht:.2f} €",
+                       str(type_activite), f"{charge:.2f} €"]:
+                label = Label(
+                    text=text,
+                    size_hint_y=None,
+                    height=40,
+                    text_size=(None, None)
+                )
+                grid.add_widget(label)
 
         scroll.add_widget(grid)
         layout.add_widget(scroll)
 
     def declare_period(self, instance):
-        db_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'db', 'picocompta.db')
-        with sqlite3.connect(db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                UPDATE Factures
-                SET status_declaration_URSSAF = 1
-                WHERE date_emission BETWEEN ? AND ? AND status = 1
-            """, (self.period['start_date'], self.period['end_date']))
-            conn.commit()
+        declare_period("URSSAF", self.period['start_date'], self.period['end_date'])
         
         if self.refresh_callback:
             self.refresh_callback()
         self.dismiss()
 
     def _add_summary(self, layout):
-        db_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'db', 'picocompta.db')
-        
         # Initialize totals dictionary for clarity
         totals = {
-            'BNC': 0,
-            'BIC marchandise': 0,
-            'BIC service': 0
+            'BNC': Money(0),
+            'BIC marchandise': Money(0),
+            'BIC service': Money(0)
         }
         
         try:
-            with sqlite3.connect(db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    SELECT type_activite, SUM(montant_ht) as total_ht
-                    FROM Factures
-                    WHERE date_emission BETWEEN ? AND ? 
-                    AND status = 1
-                    GROUP BY type_activite
-                """, (self.period['start_date'], self.period['end_date']))
-                
-                # Update totals based on the activity type
-                for type_activite, montant in cursor.fetchall():
-                    if type_activite in totals:
-                        totals[type_activite] = montant or 0  # Set montant to 0 if None
+            conn = get_connection()
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT type_activite, SUM(montant_ht) as total_ht
+                FROM Factures
+                WHERE date_emission BETWEEN ? AND ? 
+                AND status = 1
+                GROUP BY type_activite
+            """, (self.period['start_date'], self.period['end_date']))
+            
+            # Update totals based on the activity type
+            for type_activite, montant in cursor.fetchall():
+                if type_activite in totals:
+                    totals[type_activite] = Money(montant)  # Money(None) vaut 0
 
         except sqlite3.Error as e:
             print(f"Erreur lors de la récupération des totaux: {e}")
@@ -538,7 +411,7 @@ class URSSAFDetailsPopup(BaseDetailsPopup):
         summary.add_widget(Label(text=f"CA prestations services: {totals['BIC service']:.2f} €"))
 
         # Retrieve `total_charge` safely from `self.data`
-        total_charge = self.data.get('total_charge', 0) if self.data else 0
+        total_charge = self.data.get('total_charge', Money(0)) if self.data else Money(0)
         summary.add_widget(Label(text="À Payer:", bold=True))
         summary.add_widget(Label(text=f"Total des charges: {total_charge:.2f} €"))
 
@@ -546,15 +419,7 @@ class URSSAFDetailsPopup(BaseDetailsPopup):
         layout.add_widget(summary)
 
     def declare_period(self, instance):
-        db_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'db', 'picocompta.db')
-        with sqlite3.connect(db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                UPDATE Factures
-                SET status_declaration_URSSAF = 1
-                WHERE date_emission BETWEEN ? AND ? AND status = 1
-            """, (self.period['start_date'], self.period['end_date']))
-            conn.commit()
+        declare_period("URSSAF", self.period['start_date'], self.period['end_date'])
         
         if self.refresh_callback:
             self.refresh_callback()
@@ -571,37 +436,37 @@ class TVADetailsPopup(BaseDetailsPopup):
         grid = GridLayout(cols=5, size_hint_y=None, spacing=5, row_default_height=40)
         grid.bind(minimum_height=grid.setter('height'))
 
-        db_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'db', 'picocompta.db')
         try:
-            with sqlite3.connect(db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    SELECT c.nom, f.numero_facture, f.date_status_set, 
-                           COALESCE(f.montant_ht, 0) as montant_ht, 
-                           COALESCE(f.tva, 0) as tva
-                    FROM Factures f
-                    JOIN Clients c ON f.id_client = c.id_client
-                    WHERE f.date_emission BETWEEN ? AND ?
-                      AND f.status = 1
-                    ORDER BY f.date_emission
-                """, (self.period['start_date'], self.period['end_date']))
-                
-                rows = cursor.fetchall()
-                
-                if not rows:  # Si pas de données, ajouter une ligne vide
-                    grid.add_widget(Label(text="Aucune facture pour cette période", size_hint_y=None, height=40))
-                else:
-                    for row in rows:
-                        nom, num_facture, date, montant_ht, tva = row
-                        for text in [str(nom or ''), str(num_facture or ''), str(date or ''), 
-                                   f"{montant_ht:.2f} €", f"{tva:.2f} €"]:
-                            label = Label(
-                                text=text,
-                                size_hint_y=None,
-                                height=40,
-                                text_size=(None, None)
-                            )
-                            grid.add_widget(label)
+            conn = get_connection()
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT c.nom, f.numero_facture, f.date_status_set, 
+                       COALESCE(f.montant_ht, 0) as montant_ht, 
+                       COALESCE(f.tva, 0) as tva
+                FROM Factures f
+                JOIN Clients c ON f.id_client = c.id_client
+                WHERE f.date_emission BETWEEN ? AND ?
+                  AND f.status = 1
+                ORDER BY f.date_emission
+            """, (self.period['start_date'], self.period['end_date']))
+            
+            rows = cursor.fetchall()
+            
+            if not rows:  # Si pas de données, ajouter une ligne vide
+                grid.add_widget(Label(text="Aucune facture pour cette période", size_hint_y=None, height=40))
+            else:
+                for row in rows:
+                    nom, num_facture, date, montant_ht, tva = row
+                    montant_ht, tva = Money(montant_ht), Money(tva)
+                    for text in [str(nom or ''), str(num_facture or ''), str(date or ''), 
+                               f"{montant_ht:.2f} €", f"{tva:.2f} €"]:
+                        label = Label(
+                            text=text,
+                            size_hint_y=None,
+                            height=40,
+                            text_size=(None, None)
+                        )
+                        grid.add_widget(label)
 
         except sqlite3.Error as e:
             grid.add_widget(Label(text=f"Erreur de chargement des données: {e}", size_hint_y=None, height=40))
@@ -610,28 +475,26 @@ class TVADetailsPopup(BaseDetailsPopup):
         layout.add_widget(scroll)
 
     def _add_summary(self, layout):
-        db_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'db', 'picocompta.db')
         try:
-            with sqlite3.connect(db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    SELECT 
-                        COALESCE(SUM(montant_ht), 0) as total_ht,
-                        COALESCE(SUM(tva), 0) as total_tva
-                    FROM Factures
-                    WHERE date_emission BETWEEN ? AND ? 
-                    AND status = 1
-                """, (self.period['start_date'], self.period['end_date']))
-                
-                total_ht, total_tva = cursor.fetchone()
-                
-                # Garantir que les valeurs ne sont pas None
-                total_ht = total_ht or 0
-                total_tva = total_tva or 0
+            conn = get_connection()
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT 
+                    COALESCE(SUM(montant_ht), 0) as total_ht,
+                    COALESCE(SUM(tva), 0) as total_tva
+                FROM Factures
+                WHERE date_emission BETWEEN ? AND ? 
+                AND status = 1
+            """, (self.period['start_date'], self.period['end_date']))
+            
+            total_ht, total_tva = cursor.fetchone()
+            
+            total_ht = Money(total_ht)
+            total_tva = Money(total_tva)
 
         except sqlite3.Error:
-            total_ht = 0
-            total_tva = 0
+            total_ht = Money(0)
+            total_tva = Money(0)
 
         summary = BoxLayout(orientation="vertical", size_hint_y=None, height=100, spacing=5)
         summary.add_widget(Label(text="Récapitulatif TVA:", bold=True))
@@ -647,30 +510,14 @@ class TVADetailsPopup(BaseDetailsPopup):
         layout.add_widget(header_layout)
         
     def declare_period(self, instance):
-        db_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'db', 'picocompta.db')
-        with sqlite3.connect(db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                UPDATE Factures
-                SET status_declaration_TVA = 1
-                WHERE date_emission BETWEEN ? AND ? AND status = 1
-            """, (self.period['start_date'], self.period['end_date']))
-            conn.commit()
+        declare_period("TVA", self.period['start_date'], self.period['end_date'])
         
         if self.refresh_callback:
             self.refresh_callback()
         self.dismiss()
 
     def declare_period(self, instance):
-        db_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'db', 'picocompta.db')
-        with sqlite3.connect(db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                UPDATE Factures
-                SET status_declaration_TVA = 1
-                WHERE date_emission BETWEEN ? AND ? AND status = 1
-            """, (self.period['start_date'], self.period['end_date']))
-            conn.commit()
+        declare_period("TVA", self.period['start_date'], self.period['end_date'])
         
         if self.refresh_callback:
             self.refresh_callback()
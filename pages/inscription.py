@@ -9,14 +9,15 @@ from kivy.uix.label import Label
 import os
 import sqlite3
 from kivy.clock import Clock
-from db.database_utils import init_database, table_exists
+from db.database_utils import init_database, table_exists, get_db_path, get_connection
+from db.profile import invalidate_profile
 import datetime
 from utils import resource_path
 
 class InscriptionPage(Screen):
     def on_pre_enter(self):
         """Prepare the database and set default values."""
-        db_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'db', 'picocompta.db')
+        db_path = get_db_path()
 
         # Initialize the database if it does not exist
         if not os.path.exists(db_path):
@@ -97,9 +98,8 @@ class InscriptionPage(Screen):
             return
 
         # Insert data into the database
-        db_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'db', 'picocompta.db')
         try:
-            conn = sqlite3.connect(db_path)
+            conn = get_connection()
             cursor = conn.cursor()
             cursor.execute('''
                 INSERT INTO Info_Personnelle (
@@ -111,10 +111,11 @@ class InscriptionPage(Screen):
                 )
             ''', info_data)
             conn.commit()
-            conn.close()
+            invalidate_profile()
 
             self.show_message("Personal information saved successfully.", callback=lambda: setattr(self.manager, 'current', 'home'))
         except sqlite3.Error as e:
+            get_connection().rollback()
             self.show_message(f"Error saving data: {e}")
 
     def show_message(self, message, callback=None):
@@ -137,5 +138,4 @@ class InscriptionPage(Screen):
 from kivy.lang import Builder
 
 kv_file = resource_path(os.path.join('pages', 'inscription.kv'))
-print(f"Chemin du fichier KV : {kv_file}")  # Optionnel, pour débogage
 Builder.load_file(kv_file)
\ No newline at end of file
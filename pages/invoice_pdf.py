@@ -0,0 +1,62 @@
+#pages/invoice_pdf.py
+"""
+Façade paresseuse du générateur de factures PDF.
+
+pages.pdf_generator importe reportlab (platypus, polices), ce qui coûte cher au
+démarrage : il n'est chargé qu'au premier generate_invoice, ou en arrière-plan
+par preload_pdf_generator une fois l'interface affichée.
+"""
+import os
+import threading
+
+# Dossier des factures PDF (créé par main.py) ; le cache est dans cache/
+GENERATED_PDFS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'generated_pdfs'))
+
+_generator_class = None
+_load_lock = threading.Lock()
+_preload_thread = None
+
+def load_pdf_generator():
+    """Importe pages.pdf_generator (une seule fois) et retourne InvoicePDFGenerator."""
+    global _generator_class
+    if _generator_class is None:
+        with _load_lock:
+            if _generator_class is None:
+                from pages.pdf_generator import InvoicePDFGenerator
+                _generator_class = InvoicePDFGenerator
+    return _generator_class
+
+def preload_pdf_generator():
+    """Charge reportlab dans un thread d'arrière-plan, sans bloquer l'interface."""
+    global _preload_thread
+    if _generator_class is not None or _preload_thread is not None:
+        return
+    _preload_thread = threading.Thread(target=_preload, name='pdf-preload', daemon=True)
+    _preload_thread.start()
+
+def _preload():
+    try:
+        load_pdf_generator()
+    except ImportError as e:
+        print(f"Erreur lors du préchargement du générateur PDF : {e}")
+
+def generate_invoice(invoice_number, output_path, db_path=None):
+    """Génère le PDF de la facture `invoice_number` dans `output_path`."""
+    generator = load_pdf_generator()(db_path)
+    return generator.generate_invoice(invoice_number, output_path)
+
+def render_invoice_bytes(invoice, db_path=None):
+    """
+    Retourne le PDF d'une facture en mémoire (bytes), pour une pièce jointe
+    ou un export ; `invoice` est un id_facture ou des données déjà chargées.
+    """
+    return load_pdf_generator()(db_path).render_bytes(invoice)
+
+def get_invoice_pdf(invoice_id, db_path=None):
+    """
+    Retourne le chemin du PDF à jour de la facture, rendu seulement si ses
+    données ont changé (voir pages.pdf_cache) ; None si la facture ne peut
+    pas être rendue.
+    """
+    from pages.pdf_cache import get_invoice_pdf as get_cached_invoice_pdf
+    return get_cached_invoice_pdf(invoice_id, load_pdf_generator()(db_path))
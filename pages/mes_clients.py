@@ -1,74 +1,39 @@
 from kivy.uix.screenmanager import Screen
 from kivy.lang import Builder
 from kivy.uix.boxlayout import BoxLayout
-from kivy.uix.button import Button
-from kivy.uix.label import Label
-from kivy.properties import NumericProperty, StringProperty, BooleanProperty
+from kivy.uix.recycleview.views import RecycleDataViewBehavior
+from kivy.properties import NumericProperty, StringProperty, BooleanProperty, ObjectProperty
 from datetime import datetime
 import os
 import sqlite3
+from db.listings import (fetch_clients_page, ListingColumns, CLIENT_COLUMNS,
+                         CLIENT_SORT_COLUMNS, PAGE_SIZE, NO_LIMIT)
+from db.money import Money
 from utils import resource_path
 
-class ClientRow(BoxLayout):
+class ClientRow(RecycleDataViewBehavior, BoxLayout):
+    """Vue recyclée d'un client : ses widgets sont déclarés dans mes_clients.kv."""
+    index = None
+    client_id = NumericProperty(0)
+    nom = StringProperty('')
+    premiere_facture = StringProperty('')
+    ca_n = ObjectProperty(Money(0))
+    ca_total = ObjectProperty(Money(0))
+    impayes = ObjectProperty(Money(0))
     status = NumericProperty(0)
     all_declared = BooleanProperty(False)
+    parent_screen = ObjectProperty(None, allownone=True)
+
+    def refresh_view_attrs(self, rv, index, data):
+        """Associe cette vue au client d'indice `index` des données du RecycleView."""
+        self.index = index
+        self.parent_screen = rv.parent_screen
+        super().refresh_view_attrs(rv, index, data)
 
-    def __init__(self, client_data, parent_screen, **kwargs):
-        super().__init__(**kwargs)
-        self.parent_screen = parent_screen
-        self.orientation = 'horizontal'
-        self.size_hint_y = None
-        self.height = 40
-        self.padding = 5
-        self.spacing = 2
-        
         # Statut pour la coloration
-        self.status = 1 if client_data['impayes'] == 0 else 0
+        self.status = 1 if self.impayes == 0 else 0
         self.all_declared = self.status == 1
 
-        # Nom
-        self.add_widget(Label(
-            text=client_data['nom'],
-            size_hint_x=0.2
-        ))
-        
-        # Première facture
-        date_str = client_data['premiere_facture'] or 'Aucune'
-        self.add_widget(Label(
-            text=date_str,
-            size_hint_x=0.15
-        ))
-        
-        # CA N
-        self.add_widget(Label(
-            text=f"{client_data['ca_n']:.2f} €",
-            size_hint_x=0.15
-        ))
-        
-        # CA Total
-        self.add_widget(Label(
-            text=f"{client_data['ca_total']:.2f} €",
-            size_hint_x=0.15
-        ))
-        
-        # Impayés
-        self.add_widget(Label(
-            text=f"{client_data['impayes']:.2f} €",
-            size_hint_x=0.15
-        ))
-        
-        # Bouton Modifier
-        actions = BoxLayout(size_hint_x=0.2, spacing=5)
-        modifier_btn = Button(
-            text='Modifier',
-            size_hint=(None, None),
-            size=(60, 30),
-            pos_hint={'center_y': 0.5},
-            on_release=lambda x: self.modifier_client(client_data['id'])
-        )
-        actions.add_widget(modifier_btn)
-        self.add_widget(actions)
-
     def get_background_color(self):
         return (0.7, 1, 0.7, 1) if self.all_declared else (1, 0.7, 0.7, 1)
 
@@ -81,84 +46,99 @@ class ClientRow(BoxLayout):
 class MesClientsPage(Screen):
     tri_actuel = 'nom'
     ordre_croissant = True
+    SCROLL_PRELOAD_THRESHOLD = 0.1  # Charger la page suivante à 10 % du bas de la liste
+    _next_cursor = None
+    _listing = None
+    _tri_requete = None  # (tri, ordre) de la requête SQL d'où viennent les pages
+    _ordre_affiche = None  # Positions affichées, une fois la liste triée en mémoire
 
     def on_enter(self):
         """Appelé quand on entre dans la page"""
         self.charger_clients()
 
     def charger_clients(self):
-        """Charge et affiche la liste des clients"""
-        # Vider la liste actuelle
-        self.ids.clients_container.clear_widgets()
-        
-        # Connexion à la base de données
-        db_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'db', 'picocompta.db')
+        """Charge la première page de clients dans le RecycleView"""
+        self._next_cursor = None
+        self._ordre_affiche = None
+        self._listing = ListingColumns(CLIENT_COLUMNS, 'client_id', self._record_from_row)
+        self._tri_requete = (self.tri_actuel, self.ordre_croissant)
+        self.ids.clients_list.data = []
+        self.ids.clients_list.scroll_y = 1
+        try:
+            self._charger_page(after=None)
+        except sqlite3.Error as e:
+            print(f"Erreur lors du chargement des clients : {e}")
+
+    def charger_page_suivante(self):
+        """Ajoute la page suivante de clients, s'il en reste"""
+        if self._ordre_affiche is not None:
+            # Triée en mémoire : les clients suivants sont déjà dans les colonnes
+            data = self.ids.clients_list.data
+            data.extend(self._listing.records(self._ordre_affiche[len(data):len(data) + PAGE_SIZE]))
+            return
+        if self._next_cursor is None:
+            return
         try:
-            conn = sqlite3.connect(db_path)
-            cursor = conn.cursor()
-            
-            # Requête pour récupérer les clients avec leurs données
-            query = '''
-                SELECT 
-                    c.id_client,
-                    c.nom,
-                    MIN(f.date_emission) as premiere_facture,
-                    SUM(CASE 
-                        WHEN strftime('%Y', f.date_emission) = strftime('%Y', 'now') 
-                        THEN f.montant_total 
-                        ELSE 0 
-                    END) as ca_n,
-                    SUM(f.montant_total) as ca_total,
-                    SUM(CASE 
-                        WHEN f.status = 0 
-                        THEN f.montant_total 
-                        ELSE 0 
-                    END) as impayes
-                FROM Clients c
-                LEFT JOIN Factures f ON c.id_client = f.id_client
-                GROUP BY c.id_client, c.nom
-                ORDER BY 
-                    CASE WHEN :tri = 'nom' THEN c.nom 
-                         WHEN :tri = 'date' THEN premiere_facture 
-                         WHEN :tri = 'ca_n' THEN ca_n 
-                         WHEN :tri = 'ca_total' THEN ca_total 
-                         WHEN :tri = 'impayes' THEN impayes 
-                    END
-            '''
-            if not self.ordre_croissant:
-                query += ' DESC'
-            
-            cursor.execute(query, {'tri': self.tri_actuel})
-            
-            for row in cursor.fetchall():
-                client_data = {
-                    'id': row[0],
-                    'nom': row[1],
-                    'premiere_facture': row[2],
-                    'ca_n': row[3] or 0,
-                    'ca_total': row[4] or 0,
-                    'impayes': row[5] or 0
-                }
-                self.ids.clients_container.add_widget(ClientRow(client_data, self))
-            
-            conn.close()
-            
+            self._charger_page(after=self._next_cursor)
         except sqlite3.Error as e:
             print(f"Erreur lors du chargement des clients : {e}")
 
+    def _charger_page(self, after):
+        tri, ordre = self._tri_requete
+        rows, self._next_cursor = fetch_clients_page(tri, ordre, after=after)
+        self.ids.clients_list.data.extend(self._listing.records(self._listing.extend(rows)))
+
+    def _reste_a_afficher(self):
+        if self._ordre_affiche is not None:
+            return len(self.ids.clients_list.data) < len(self._ordre_affiche)
+        return self._next_cursor is not None
+
+    @staticmethod
+    def _record_from_row(row):
+        return {
+            'client_id': row[0],
+            'nom': row[1] or '',
+            'premiere_facture': row[2] or 'Aucune',
+            'ca_n': Money(row[3]),
+            'ca_total': Money(row[4]),
+            'impayes': Money(row[5])
+        }
+
+    def on_clients_scroll(self, scroll_y):
+        """Charge la page suivante quand l'utilisateur approche du bas de la liste"""
+        if scroll_y <= self.SCROLL_PRELOAD_THRESHOLD and self._reste_a_afficher():
+            self.charger_page_suivante()
+
     def trier_par(self, critere):
-        """Change le critère de tri et recharge la liste"""
+        """Change le critère de tri et retrie les clients en mémoire"""
         if critere == self.tri_actuel:
             self.ordre_croissant = not self.ordre_croissant
         else:
             self.tri_actuel = critere
             self.ordre_croissant = True
-        self.charger_clients()
+
+        if self._listing is None:
+            self.charger_clients()
+            return
+        if self._next_cursor is not None:
+            # Le reste de la liste est lu une fois, en colonnes seulement : le
+            # RecycleView reçoit toujours PAGE_SIZE dictionnaires à la fois
+            tri, ordre = self._tri_requete
+            try:
+                rows, self._next_cursor = fetch_clients_page(
+                    tri, ordre, after=self._next_cursor, limit=NO_LIMIT)
+            except sqlite3.Error as e:
+                print(f"Erreur lors du chargement des clients : {e}")
+                return
+            self._listing.extend(rows)
+        self._ordre_affiche = self._listing.permutation(
+            CLIENT_SORT_COLUMNS[self.tri_actuel], self.ordre_croissant)
+        self.ids.clients_list.data = self._listing.records(self._ordre_affiche[:PAGE_SIZE])
+        self.ids.clients_list.scroll_y = 1
 
 
 # Load the KV file
 from kivy.lang import Builder
 
 kv_file = resource_path(os.path.join('pages', 'mes_clients.kv'))
-print(f"Chemin du fichier KV : {kv_file}")  # Optionnel, pour débogage
 Builder.load_file(kv_file)
\ No newline at end of file
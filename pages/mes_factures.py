@@ -2,15 +2,17 @@ from kivy.uix.screenmanager import Screen
 from kivy.properties import StringProperty, BooleanProperty, NumericProperty, ListProperty, ObjectProperty
 from kivy.lang import Builder
 from kivy.uix.boxlayout import BoxLayout
-from kivy.uix.spinner import Spinner
-from kivy.uix.button import Button
-from kivy.uix.label import Label
+from kivy.uix.recycleview.views import RecycleDataViewBehavior
 from kivy.utils import get_color_from_hex
 from kivy.clock import Clock
-from datetime import date
-from db.database_utils import get_db_path
+from db.events import notify_facture_changed, subscribe_facture_changed
+from db.executor import submit_read, submit_write
+from db.listings import (fetch_factures_page, ListingColumns, FACTURE_COLUMNS,
+                         FACTURE_SORT_COLUMNS, PAGE_SIZE, NO_LIMIT)
+from db.money import Money
+from pages.invoice_pdf import get_invoice_pdf
+from picocompta.core.invoices import set_invoice_status
 import os
-import sqlite3
 import platform
 from utils import resource_path
 import subprocess
@@ -21,99 +23,33 @@ import webbrowser
 from kivy.lang import Builder
 
 kv_file = resource_path(os.path.join('pages', 'mes_factures.kv'))
-print(f"Chemin du fichier KV : {kv_file}")  # Optionnel, pour débogage
 Builder.load_file(kv_file)
 
-# Define the base directory for the entire project
-BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'generated_pdfs'))
 
-
-class FactureRow(BoxLayout):
+class FactureRow(RecycleDataViewBehavior, BoxLayout):
+    """Recycled row view: its widgets are declared in mes_factures.kv and bound to the dict data."""
+    index = None
+    facture_id = NumericProperty(0)
+    client = StringProperty('')
+    type_activite = StringProperty('')
+    date = StringProperty('')
+    montant_ht = ObjectProperty(Money(0))
+    tva = ObjectProperty(Money(0))
+    montant_total = ObjectProperty(Money(0))
     status = NumericProperty(0)
     all_declared = BooleanProperty(False)
     background_color = ListProperty([1, 0.7, 0.7, 1])  # Default red
+    parent_screen = ObjectProperty(None, allownone=True)
 
-    def __init__(self, facture_data, modify_callback, parent_screen, **kwargs):
-        super().__init__(**kwargs)
-        self.parent_screen = parent_screen
-        self.facture_id = facture_data['id']
-        self.status = facture_data['status']
-        self.all_declared = facture_data['status'] == 1
-        
-        # Update initial background color
-        self._update_background_color()
+    def refresh_view_attrs(self, rv, index, data):
+        """Bind this recycled view to the invoice at `index` in the RecycleView data."""
+        self.index = index
+        self.parent_screen = rv.parent_screen
+        super().refresh_view_attrs(rv, index, data)
+        self.all_declared = self.status == 1
 
-        # Client name
-        self.add_widget(Label(
-            text=facture_data['client'],
-            size_hint_x=0.15
-        ))
-
-        # Activity Type
-        self.add_widget(Label(
-            text=facture_data['type_activite'],
-            size_hint_x=0.15
-        ))
-
-        # Invoice date
-        self.add_widget(Label(
-            text=facture_data['date'],
-            size_hint_x=0.15
-        ))
-
-        # Montant HT
-        self.add_widget(Label(
-            text=f"{facture_data['montant_ht']:.2f} €",
-            size_hint_x=0.15
-        ))
-
-        # TVA
-        self.add_widget(Label(
-            text=f"{facture_data['tva']:.2f} €",
-            size_hint_x=0.1
-        ))
-
-        # Montant Total
-        self.add_widget(Label(
-            text=f"{facture_data['montant_total']:.2f} €",
-            size_hint_x=0.15
-        ))
-
-        # Status as a Spinner
-        self.status_spinner = Spinner(
-            text='PAYÉ' if self.status == 1 else 'À PAYER',
-            values=('PAYÉ', 'À PAYER'),
-            size_hint_x=0.1,
-            size_hint_y=None,
-            height=30
-        )
-        self.status_spinner.bind(text=self.on_status_change)
-        self.add_widget(self.status_spinner)
-
-        # Actions buttons
-        actions = BoxLayout(size_hint_x=0.2, spacing=5)
-        view_btn = Button(
-            text='Voir',
-            size_hint_x=0.1,
-            size_hint_y=None,
-            height=30,  # Set height to match row elements
-            pos_hint={'center_y': 0.5},  # Center vertically
-            on_release=lambda x: self.view_facture_pdf(facture_data['id'], facture_data['client'])
-        )
-        modify_btn = Button(
-            text='Modifier',
-            size_hint_x=0.1,
-            size_hint_y=None,
-            height=30,  # Set height to match row elements
-            pos_hint={'center_y': 0.5},  # Center vertically
-            on_release=lambda x: modify_callback(facture_data['id'])
-        )
-        actions.add_widget(view_btn)
-        actions.add_widget(modify_btn)
-        self.add_widget(actions)
-
-        # Bind the status property to the background color update
-        self.bind(status=self._update_background_color)
+    def on_status(self, instance, value):
+        self._update_background_color()
 
     def _update_background_color(self, *args):
         """Update the background color based on status"""
@@ -124,41 +60,42 @@ class FactureRow(BoxLayout):
 
     def on_status_change(self, spinner, text):
         is_paid = 1 if text == 'PAYÉ' else 0
+        # The spinner text also changes when the view is rebound to another invoice
+        if is_paid == self.status:
+            return
         self.status = is_paid  # This will trigger _update_background_color
         self.all_declared = is_paid == 1
         self.update_status(self.facture_id, is_paid)
 
     def update_status(self, facture_id, is_paid):
-        """Update the status in the database when spinner value changes"""
-        db_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'db', 'picocompta.db')
-        try:
-            conn = sqlite3.connect(db_path)
-            cursor = conn.cursor()
-            date_status_set = date.today().strftime('%Y-%m-%d') if is_paid else None
-            cursor.execute("""
-                UPDATE Factures
-                SET status = ?, date_status_set = ?
-                WHERE id_facture = ?
-            """, (is_paid, date_status_set, facture_id))
-            conn.commit()
-            conn.close()
-            print(f"Updated status for facture ID {facture_id} to {'Paid' if is_paid else 'Unpaid'}")
-            
-            # Force refresh of the parent screen
-            if hasattr(self.parent_screen, 'charger_factures'):
-                Clock.schedule_once(lambda dt: self.parent_screen.charger_factures(), 0.1)
-                
-        except sqlite3.Error as e:
-            print(f"Error updating facture status: {e}")
+        """Save the new status on the database writer thread"""
+        submit_write(set_invoice_status, facture_id, is_paid,
+                     callback=lambda date_status_set: self._status_saved(facture_id, is_paid, date_status_set),
+                     error_callback=lambda error: self._status_failed(facture_id, is_paid, error))
+
+    def _status_saved(self, facture_id, is_paid, date_status_set):
+        # Listeners patch only this invoice (the list data keeps the status after scrolling)
+        notify_facture_changed(facture_id, status=is_paid, date_status_set=date_status_set)
 
+    def _status_failed(self, facture_id, is_paid, error):
+        print(f"Error updating facture status: {error}")
+        if self.facture_id == facture_id:  # The view may be showing another invoice by now
+            self.status = 1 - is_paid
+            self.all_declared = self.status == 1
 
     def view_facture_pdf(self, facture_id, client_name):
-        """Open the PDF for the selected invoice based on ID and client name."""
-        pdf_path = os.path.join(BASE_DIR, f"facture_{facture_id}_{client_name.replace(' ', '_')}.pdf")
-        self.open_pdf(pdf_path)
+        """Open the up-to-date PDF of the selected invoice (pages/pdf_cache.py).
+
+        The cached file is returned as is; the PDF is only rendered again when
+        the invoice, client or profile data changed. The lookup (and render, if
+        needed) runs on the database writer thread since it updates Factures_PDF.
+        """
+        submit_write(get_invoice_pdf, facture_id, callback=self.open_pdf)
 
     def open_pdf(self, pdf_path):
         """Opens a PDF file using the default viewer, based on the OS."""
+        if pdf_path is None:
+            return  # Invoice not found or client VAT number missing (already reported)
         if not os.path.exists(pdf_path):
             print(f"PDF file not found at {pdf_path}")
             return
@@ -178,70 +115,125 @@ class FactureRow(BoxLayout):
 class MesFacturesPage(Screen):
     tri_actuel = 'date'
     ordre_croissant = True
+    chargement = BooleanProperty(False)  # A page is being read on a database thread
+    SCROLL_PRELOAD_THRESHOLD = 0.1  # Load the next page when within 10% of the bottom
+    _next_cursor = None
+    _listing = None
+    _tri_requete = None  # (tri, ordre) of the SQL query the pages come from
+    _ordre_affiche = None  # Listing positions shown, once the list is sorted in memory
+    _lecture_reste = False  # The rows not loaded yet are being read for an in-memory sort
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        subscribe_facture_changed(self.on_facture_changed)
 
     def on_enter(self):
         """Called when entering the page"""
         self.charger_factures()
 
     def charger_factures(self):
-        """Load and display the list of invoices"""
+        """Load the first page of invoices into the RecycleView data model"""
         try:
-            if 'factures_container' not in self.ids:
-                raise AttributeError("factures_container ID not found in MesFacturesPage ids.")
+            if 'factures_list' not in self.ids:
+                raise AttributeError("factures_list ID not found in MesFacturesPage ids.")
 
-            self.ids.factures_container.clear_widgets()
-            
-            db_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'db', 'picocompta.db')
-            conn = sqlite3.connect(db_path)
-            cursor = conn.cursor()
+            self._next_cursor = None
+            self._ordre_affiche = None
+            self._lecture_reste = False
+            self._listing = ListingColumns(FACTURE_COLUMNS, 'facture_id', self._record_from_row)
+            self._tri_requete = (self.tri_actuel, self.ordre_croissant)
+            self.ids.factures_list.data = []
+            self.ids.factures_list.scroll_y = 1
+            self._charger_page(after=None)
             
-            query = '''
-                SELECT 
-                    f.id_facture,
-                    c.nom as client,
-                    f.date_emission as date,
-                    COALESCE(f.montant_htBICs, 0) + COALESCE(f.montant_htBICm, 0) + COALESCE(f.montant_htBNC, 0) as montant_ht,
-                    f.tva,
-                    f.montant_total,
-                    f.status,
-                    f.type_activite
-                FROM Factures f
-                JOIN Clients c ON f.id_client = c.id_client
-                ORDER BY 
-                    CASE WHEN :tri = 'client' THEN c.nom 
-                         WHEN :tri = 'montant_ht' THEN (COALESCE(f.montant_htBICs, 0) + COALESCE(f.montant_htBICm, 0) + COALESCE(f.montant_htBNC, 0))
-                         WHEN :tri = 'montant_total' THEN f.montant_total 
-                         WHEN :tri = 'status' THEN f.status 
-                         WHEN :tri = 'date' THEN f.date_emission
-                    END
-            '''
-            if not self.ordre_croissant:
-                query += ' DESC'
-            
-            cursor.execute(query, {'tri': self.tri_actuel})
-            
-            for row in cursor.fetchall():
-                facture_data = {
-                    'id': row[0],
-                    'client': row[1],
-                    'date': row[2],
-                    'montant_ht': row[3],
-                    'tva': row[4] or 0,
-                    'montant_total': row[5] or 0,
-                    'status': row[6],
-                    'type_activite': row[7]
-                }
-                self.ids.factures_container.add_widget(
-                    FactureRow(facture_data, self.modify_facture, self)
-                )
-
-            conn.close()
-            
-        except sqlite3.Error as e:
-            print(f"Erreur lors du chargement des factures : {e}")
         except AttributeError as ae:
             print(f"Erreur d'attribut : {ae}")
 
+    def charger_page_suivante(self):
+        """Append the next page of invoices, if any"""
+        if self.chargement:
+            return
+        if self._ordre_affiche is not None:
+            # Sorted in memory: the next rows are already in the listing columns
+            data = self.ids.factures_list.data
+            data.extend(self._listing.records(self._ordre_affiche[len(data):len(data) + PAGE_SIZE]))
+        elif self._next_cursor is not None:
+            self._charger_page(after=self._next_cursor)
+
+    def _reste_a_afficher(self):
+        if self._ordre_affiche is not None:
+            return len(self.ids.factures_list.data) < len(self._ordre_affiche)
+        return self._next_cursor is not None
+
+    def _charger_page(self, after):
+        """Read a page on a database thread; its rows are appended in _page_chargee"""
+        tri, ordre = self._tri_requete
+        self.chargement = True
+        listing = self._listing
+        submit_read(fetch_factures_page, tri, ordre, after=after,
+                    callback=lambda result: self._page_chargee(listing, result),
+                    error_callback=lambda error: self._page_en_erreur(listing, error))
+
+    def _page_chargee(self, listing, result):
+        if listing is not self._listing:
+            return  # The list was reloaded while this page was being read
+        self.chargement = False
+        rows, self._next_cursor = result
+        # Only the visible rows get a FactureRow view; the rest is plain dict data
+        self.ids.factures_list.data.extend(listing.records(listing.extend(rows)))
+
+    def _charger_reste(self):
+        """Read every row not loaded yet in one query; they only fill the listing columns"""
+        tri, ordre = self._tri_requete
+        self.chargement = True
+        self._lecture_reste = True
+        listing = self._listing
+        submit_read(fetch_factures_page, tri, ordre, after=self._next_cursor, limit=NO_LIMIT,
+                    callback=lambda result: self._reste_charge(listing, result),
+                    error_callback=lambda error: self._page_en_erreur(listing, error))
+
+    def _reste_charge(self, listing, result):
+        if listing is not self._listing:
+            return
+        self.chargement = False
+        self._lecture_reste = False
+        rows, self._next_cursor = result
+        listing.extend(rows)
+        self._afficher_tri()
+
+    def _page_en_erreur(self, listing, error):
+        if listing is not self._listing:
+            return
+        self.chargement = False
+        self._lecture_reste = False
+        print(f"Erreur lors du chargement des factures : {error}")
+
+    @staticmethod
+    def _record_from_row(row):
+        return {
+            'facture_id': row[0],
+            'client': row[1] or '',
+            'date': row[2] or '',
+            'montant_ht': Money(row[3]),
+            'tva': Money(row[4]),
+            'montant_total': Money(row[5]),
+            'status': row[6] or 0,
+            'type_activite': row[7] or ''
+        }
+
+    def on_factures_scroll(self, scroll_y):
+        """Fetch the next page when the user scrolls near the bottom of the list"""
+        if scroll_y <= self.SCROLL_PRELOAD_THRESHOLD and self._reste_a_afficher():
+            self.charger_page_suivante()
+
+    def on_facture_changed(self, facture_id, **fields):
+        """Patch one invoice of the loaded list in place, without rebuilding the list"""
+        if self._listing is not None:
+            # The RecycleView data dicts are the listing's records: this patches both,
+            # but the visible rows only rebind once the RecycleView is refreshed
+            if self._listing.update(facture_id, **fields) is not None:
+                self.ids.factures_list.refresh_from_data()
+
     def modify_facture(self, facture_id):
         """Navigate to modification page for the selected invoice"""
         modification_screen = self.manager.get_screen('modification_facture')
@@ -249,11 +241,28 @@ class MesFacturesPage(Screen):
         self.manager.current = 'modification_facture'
 
     def trier_par(self, critere):
-        """Change the sorting criteria and reload the list"""
+        """Change the sorting criteria and re-sort the invoices in memory"""
         if critere == self.tri_actuel:
             self.ordre_croissant = not self.ordre_croissant
         else:
             self.tri_actuel = critere
             self.ordre_croissant = True
-        self.charger_factures()
 
+        if self._lecture_reste:
+            return  # _reste_charge sorts with the criteria chosen by then
+        if self._listing is None or self.chargement:
+            # A page being read would land after the rows of the new order
+            self.charger_factures()
+        elif self._next_cursor is not None:
+            # The rest of the list is read once as compact columns; the RecycleView
+            # still receives PAGE_SIZE display dicts at a time
+            self._charger_reste()
+        else:
+            self._afficher_tri()
+
+    def _afficher_tri(self):
+        """Show the first page of the fully loaded list in the current sort order"""
+        self._ordre_affiche = self._listing.permutation(
+            FACTURE_SORT_COLUMNS[self.tri_actuel], self.ordre_croissant)
+        self.ids.factures_list.data = self._listing.records(self._ordre_affiche[:PAGE_SIZE])
+        self.ids.factures_list.scroll_y = 1
@@ -3,6 +3,7 @@ from kivy.lang import Builder
 from kivy.properties import ObjectProperty
 import os
 import sqlite3
+from db.profile import get_profile
 from utils import resource_path
 
 class MesInfosPage(Screen):
@@ -31,50 +32,36 @@ class MesInfosPage(Screen):
 
     def charger_infos(self):
         """Load personal information from the database and pre-fill the fields."""
-        db_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'db', 'picocompta.db')
         try:
-            conn = sqlite3.connect(db_path)
-            cursor = conn.cursor()
-            
-            # Retrieve the latest personal information entry from the database
-            cursor.execute('''
-                SELECT nom, prenom, adresse, CP, pays, email, telephone, nsiret, codeape, 
-                       nss, ntva, rib, iban, bic, activite_principal, echeance_declaration, dernier_numero_facture
-                FROM Info_Personnelle
-                ORDER BY id_personnelle DESC
-                LIMIT 1
-            ''')
-            
-            row = cursor.fetchone()
-            if row:
+            # Latest personal information entry (cached profile)
+            profile = get_profile()
+            if profile:
                 # Update the fields with data from the database
-                self.ids.nom.text = str(row[0] or '')
-                self.ids.prenom.text = str(row[1] or '')
-                self.ids.adresse.text = str(row[2] or '')
-                self.ids.CP.text = str(row[3] or '')
-                self.ids.pays.text = str(row[4] or '')
-                self.ids.email.text = str(row[5] or '')
-                self.ids.telephone.text = str(row[6] or '')
-                self.ids.nsiret.text = str(row[7] or '')
-                self.ids.codeape.text = str(row[8] or '')
-                self.ids.nss.text = str(row[9] or '')
-                self.ids.ntva.text = str(row[10] or '')
-                self.ids.rib.text = str(row[11] or '')
-                self.ids.iban.text = str(row[12] or '')
-                self.ids.bic.text = str(row[13] or '')
-                self.ids.activite_principal.text = str(row[14] or '')
+                self.ids.nom.text = str(profile.nom or '')
+                self.ids.prenom.text = str(profile.prenom or '')
+                self.ids.adresse.text = str(profile.adresse or '')
+                self.ids.CP.text = str(profile.CP or '')
+                self.ids.pays.text = str(profile.pays or '')
+                self.ids.email.text = str(profile.email or '')
+                self.ids.telephone.text = str(profile.telephone or '')
+                self.ids.nsiret.text = str(profile.nsiret or '')
+                self.ids.codeape.text = str(profile.codeape or '')
+                self.ids.nss.text = str(profile.nss or '')
+                self.ids.ntva.text = str(profile.ntva or '')
+                self.ids.rib.text = str(profile.rib or '')
+                self.ids.iban.text = str(profile.iban or '')
+                self.ids.bic.text = str(profile.bic or '')
+                self.ids.activite_principal.text = str(profile.activite_principal or '')
                 
                 # Set echeance_declaration based on the value in the database
-                if row[15] == 1:
+                if profile.echeance_declaration == 1:
                     self.ids.echeance_declaration.text = "1 mois"
-                elif row[15] == 3:
+                elif profile.echeance_declaration == 3:
                     self.ids.echeance_declaration.text = "3 mois"
                 else:
                     self.ids.echeance_declaration.text = "Sélectionner"
 
-                self.ids.dernier_numero_facture.text = str(row[16] or '0')
-            
-            conn.close()
+                self.ids.dernier_numero_facture.text = str(profile.dernier_numero_facture or '0')
             
         except sqlite3.Error as e:
             print(f"Erreur lors de la récupération des informations : {e}")
@@ -111,5 +98,4 @@ class MesInfosPage(Screen):
 from kivy.lang import Builder
 
 kv_file = resource_path(os.path.join('pages', 'mes_infos.kv'))
-print(f"Chemin du fichier KV : {kv_file}")  # Optionnel, pour débogage
 Builder.load_file(kv_file)
\ No newline at end of file
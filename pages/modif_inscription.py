@@ -9,6 +9,8 @@ import os
 import sqlite3
 from kivy.clock import Clock
 import datetime
+from db.database_utils import get_connection
+from db.profile import get_profile, invalidate_profile
 from utils import resource_path
 
 class ModifInscriptionPage(Screen):
@@ -18,47 +20,34 @@ class ModifInscriptionPage(Screen):
 
     def charger_donnees(self):
         """Charge les données existantes depuis la base de données."""
-        db_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'db', 'picocompta.db')
         try:
-            conn = sqlite3.connect(db_path)
-            cursor = conn.cursor()
-            
-            # Récupérer les dernières informations personnelles
-            cursor.execute('''
-                SELECT nom, prenom, adresse, CP, pays, email, telephone, 
-                       nsiret, codeape, nss, ntva, rib, iban, bic,
-                       activite_principal, echeance_declaration, dernier_numero_facture
-                FROM Info_Personnelle
-                ORDER BY id_personnelle DESC
-                LIMIT 1
-            ''')
-            
-            row = cursor.fetchone()
-            if row:
+            # Dernières informations personnelles (profil en cache)
+            profile = get_profile()
+            if profile:
                 # Remplir les champs texte
-                self.ids.nom.text = str(row[0] or '')
-                self.ids.prenom.text = str(row[1] or '')
-                self.ids.adresse.text = str(row[2] or '')
-                self.ids.CP.text = str(row[3] or '')
-                self.ids.pays.text = str(row[4] or '')
-                self.ids.email.text = str(row[5] or '')
-                self.ids.telephone.text = str(row[6] or '')
-                self.ids.nsiret.text = str(row[7] or '')
-                self.ids.codeape.text = str(row[8] or '')
-                self.ids.nss.text = str(row[9] or '')
-                self.ids.ntva.text = str(row[10] or '')
-                self.ids.rib.text = str(row[11] or '')
-                self.ids.iban.text = str(row[12] or '')
-                self.ids.bic.text = str(row[13] or '')
+                self.ids.nom.text = str(profile.nom or '')
+                self.ids.prenom.text = str(profile.prenom or '')
+                self.ids.adresse.text = str(profile.adresse or '')
+                self.ids.CP.text = str(profile.CP or '')
+                self.ids.pays.text = str(profile.pays or '')
+                self.ids.email.text = str(profile.email or '')
+                self.ids.telephone.text = str(profile.telephone or '')
+                self.ids.nsiret.text = str(profile.nsiret or '')
+                self.ids.codeape.text = str(profile.codeape or '')
+                self.ids.nss.text = str(profile.nss or '')
+                self.ids.ntva.text = str(profile.ntva or '')
+                self.ids.rib.text = str(profile.rib or '')
+                self.ids.iban.text = str(profile.iban or '')
+                self.ids.bic.text = str(profile.bic or '')
                 
                 # Remplir les spinners
-                activite = str(row[14] or '')
+                activite = str(profile.activite_principal or '')
                 if activite in ['BIC marchandise', 'BIC service', 'BNC']:
                     self.ids.activite_principal_spinner.text = activite
                 else:
                     self.ids.activite_principal_spinner.text = 'Sélectionner'
 
-                echeance = row[15]
+                echeance = profile.echeance_declaration
                 if echeance == 1:
                     self.ids.echeance_declaration_spinner.text = '1 mois'
                 elif echeance == 3:
@@ -66,9 +55,8 @@ class ModifInscriptionPage(Screen):
                 else:
                     self.ids.echeance_declaration_spinner.text = 'Sélectionner'
 
-                self.ids.dernier_numero_facture.text = str(row[16] or '0')
+                self.ids.dernier_numero_facture.text = str(profile.dernier_numero_facture or '0')
             
-            conn.close()
         except sqlite3.Error as e:
             print(f"Erreur lors du chargement des données : {e}")
             self.show_message(f"Erreur lors du chargement des données : {e}")
@@ -129,9 +117,8 @@ class ModifInscriptionPage(Screen):
             return
 
         # Mise à jour dans la base de données
-        db_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'db', 'picocompta.db')
         try:
-            conn = sqlite3.connect(db_path)
+            conn = get_connection()
             cursor = conn.cursor()
             
             # Récupérer le dernier ID
@@ -159,12 +146,13 @@ class ModifInscriptionPage(Screen):
                 ))
                 
                 conn.commit()
+                invalidate_profile()
                 self.show_message("Informations mises à jour avec succès.", callback=lambda: setattr(self.manager, 'current', 'mes_infos'))
             else:
                 self.show_message("Aucun enregistrement trouvé à mettre à jour.")
             
-            conn.close()
         except sqlite3.Error as e:
+            get_connection().rollback()
             self.show_message(f"Erreur lors de la mise à jour : {e}")
 
     def show_message(self, message, callback=None):
@@ -188,5 +176,4 @@ class ModifInscriptionPage(Screen):
 from kivy.lang import Builder
 
 kv_file = resource_path(os.path.join('pages', 'modif_inscription.kv'))
-print(f"Chemin du fichier KV : {kv_file}")  # Optionnel, pour débogage
 Builder.load_file(kv_file)
\ No newline at end of file
@@ -9,7 +9,10 @@ from kivy.uix.boxlayout import BoxLayout
 from kivy.uix.button import Button
 from kivy.uix.label import Label
 from kivy.clock import Clock
-from .pdf_generator import InvoicePDFGenerator
+from .invoice_pdf import get_invoice_pdf
+from db.database_utils import get_connection
+from db.rates import rates_for
+from db.money import Money, BASIS_POINTS, percent_to_basis_points, basis_points_to_percent
 from utils import resource_path
 
 Builder.load_file(os.path.join(os.path.dirname(__file__), 'modification_facture.kv'))
@@ -18,7 +21,6 @@ Builder.load_file(os.path.join(os.path.dirname(__file__), 'modification_facture.
 from kivy.lang import Builder
 
 kv_file = resource_path(os.path.join('pages', 'modification_facture.kv'))
-print(f"Chemin du fichier KV : {kv_file}")  # Optionnel, pour débogage
 Builder.load_file(kv_file)
 
 class ModificationFacturePage(Screen):
@@ -44,8 +46,7 @@ class ModificationFacturePage(Screen):
 
     def load_facture_data(self, facture_id):
         try:
-            db_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'db', 'picocompta.db')
-            conn = sqlite3.connect(db_path)
+            conn = get_connection()
             cursor = conn.cursor()
 
             cursor.execute("""
@@ -63,9 +64,10 @@ class ModificationFacturePage(Screen):
             if facture_data:
                 self.ids.client_spinner.text = str(facture_data[12])  # nom du client
 
-                montant_htBICs = facture_data[4] if facture_data[4] is not None else 0
-                montant_htBICm = facture_data[5] if facture_data[5] is not None else 0
-                montant_htBNC = facture_data[6] if facture_data[6] is not None else 0
+                # Montants stockés en centimes
+                montant_htBICs = Money(facture_data[4])
+                montant_htBICm = Money(facture_data[5])
+                montant_htBNC = Money(facture_data[6])
                 is_prestation = montant_htBICs > 0
 
                 self.ids.service_type_spinner.text = 'Prestation' if is_prestation else 'Marchandise'
@@ -73,11 +75,11 @@ class ModificationFacturePage(Screen):
                 montant_ht = montant_htBICs + montant_htBICm + montant_htBNC
                 self.ids.prix_ht_input.text = str(montant_ht)
 
-                tva = facture_data[7] if facture_data[7] is not None else 0
+                tva = Money(facture_data[7])
                 if tva > 0:
                     self.ids.tva_spinner.text = 'Avec TVA'
-                    taux_tva = (tva / montant_ht * 100) if montant_ht > 0 else 20.0
-                    self.ids.taux_tva_input.text = str(round(taux_tva, 2))
+                    taux_tva = round(tva.cents * BASIS_POINTS / montant_ht.cents) if montant_ht > 0 else 2000
+                    self.ids.taux_tva_input.text = str(basis_points_to_percent(taux_tva))
                 else:
                     self.ids.tva_spinner.text = 'Sans TVA'
                     self.ids.taux_tva_input.text = '0.0'
@@ -88,20 +90,16 @@ class ModificationFacturePage(Screen):
 
                 self.calculate_tva()
 
-            conn.close()
-
         except sqlite3.Error as e:
             print(f"Erreur lors du chargement des données de la facture : {e}")
 
     def update_client_list(self):
         try:
-            db_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'db', 'picocompta.db')
-            conn = sqlite3.connect(db_path)
+            conn = get_connection()
             cursor = conn.cursor()
             cursor.execute("SELECT nom FROM Clients")
             clients = cursor.fetchall()
             self.ids.client_spinner.values = [client[0] for client in clients] if clients else ['Aucun client']
-            conn.close()
         except sqlite3.Error as e:
             print(f"Erreur de base de données : {e}")
             self.ids.client_spinner.values = ['Erreur base de données']
@@ -113,7 +111,7 @@ class ModificationFacturePage(Screen):
             return False
 
         try:
-            prix_ht = float(self.ids.prix_ht_input.text or 0)
+            prix_ht = Money.from_euros(self.ids.prix_ht_input.text)
             if prix_ht <= 0:
                 self.show_error("Le prix HT doit être supérieur à 0.")
                 return False
@@ -123,8 +121,8 @@ class ModificationFacturePage(Screen):
 
         if self.tva_status == 'Avec TVA':
             try:
-                taux_tva = float(self.ids.taux_tva_input.text)
-                if taux_tva <= 0 or taux_tva > 100:
+                taux_tva = percent_to_basis_points(self.ids.taux_tva_input.text)
+                if taux_tva <= 0 or taux_tva > 10000:
                     self.show_error("Le taux de TVA doit être un nombre entre 0 et 100.")
                     return False
             except ValueError:
@@ -155,9 +153,9 @@ class ModificationFacturePage(Screen):
 
     def calculate_tva(self, *args):
         try:
-            prix_ht = float(self.ids.prix_ht_input.text or 0)
-            taux_tva = float(self.ids.taux_tva_input.text or 0)
-            montant_tva = prix_ht * (taux_tva / 100) if self.tva_active else 0
+            prix_ht = Money.from_euros(self.ids.prix_ht_input.text)
+            taux_tva = percent_to_basis_points(self.ids.taux_tva_input.text)
+            montant_tva = prix_ht.apply_rate(taux_tva) if self.tva_active else Money(0)
             total_ttc = prix_ht + montant_tva
 
             self.ids.tva_label.text = f"TVA: {montant_tva:.2f} €"
@@ -166,12 +164,11 @@ class ModificationFacturePage(Screen):
         except ValueError:
             self.ids.tva_label.text = "TVA: 0.00 €"
             self.ids.total_label.text = "Total TTC: 0.00 €"
-            return 0, 0, 0
+            return Money(0), Money(0), Money(0)
 
     def update_facture_in_db(self, prix_ht, montant_tva, total_ttc):
         try:
-            db_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'db', 'picocompta.db')
-            conn = sqlite3.connect(db_path)
+            conn = get_connection()
             cursor = conn.cursor()
 
             cursor.execute("SELECT id_client FROM Clients WHERE nom = ?", (self.ids.client_spinner.text,))
@@ -182,24 +179,30 @@ class ModificationFacturePage(Screen):
                 return None
 
             id_client = client_data[0]
-            montant_htBICs = prix_ht if self.is_prestation else 0
-            montant_htBICm = prix_ht if not self.is_prestation else 0
-            montant_htBNC = prix_ht if not self.is_prestation else 0
+            montant_htBICs = prix_ht if self.is_prestation else Money(0)
+            montant_htBICm = prix_ht if not self.is_prestation else Money(0)
+            montant_htBNC = prix_ht if not self.is_prestation else Money(0)
+
+            # The invoice is re-dated: its URSSAF rates follow the new date
+            date_emission = date.today()
+            rates = rates_for(date_emission, conn)
 
             cursor.execute("""
                 UPDATE Factures SET
                     id_client = ?, date_emission = ?,
                     montant_htBICs = ?, montant_htBICm = ?, montant_htBNC = ?, tva = ?,
                     montant_totalBICs = ?, montant_totalBICm = ?, montant_totalBNC = ?,
-                    montant_total = ?, mission = ?
+                    montant_total = ?, mission = ?,
+                    taux_BICs = ?, taux_BICm = ?, taux_BNC = ?
                 WHERE id_facture = ?
             """, (
-                id_client, date.today(),
-                montant_htBICs, montant_htBICm, montant_htBNC, montant_tva,
-                montant_htBICs + montant_tva if self.is_prestation else 0,
-                montant_htBICm + montant_tva if not self.is_prestation else 0,
-                montant_htBNC + montant_tva if not self.is_prestation else 0,
-                total_ttc, self.ids.mission_input.text,
+                id_client, date_emission,
+                montant_htBICs.cents, montant_htBICm.cents, montant_htBNC.cents, montant_tva.cents,
+                (montant_htBICs + montant_tva).cents if self.is_prestation else 0,
+                (montant_htBICm + montant_tva).cents if not self.is_prestation else 0,
+                (montant_htBNC + montant_tva).cents if not self.is_prestation else 0,
+                total_ttc.cents, self.ids.mission_input.text,
+                rates['taux_BICs'], rates['taux_BICm'], rates['taux_BNC'],
                 self.facture_id
             ))
 
@@ -207,11 +210,9 @@ class ModificationFacturePage(Screen):
             return self.facture_id
 
         except sqlite3.Error as e:
+            get_connection().rollback()
             print(f"Erreur lors de la mise à jour de la facture : {e}")
             return None
-        finally:
-            if conn:
-                conn.close()
 
     def generate_pdf(self, *args):
         prix_ht, montant_tva, total_ttc = self.calculate_tva()
@@ -219,15 +220,8 @@ class ModificationFacturePage(Screen):
         if invoice_number is None:
             return
 
-        client_name = self.ids.client_spinner.text
-        directory = os.path.abspath(os.path.join(os.path.dirname(__file__), '../generated_pdfs'))
-        os.makedirs(directory, exist_ok=True)
-        output_path = os.path.join(directory, f"facture_{invoice_number}_{client_name.replace(' ', '_')}.pdf")
-
-        pdf_generator = InvoicePDFGenerator()
-        pdf_generator.generate_invoice(invoice_number, output_path)
-
-        self.pdf_file = output_path
+        # Rendered into the PDF cache, indexed by invoice id (pages/pdf_cache.py)
+        self.pdf_file = get_invoice_pdf(invoice_number) or ''
         self.show_confirm_popup(prix_ht, montant_tva, total_ttc)
 
     def show_confirm_popup(self, prix_ht, montant_tva, total_ttc):
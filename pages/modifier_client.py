@@ -5,6 +5,7 @@ from kivy.uix.boxlayout import BoxLayout
 from kivy.uix.popup import Popup
 from kivy.uix.label import Label
 import os
+from db.database_utils import get_connection
 from utils import resource_path
 import sqlite3
 
@@ -24,9 +25,8 @@ class ModifierClientPage(Screen):
         """Charge les données du client depuis la base de données"""
         self.client_id = client_id  # Stocke l'ID du client
         
-        db_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'db', 'picocompta.db')
         try:
-            conn = sqlite3.connect(db_path)
+            conn = get_connection()
             cursor = conn.cursor()
             cursor.execute("""
                 SELECT nom, adresse, CP, pays, email, ntva, nsiret
@@ -44,8 +44,6 @@ class ModifierClientPage(Screen):
                 self.ids.ntva.text = client_data[5] or ""
                 self.ids.nsiret.text = client_data[6] or ""
 
-            conn.close()
-
         except sqlite3.Error as e:
             print(f"Erreur lors du chargement des données du client : {e}")
             self.show_message(f"Erreur lors du chargement des données : {e}")
@@ -103,10 +101,8 @@ class ModifierClientPage(Screen):
             self.show_message(f"Les champs suivants sont obligatoires :\n{', '.join(missing_fields)}")
             return
 
-        db_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'db', 'picocompta.db')
-        
         try:
-            conn = sqlite3.connect(db_path)
+            conn = get_connection()
             cursor = conn.cursor()
             
             client_data['id'] = self.client_id
@@ -123,7 +119,6 @@ class ModifierClientPage(Screen):
             ''', client_data)
 
             conn.commit()
-            conn.close()
 
             def on_popup_dismiss():
                 self.manager.current = 'mes_clients'
@@ -134,6 +129,7 @@ class ModifierClientPage(Screen):
             )
             
         except sqlite3.Error as e:
+            get_connection().rollback()
             error_msg = f"Erreur lors de la modification : {e}"
             print(error_msg)
             self.show_message(error_msg)
@@ -148,5 +144,4 @@ class ModifierClientPage(Screen):
 from kivy.lang import Builder
 
 kv_file = resource_path(os.path.join('pages', 'modifier_client.kv'))
-print(f"Chemin du fichier KV : {kv_file}")  # Optionnel, pour débogage
 Builder.load_file(kv_file)
\ No newline at end of file
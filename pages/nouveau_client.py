@@ -6,6 +6,7 @@ from kivy.uix.popup import Popup
 from kivy.uix.label import Label
 import os
 import sqlite3
+from db.database_utils import get_connection
 from utils import resource_path
 
 class NouveauClientPage(Screen):
@@ -89,12 +90,9 @@ class NouveauClientPage(Screen):
             self.show_message(f"Les champs suivants sont obligatoires :\n{', '.join(missing_fields)}")
             return
 
-        # Chemin de la base de données
-        db_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'db', 'picocompta.db')
-        
         try:
             # Connexion à la base de données
-            conn = sqlite3.connect(db_path)
+            conn = get_connection()
             cursor = conn.cursor()
             
             if self.client_id:  # Modification d'un client existant
@@ -124,9 +122,6 @@ class NouveauClientPage(Screen):
             # Récupérer l'ID du client si c'est une création
             if not self.client_id:
                 self.client_id = cursor.lastrowid
-            
-            # Fermer la connexion
-            conn.close()
 
             print(f"Client {'modifié' if self.client_id else 'créé'} avec l'ID : {self.client_id}")
 
@@ -140,6 +135,7 @@ class NouveauClientPage(Screen):
             )
             
         except sqlite3.Error as e:
+            get_connection().rollback()
             error_msg = f"Erreur lors de l'opération : {e}"
             print(error_msg)
             self.show_message(error_msg)
@@ -149,5 +145,4 @@ class NouveauClientPage(Screen):
 from kivy.lang import Builder
 
 kv_file = resource_path(os.path.join('pages', 'nouveau_client.kv'))
-print(f"Chemin du fichier KV : {kv_file}")  # Optionnel, pour débogage
 Builder.load_file(kv_file)
\ No newline at end of file
@@ -1,6 +1,5 @@
 from kivy.uix.screenmanager import Screen
 from kivy.properties import StringProperty, BooleanProperty, ObjectProperty, NumericProperty
-from datetime import date
 import sqlite3
 import os
 from kivy.lang import Builder
@@ -9,8 +8,12 @@ from kivy.uix.boxlayout import BoxLayout
 from kivy.uix.button import Button
 from kivy.uix.label import Label
 from kivy.clock import Clock
-from .pdf_generator import InvoicePDFGenerator
+from .invoice_pdf import get_invoice_pdf
 from datetime import datetime
+from db.database_utils import get_connection
+from db.profile import get_profile, invalidate_profile
+from db.money import Money, percent_to_basis_points, basis_points_to_percent
+from picocompta.core.invoices import ACTIVITY_TYPES, invoice_amounts, create_invoice
 from utils import resource_path
 
 Builder.load_file(os.path.join(os.path.dirname(__file__), 'nouvelle_facture.kv'))
@@ -19,7 +22,6 @@ Builder.load_file(os.path.join(os.path.dirname(__file__), 'nouvelle_facture.kv')
 from kivy.lang import Builder
 
 kv_file = resource_path(os.path.join('pages', 'nouvelle_facture.kv'))
-print(f"Chemin du fichier KV : {kv_file}")  # Optionnel, pour débogage
 Builder.load_file(kv_file)
 
 class NouvelleFacturePage(Screen):
@@ -64,35 +66,30 @@ class NouvelleFacturePage(Screen):
     def load_initial_settings(self):
         """Charge uniquement le type d'activité et les paramètres TVA."""
         try:
-            db_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'db', 'picocompta.db')
-            conn = sqlite3.connect(db_path)
-            cursor = conn.cursor()
-
-            cursor.execute("""
-                SELECT activite_principal, status_tva, dernier_numero_facture, ntva 
-                FROM Info_Personnelle 
-                WHERE id_personnelle = (SELECT MAX(id_personnelle) FROM Info_Personnelle)
-            """)
-            result = cursor.fetchone()
+            profile = get_profile()
 
-            if result:
-                activite_principal, status_tva, dernier_numero_facture, ntva = result
-                print(f"Valeurs récupérées de la DB : {result}")  # Debug
+            if profile:
+                activite_principal = profile.activite_principal
+                status_tva = profile.status_tva
+                dernier_numero_facture = profile.dernier_numero_facture
+                ntva = profile.ntva
                 
                 # Gestion du numéro TVA
                 if ntva is None or ntva == "Numéro TVA":
-                    cursor.execute("""
+                    conn = get_connection()
+                    conn.execute("""
                         UPDATE Info_Personnelle 
                         SET ntva = ?
                         WHERE id_personnelle = (SELECT MAX(id_personnelle) FROM Info_Personnelle)
                     """, ("en cours d'acquisition",))
                     conn.commit()
+                    invalidate_profile()
                     self.company_vat = "en cours d'acquisition"
                 else:
                     self.company_vat = ntva
 
                 # Configuration du type d'activité
-                valid_activities = ['BIC marchandise', 'BIC service', 'BNC']
+                valid_activities = list(ACTIVITY_TYPES)
                 self.ids.service_type_spinner.values = valid_activities
                 
                 # Définir la valeur par défaut depuis activite_principal
@@ -124,11 +121,9 @@ class NouvelleFacturePage(Screen):
 
                 self.dernier_numero_facture = dernier_numero_facture
 
-            conn.close()
-
         except sqlite3.Error as e:
             print(f"Erreur lors du chargement des paramètres initiaux : {e}")
-            self.ids.service_type_spinner.values = ['BIC marchandise', 'BIC service', 'BNC']
+            self.ids.service_type_spinner.values = list(ACTIVITY_TYPES)
             self.ids.service_type_spinner.text = 'BIC service'
             self.ids.tva_spinner.text = 'Sans TVA'
             self.tva_status = 0
@@ -139,8 +134,7 @@ class NouvelleFacturePage(Screen):
 
     def update_client_list(self):
         try:
-            db_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'db', 'picocompta.db')
-            conn = sqlite3.connect(db_path)
+            conn = get_connection()
             cursor = conn.cursor()
             cursor.execute("SELECT nom FROM Clients ORDER BY nom")
             clients = cursor.fetchall()
@@ -148,8 +142,6 @@ class NouvelleFacturePage(Screen):
             client_list = [client[0] for client in clients] if clients else ['Aucun client']
             self.ids.client_spinner.values = ['Sélectionner un client'] + client_list
 
-            conn.close()
-
         except sqlite3.Error as e:
             print(f"Erreur de base de données lors de la mise à jour de la liste des clients : {e}")
             self.ids.client_spinner.values = ['Erreur base de données']
@@ -190,7 +182,7 @@ class NouvelleFacturePage(Screen):
             return False
 
         try:
-            prix_ht = float(self.ids.prix_ht_input.text or 0)
+            prix_ht = Money.from_euros(self.ids.prix_ht_input.text)
             if prix_ht <= 0:
                 self.show_error("Le prix HT doit être supérieur à 0.")
                 return False
@@ -200,8 +192,8 @@ class NouvelleFacturePage(Screen):
 
         if self.tva_active:
             try:
-                taux_tva = float(self.ids.taux_tva_input.text)
-                if taux_tva <= 0 or taux_tva > 100:
+                taux_tva = percent_to_basis_points(self.ids.taux_tva_input.text)
+                if taux_tva <= 0 or taux_tva > 10000:
                     self.show_error("Le taux de TVA doit être un nombre entre 0 et 100.")
                     return False
             except ValueError:
@@ -241,21 +233,17 @@ class NouvelleFacturePage(Screen):
         popup.open()
 
     def calculate_tva(self, *args):
-        """Calculate TVA and update the display."""
+        """Calculate TVA and update the display (amounts as Money, rounded to the cent)."""
         try:
-            prix_ht = float(self.ids.prix_ht_input.text or 0)
-            taux_tva = float(self.ids.taux_tva_input.text or 0)
+            prix_ht = Money.from_euros(self.ids.prix_ht_input.text)
+            taux_tva = percent_to_basis_points(self.ids.taux_tva_input.text)
 
-            if self.tva_status == 1:
-                montant_tva = prix_ht * (taux_tva / 100)
-            else:
-                montant_tva = 0
+            if self.tva_status != 1:
                 taux_tva = 0
-
-            total_ttc = prix_ht + montant_tva
+            prix_ht, montant_tva, total_ttc = invoice_amounts(prix_ht, taux_tva, self.tva_status)
 
             # Mise à jour des labels avec les nouveaux montants
-            self.ids.tva_label.text = f"TVA ({taux_tva}%): {montant_tva:.2f} €"
+            self.ids.tva_label.text = f"TVA ({basis_points_to_percent(taux_tva)}%): {montant_tva:.2f} €"
             self.ids.total_label.text = f"Total TTC: {total_ttc:.2f} €"
             
             return prix_ht, montant_tva, total_ttc
@@ -263,7 +251,7 @@ class NouvelleFacturePage(Screen):
         except ValueError:
             self.ids.tva_label.text = "TVA (0%): 0.00 €"
             self.ids.total_label.text = "Total TTC: 0.00 €"
-            return 0, 0, 0
+            return Money(0), Money(0), Money(0)
         
     def generate_pdf(self, *args):
         """Generate the PDF only if the form and VAT numbers are valid."""
@@ -279,30 +267,21 @@ class NouvelleFacturePage(Screen):
         if invoice_number is None:
             return
 
-        client_name = self.ids.client_spinner.text
-        directory = os.path.abspath(os.path.join(os.path.dirname(__file__), '../generated_pdfs'))
-        os.makedirs(directory, exist_ok=True)
-        output_path = os.path.join(directory, f"facture_{invoice_number}_{client_name.replace(' ', '_')}.pdf")
-
-        pdf_generator = InvoicePDFGenerator()
-        pdf_generator.generate_invoice(invoice_number, output_path)
-
-        self.pdf_file = output_path
+        # Rendered into the PDF cache, indexed by invoice id (pages/pdf_cache.py)
+        self.pdf_file = get_invoice_pdf(invoice_number) or ''
         self.show_confirm_popup(prix_ht, montant_tva, total_ttc)
 
     def check_client_vat_number(self):
         """Check if the selected client has a VAT number when TVA is active."""
-        db_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'db', 'picocompta.db')
         client_name = self.ids.client_spinner.text
         
         # Vérifier seulement si la TVA est active
         if self.tva_status == 1:
             try:
-                conn = sqlite3.connect(db_path)
+                conn = get_connection()
                 cursor = conn.cursor()
                 cursor.execute("SELECT ntva FROM Clients WHERE nom = ?", (client_name,))
                 result = cursor.fetchone()
-                conn.close()
 
                 if result is None or result[0] is None or result[0].strip() == '':
                     self.show_error("Pas de Numéro de TVA pour le Client, veuillez le renseigner dans Mes Clients > Modifier")
@@ -375,88 +354,24 @@ class NouvelleFacturePage(Screen):
         self.popup.dismiss()
 
     def save_facture_to_db(self, prix_ht, montant_tva, total_ttc):
+        client_name = self.ids.client_spinner.text
         try:
-            db_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'db', 'picocompta.db')
-            conn = sqlite3.connect(db_path)
-            cursor = conn.cursor()
-
-            client_name = self.ids.client_spinner.text
-            cursor.execute("SELECT id_client FROM Clients WHERE nom = ?", (client_name,))
-            client_data = cursor.fetchone()
-
-            if client_data is None:
-                print(f"Error: Client '{client_name}' not found in the database.")
-                self.show_error("Client non trouvé")
-                return None
-
-            id_client = client_data[0]
-
-            # Retrieve the latest invoice number from Info_Personnelle
-            cursor.execute("SELECT dernier_numero_facture FROM Info_Personnelle ORDER BY id_personnelle DESC LIMIT 1")
-            dernier_numero_facture = cursor.fetchone()[0]
-            numero_facture = dernier_numero_facture + 1  # Increment the invoice number
-
-            # Determine montant_htBICs, montant_htBICm, montant_htBNC based on service type
-            service_type = self.ids.service_type_spinner.text
-
-            if service_type == 'BIC service':  # Prestation
-                montant_htBICs = prix_ht
-                montant_htBICs = prix_ht
-                montant_htBICm = 0
-                montant_htBNC = 0
-            elif service_type == 'BIC marchandise':  # Marchandise
-                montant_htBICs = 0
-                montant_htBICm = prix_ht
-                montant_htBNC = 0
-            elif service_type == 'BNC':  # BNC
-                montant_htBICs = 0
-                montant_htBICm = 0
-                montant_htBNC = prix_ht
-            else:
-                # Default case to handle unexpected inputs
-                montant_htBICs = 0
-                montant_htBICm = 0
-                montant_htBNC = 0
-
-            # Insert the new invoice into the Factures table
-            cursor.execute("""
-                INSERT INTO Factures (
-                    id_client, status, date_emission, 
-                    montant_htBICs, montant_htBICm, montant_htBNC, tva,
-                    montant_totalBICs, montant_totalBICm, montant_totalBNC,
-                    montant_total, mission, taux_tva, type_activite,
-                    tva_status, numero_facture
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                id_client, 0, date.today(),
-                montant_htBICs, montant_htBICm, montant_htBNC, montant_tva,
-                montant_htBICs + montant_tva if self.is_prestation else 0,
-                montant_htBICm + montant_tva if not self.is_prestation else 0,
-                montant_htBNC + montant_tva if not self.is_prestation else 0,
-                total_ttc, self.ids.mission_input.text,
-                float(self.ids.taux_tva_input.text),  # Store taux_tva as a float
-                service_type,
-                self.tva_status,  # Store tva_status as 1 or 0
-                numero_facture
-            ))
-
-            # Update dernier_numero_facture in Info_Personnelle
-            cursor.execute("""
-                UPDATE Info_Personnelle 
-                SET dernier_numero_facture = ? 
-                WHERE id_personnelle = (SELECT MAX(id_personnelle) FROM Info_Personnelle)
-            """, (numero_facture,))
-            conn.commit()
-
-            invoice_number = cursor.lastrowid
-            return invoice_number
+            return create_invoice(
+                client_name, self.ids.service_type_spinner.text,
+                prix_ht, montant_tva, total_ttc, self.ids.mission_input.text,
+                percent_to_basis_points(self.ids.taux_tva_input.text),  # Store taux_tva in basis points
+                self.tva_status
+            )
+
+        except LookupError:
+            print(f"Error: Client '{client_name}' not found in the database.")
+            self.show_error("Client non trouvé")
+            return None
 
         except sqlite3.Error as e:
+            get_connection().rollback()
             print(f"Erreur lors de la sauvegarde de la facture : {e}")
             return None
-        finally:
-            if conn:
-                conn.close()
 
     def return_home(self, *args):
         """Gère la navigation vers la page d'accueil."""
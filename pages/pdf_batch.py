@@ -0,0 +1,177 @@
+#pages/pdf_batch.py
+"""
+Régénération des factures PDF par lots, par exemple après un changement
+d'adresse ou d'IBAN.
+
+Usage : python -m pages.pdf_batch [--du AAAA-MM-JJ] [--au AAAA-MM-JJ]
+                                  [--processus N] [--dossier DOSSIER] [id_facture ...]
+
+Les données de toutes les factures demandées sont lues en une seule requête,
+puis les PDF sont rendus en parallèle par un pool de processus (le rendu
+reportlab est du Python pur : les threads n'apporteraient rien à cause du
+GIL). Chaque processus garde son InvoicePDFGenerator et n'ouvre pas la base.
+Les fichiers sont écrits de façon atomique (fichier temporaire puis
+renommage) ; une erreur sur une facture n'interrompt pas le lot.
+
+Sans --dossier, le lot alimente le cache des PDF (pages/pdf_cache.py) : seules
+les factures dont les données rendues ont changé sont rendues à nouveau.
+"""
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from db.database_utils import get_connection
+from db.profile import get_profile
+from pages.invoice_pdf import GENERATED_PDFS_DIR
+from pages.pdf_cache import (CACHE_DIR, cached_pdf_path, invoice_fingerprint, is_current,
+                             lookup_pdfs, record_pdfs)
+from pages.pdf_generator import (InvoicePDFGenerator, INVOICE_DATA_QUERY, CLIENT_NTVA_MISSING,
+                                 invoice_data_from_row)
+
+def invoice_pdf_path(invoice_id, client_name, directory=GENERATED_PDFS_DIR):
+    """Chemin nommé facture_<id>_<client>.pdf d'une facture, hors cache."""
+    return os.path.join(directory, f"facture_{invoice_id}_{(client_name or '').replace(' ', '_')}.pdf")
+
+def fetch_invoices_data(invoice_ids=None, start_date=None, end_date=None, db_path=None):
+    """
+    Lit en une requête les données PDF des factures demandées, par id_facture.
+
+    Filtre sur la liste `invoice_ids` et/ou les dates d'émission (bornes
+    incluses, AAAA-MM-JJ) ; sans critère, toutes les factures. Lève
+    sqlite3.Error en cas d'échec.
+    """
+    conditions, params = [], []
+    if invoice_ids is not None:
+        conditions.append("Factures.id_facture IN (SELECT value FROM json_each(?))")
+        params.append(json.dumps([int(invoice_id) for invoice_id in invoice_ids]))
+    if start_date:
+        conditions.append("Factures.date_emission >= ?")
+        params.append(str(start_date))
+    if end_date:
+        conditions.append("Factures.date_emission <= ?")
+        params.append(str(end_date))
+    where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    cursor = get_connection(db_path).cursor()
+    cursor.execute(INVOICE_DATA_QUERY + where + " ORDER BY Factures.id_facture", params)
+    profile = get_profile(db_path)
+    return [invoice_data_from_row(row, profile) for row in cursor.fetchall()]
+
+# Générateur propre à chaque processus du pool (styles reportlab créés une fois)
+_worker_generator = None
+
+def _init_worker():
+    global _worker_generator
+    _worker_generator = InvoicePDFGenerator()
+
+def _render(invoice_data, output_path):
+    """Rend une facture (processus du pool, ou processus courant sans pool)."""
+    if _worker_generator is None:
+        _init_worker()
+    if invoice_data['client_ntva'] is None:
+        raise ValueError(CLIENT_NTVA_MISSING)
+    _worker_generator.render_invoice(invoice_data, output_path)
+    return output_path
+
+def regenerate_invoices(invoice_ids=None, start_date=None, end_date=None,
+                        output_dir=None, processes=None, progress=None, db_path=None):
+    """
+    Régénère les PDF des factures sélectionnées (voir fetch_invoices_data).
+
+    Avec `output_dir`, chaque facture est rendue dans ce dossier sous son nom
+    facture_<id>_<client>.pdf. Sans, les PDF vont dans le cache et les
+    factures dont le PDF en cache est à jour ne sont pas rendues.
+
+    `processes` fixe la taille du pool (par défaut un par cœur ; 1 rend dans
+    le processus courant). `progress(done, total, invoice_id, error)` est
+    appelé après chaque facture, avec error=None en cas de succès.
+
+    Retourne (générées, échecs) : listes de (id_facture, chemin) et de
+    (id_facture, message d'erreur). Les id demandés mais absents de la base
+    figurent dans les échecs.
+    """
+    invoices = fetch_invoices_data(invoice_ids, start_date, end_date, db_path)
+    found = {data['invoice_number'] for data in invoices}
+    missing = [int(invoice_id) for invoice_id in invoice_ids or () if int(invoice_id) not in found]
+    total = len(invoices) + len(missing)
+    generated, failed = [], []
+
+    up_to_date, fingerprints, previous = [], {}, {}
+    if output_dir is None:
+        output_dir = CACHE_DIR
+        previous = lookup_pdfs(found, get_connection(db_path))
+        jobs = []
+        for data in invoices:
+            invoice_id = data['invoice_number']
+            fingerprints[invoice_id] = invoice_fingerprint(data)
+            if is_current(previous.get(invoice_id), fingerprints[invoice_id]):
+                up_to_date.append((invoice_id, previous[invoice_id][1]))
+            else:
+                jobs.append((invoice_id, data, cached_pdf_path(fingerprints[invoice_id], output_dir)))
+    else:
+        jobs = [(data['invoice_number'], data, invoice_pdf_path(data['invoice_number'], data['client_name'], output_dir))
+                for data in invoices]
+    os.makedirs(output_dir, exist_ok=True)
+
+    def record(invoice_id, path, error):
+        if error is None:
+            generated.append((invoice_id, path))
+        else:
+            failed.append((invoice_id, str(error) or repr(error)))
+        if progress is not None:
+            progress(len(generated) + len(failed), total, invoice_id, error)
+
+    for invoice_id in missing:
+        record(invoice_id, None, LookupError("Facture introuvable."))
+    for invoice_id, path in up_to_date:
+        record(invoice_id, path, None)
+
+    processes = processes or os.cpu_count() or 1
+    if processes == 1 or len(jobs) <= 1:
+        for invoice_id, data, path in jobs:
+            try:
+                record(invoice_id, _render(data, path), None)
+            except Exception as e:
+                record(invoice_id, None, e)
+    else:
+        with ProcessPoolExecutor(max_workers=min(processes, len(jobs)), initializer=_init_worker) as pool:
+            futures = {pool.submit(_render, data, path): invoice_id for invoice_id, data, path in jobs}
+            for future in as_completed(futures):
+                try:
+                    record(futures[future], future.result(), None)
+                except Exception as e:
+                    record(futures[future], None, e)
+
+    if fingerprints:
+        # Index des PDF rendus par ce lot (les PDF à jour y sont déjà)
+        rendered_ids = {invoice_id for invoice_id, _, _ in jobs}
+        record_pdfs([(invoice_id, fingerprints[invoice_id], path) for invoice_id, path in generated
+                     if invoice_id in rendered_ids], previous, get_connection(db_path))
+
+    generated.sort()
+    failed.sort(key=lambda item: item[0])
+    return generated, failed
+
+def _print_progress(done, total, invoice_id, error):
+    status = "OK" if error is None else f"échec : {error}"
+    print(f"[{done}/{total}] facture {invoice_id} : {status}")
+
+def main(argv):
+    parser = argparse.ArgumentParser(prog='python -m pages.pdf_batch',
+                                     description="Régénère les factures PDF.")
+    parser.add_argument('ids', nargs='*', type=int, help="id_facture des factures à régénérer")
+    parser.add_argument('--du', dest='start_date', help="date d'émission minimale (AAAA-MM-JJ)")
+    parser.add_argument('--au', dest='end_date', help="date d'émission maximale (AAAA-MM-JJ)")
+    parser.add_argument('--processus', type=int, default=None, help="taille du pool (défaut : nombre de cœurs)")
+    parser.add_argument('--dossier', default=None, help="dossier de sortie (défaut : cache des PDF)")
+    args = parser.parse_args(argv[1:])
+
+    generated, failed = regenerate_invoices(args.ids or None, args.start_date, args.end_date,
+                                            args.dossier, args.processus, _print_progress)
+    print(f"{len(generated)} facture(s) générée(s), {len(failed)} échec(s).")
+    if failed:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main(sys.argv)
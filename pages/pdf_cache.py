@@ -0,0 +1,108 @@
+#pages/pdf_cache.py
+"""
+Cache des factures PDF adressé par contenu.
+
+Chaque PDF est rangé sous generated_pdfs/cache/<empreinte>.pdf, l'empreinte
+étant le SHA-256 de tout ce qui est rendu (champs de la facture, du client et
+du profil) et de TEMPLATE_VERSION. La table Factures_PDF donne le PDF courant
+de chaque facture : afficher une facture relit sa seule ligne, recalcule
+l'empreinte et ne rend à nouveau le PDF que si elle a changé ou si le fichier
+a disparu. Le nom du client n'intervient plus dans le chemin.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+from datetime import datetime
+from db.database_utils import get_connection
+from db.money import Money
+from pages.invoice_pdf import GENERATED_PDFS_DIR
+from pages.pdf_generator import InvoicePDFGenerator, CLIENT_NTVA_MISSING, TEMPLATE_VERSION
+
+CACHE_DIR = os.path.join(GENERATED_PDFS_DIR, 'cache')
+
+def _json_value(value):
+    if isinstance(value, Money):
+        return value.cents
+    return str(value)  # Decimal (taux de TVA)
+
+def invoice_fingerprint(invoice_data):
+    """Empreinte SHA-256 des données rendues d'une facture et de la version du gabarit."""
+    payload = json.dumps({'template': TEMPLATE_VERSION, 'invoice': invoice_data},
+                         sort_keys=True, ensure_ascii=False, default=_json_value)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def cached_pdf_path(fingerprint, cache_dir=CACHE_DIR):
+    return os.path.join(cache_dir, f"{fingerprint}.pdf")
+
+def lookup_pdfs(invoice_ids, conn=None):
+    """Retourne {id_facture: (empreinte, chemin)} des PDF indexés parmi `invoice_ids`."""
+    cursor = (conn or get_connection()).cursor()
+    cursor.execute("""
+        SELECT id_facture, empreinte, chemin FROM Factures_PDF
+        WHERE id_facture IN (SELECT value FROM json_each(?))
+    """, (json.dumps([int(invoice_id) for invoice_id in invoice_ids]),))
+    return {invoice_id: (fingerprint, path) for invoice_id, fingerprint, path in cursor.fetchall()}
+
+def is_current(entry, fingerprint):
+    """Vrai si l'entrée d'index (empreinte, chemin) correspond à `fingerprint` et existe."""
+    return entry is not None and entry[0] == fingerprint and os.path.exists(entry[1])
+
+def record_pdfs(entries, previous=None, conn=None):
+    """
+    Enregistre les PDF courants [(id_facture, empreinte, chemin)] puis supprime
+    les fichiers qu'ils remplacent (`previous` : résultat de lookup_pdfs).
+    """
+    conn = conn or get_connection()
+    generated_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    try:
+        conn.executemany("""
+            INSERT INTO Factures_PDF (id_facture, empreinte, chemin, date_generation)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT (id_facture) DO UPDATE SET
+                empreinte = excluded.empreinte,
+                chemin = excluded.chemin,
+                date_generation = excluded.date_generation
+        """, [(invoice_id, fingerprint, path, generated_at) for invoice_id, fingerprint, path in entries])
+        conn.commit()
+    except sqlite3.Error as e:
+        conn.rollback()
+        print(f"Erreur lors de l'enregistrement des PDF en cache : {e}")
+        return
+
+    # Chaque empreinte contient l'id de la facture : l'ancien fichier n'est partagé avec aucune autre
+    for invoice_id, _, path in entries:
+        old_path = (previous or {}).get(invoice_id, (None, None))[1]
+        if old_path and old_path != path and os.path.exists(old_path):
+            os.remove(old_path)
+
+def get_invoice_pdf(invoice_id, generator=None):
+    """
+    Retourne le chemin du PDF à jour de la facture ; None si elle est
+    introuvable ou si le numéro de TVA du client manque.
+    """
+    generator = generator or InvoicePDFGenerator()
+    invoice_data = generator.fetch_invoice_data(invoice_id)
+    if not invoice_data:
+        print(f"Facture avec ID {invoice_id} introuvable.")
+        return None
+    if invoice_data['client_ntva'] is None:
+        generator.show_alert(CLIENT_NTVA_MISSING)
+        return None
+
+    fingerprint = invoice_fingerprint(invoice_data)
+    conn = get_connection(generator.db_path)
+    try:
+        previous = lookup_pdfs([invoice_id], conn)
+    except sqlite3.Error as e:
+        print(f"Erreur lors de la lecture de l'index des PDF : {e}")
+        previous = {}
+    if is_current(previous.get(invoice_id), fingerprint):
+        return previous[invoice_id][1]
+
+    path = cached_pdf_path(fingerprint)
+    if not os.path.exists(path):
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        generator.render_invoice(invoice_data, path)
+    record_pdfs([(invoice_id, fingerprint, path)], previous, conn)
+    return path
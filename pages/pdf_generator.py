@@ -3,65 +3,235 @@ from reportlab.lib import colors
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.enums import TA_RIGHT, TA_CENTER
-from db.database_utils import get_db_path
+from db.database_utils import get_db_path, get_connection
+from db.money import Money, basis_points_to_percent
+from db.profile import Profile, get_profile
+from copy import copy
 from datetime import datetime
+from functools import lru_cache
+from types import MappingProxyType
+import io
+import os
 import sqlite3
+import tempfile
 from utils import resource_path
 
+# À incrémenter à chaque changement de mise en page : invalide les PDF en cache
+TEMPLATE_VERSION = 1
+
+CLIENT_NTVA_MISSING = ("Vous devez renseigner le champ Numéro de TVA pour ce client, "
+                       "rendez-vous dans Mes Clients > Modifier > Numéro de TVA.")
+
+# Données d'une facture et de son client ; les coordonnées de l'entreprise
+# viennent du profil (db/profile.py)
+INVOICE_DATA_QUERY = '''
+    SELECT 
+        Factures.id_facture, Factures.date_emission, Factures.date_echeance, 
+        Factures.montant_htBICs, Factures.montant_htBICm, Factures.montant_htBNC, 
+        Factures.tva, Factures.montant_total, Clients.nom, Clients.adresse, 
+        Clients.pays, Clients.CP, Clients.ntva, Clients.nsiret, 
+        Factures.mission, Factures.tva_status, Factures.taux_tva, Factures.numero_facture
+    FROM 
+        Factures 
+    JOIN 
+        Clients ON Factures.id_client = Clients.id_client
+'''
+
+def invoice_data_from_row(result, profile):
+    """Dictionnaire attendu par les _build_* pour une ligne d'INVOICE_DATA_QUERY."""
+    profile = profile or Profile(id_personnelle=None)
+    # Montants en centimes, taux de TVA en points de base
+    montant_ht = Money(result[3]) + Money(result[4]) + Money(result[5])
+    montant_tva = Money(result[6])
+    return {
+        'invoice_number': result[0],
+        'issue_date': result[1],
+        'due_date': result[2],
+        'amount_ht': montant_ht,
+        'tva': montant_tva,
+        'total_ttc': Money(result[7]),
+        'client_name': result[8],
+        'client_address': result[9],
+        'client_country': result[10],
+        'client_cp': result[11],
+        'client_ntva': result[12],
+        'client_siret': result[13],
+        'company_name': profile.full_name,
+        'company_address': profile.adresse,
+        'company_cp': profile.CP,
+        'company_country': profile.pays,
+        'company_siret': profile.nsiret,
+        'company_ape': profile.codeape,
+        'company_ss': profile.nss,
+        'company_vat': profile.ntva,
+        'telephone': profile.telephone,
+        'company_email': profile.email,
+        'rib': profile.rib,
+        'iban': profile.iban,
+        'bic': profile.bic,
+        'mission': result[14],
+        'tva_status': result[15],
+        'taux_tva': basis_points_to_percent(result[16]),
+        'montant_tva': montant_tva,
+        'numero_facture': result[17]
+    }
+
+def _build_styles():
+    """Feuille de styles reportlab de base, complétée des styles des factures."""
+    styles = getSampleStyleSheet()
+    styles.add(ParagraphStyle(
+        name='RightAlign',
+        parent=styles['Normal'],
+        alignment=TA_RIGHT
+    ))
+    styles.add(ParagraphStyle(
+        name='Center',
+        parent=styles['Normal'],
+        alignment=TA_CENTER
+    ))
+    styles.add(ParagraphStyle(
+        name='InvoiceTitle',
+        parent=styles['Heading1'],
+        alignment=TA_CENTER,
+        spaceAfter=10  # Reduced spacing for closer alignment
+    ))
+    styles.add(ParagraphStyle(
+        name='Bold',
+        parent=styles['Normal'],
+        fontName="Helvetica-Bold"
+    ))
+    styles.add(ParagraphStyle(
+        name='SmallNormal',
+        parent=styles['Normal'],
+        fontSize=10  # Smaller font size specifically for "FACTURER À :"
+    ))
+    return MappingProxyType(dict(styles.byName))
+
+# Styles et gabarit de page partagés par tous les générateurs, construits une
+# fois à l'import du module (chargé paresseusement par pages.invoice_pdf).
+# Lecture seule : les ParagraphStyle ne doivent pas être modifiés.
+STYLES = _build_styles()
+PAGE_TEMPLATE = MappingProxyType({
+    'pagesize': A4,
+    'rightMargin': 20,
+    'leftMargin': 20,
+    'topMargin': 20,
+    'bottomMargin': 20,
+})
+
+# Champs de invoice_data issus du profil : ils déterminent les blocs statiques
+COMPANY_FIELDS = ('company_name', 'company_address', 'company_cp', 'company_country',
+                  'company_email', 'telephone', 'company_siret', 'company_ape', 'company_ss',
+                  'company_vat', 'rib', 'iban', 'bic')
+
+@lru_cache(maxsize=8)
+def _company_blocks(company):
+    """
+    En-tête de l'entreprise, ligne de n° TVA et bloc de paiement, analysés une
+    fois par version du profil (`company` : valeurs de COMPANY_FIELDS).
+    """
+    company = dict(zip(COMPANY_FIELDS, company))
+    header = [
+        Paragraph(company['company_name'], STYLES['Heading1']),
+        Paragraph(f"{company['company_address']}, {company['company_cp']} {company['company_country']}", STYLES['Normal']),
+        Spacer(1, 5),
+        Paragraph(f"{company['company_email']}", STYLES['Normal']),
+        Paragraph(f"{company['telephone']}", STYLES['Normal']),
+        Spacer(1, 5),
+        Paragraph(f"<b>SIRET :</b> {company['company_siret']}", STYLES['Normal']),
+        Paragraph(f"<b>APE :</b> {company['company_ape']}", STYLES['Normal']),
+    ]
+    if company['company_ss'] is not None:
+        header.append(Paragraph(f"<b>N° S.S. :</b> {company['company_ss']}", STYLES['Normal']))
+
+    # Gérer le numéro de TVA avec une variable intermédiaire
+    vat_display = company['company_vat'] if company['company_vat'] else "en cours d'attribution"
+    vat = Paragraph(f"<b>N°TVA :</b> {vat_display}", STYLES['Normal'])
+
+    payment = [Paragraph("<b>Paiement à réception :</b>", STYLES['Bold'])]
+    if company['rib']:
+        payment.append(Paragraph(f"RIB : {company['rib']}", STYLES['Normal']))
+    if company['iban']:
+        payment.append(Paragraph(f"IBAN : {company['iban']}", STYLES['Normal']))
+    if company['bic']:
+        payment.append(Paragraph(f"BIC : {company['bic']}", STYLES['Normal']))
+    return tuple(header), vat, tuple(payment)
+
+def company_blocks(invoice_data):
+    """
+    Blocs statiques de la facture, prêts à être ajoutés à un document.
+
+    Retourne des copies superficielles : le texte analysé est partagé, mais
+    l'état de mise en page (wrap) reste propre à chaque document, ce qui
+    permet de rendre en parallèle depuis plusieurs threads.
+    """
+    header, vat, payment = _company_blocks(tuple(invoice_data.get(name) for name in COMPANY_FIELDS))
+    return [copy(flowable) for flowable in header], copy(vat), [copy(flowable) for flowable in payment]
+
 class InvoicePDFGenerator:
     def __init__(self, db_path=None):
-        self.styles = getSampleStyleSheet()
-        self._setup_custom_styles()
+        self.styles = STYLES
         self.db_path = db_path if db_path else get_db_path()
 
-    def _setup_custom_styles(self):
-        """Set up custom styles for the PDF."""
-        self.styles.add(ParagraphStyle(
-            name='RightAlign',
-            parent=self.styles['Normal'],
-            alignment=TA_RIGHT
-        ))
-        self.styles.add(ParagraphStyle(
-            name='Center',
-            parent=self.styles['Normal'],
-            alignment=TA_CENTER
-        ))
-        self.styles.add(ParagraphStyle(
-            name='InvoiceTitle',
-            parent=self.styles['Heading1'],
-            alignment=TA_CENTER,
-            spaceAfter=10  # Reduced spacing for closer alignment
-        ))
-        self.styles.add(ParagraphStyle(
-            name='Bold',
-            parent=self.styles['Normal'],
-            fontName="Helvetica-Bold"
-        ))
-        self.styles.add(ParagraphStyle(
-            name='SmallNormal',
-            parent=self.styles['Normal'],
-            fontSize=10  # Smaller font size specifically for "FACTURER À :"
-        ))
-
     def generate_invoice(self, invoice_id, output_path):
-        invoice_data = self._fetch_invoice_data(invoice_id)
+        invoice_data = self.fetch_invoice_data(invoice_id)
         if not invoice_data:
             print(f"Facture avec ID {invoice_id} introuvable.")
             return
 
         # Check if ntva is NULL and raise an alert if necessary
         if invoice_data['client_ntva'] is None:
-            self.show_alert("Vous devez renseigner le champ Numéro de TVA pour ce client, rendez-vous dans Mes Clients > Modifier > Numéro de TVA.")
+            self.show_alert(CLIENT_NTVA_MISSING)
             return
 
-        doc = SimpleDocTemplate(
-            output_path,
-            pagesize=A4,
-            rightMargin=20,
-            leftMargin=20,
-            topMargin=20,
-            bottomMargin=20
-        )
+        self.render_invoice(invoice_data, output_path)
+
+    def render_invoice(self, invoice_data, output_path):
+        """
+        Écrit le PDF d'une facture déjà chargée (voir invoice_data_from_row).
+
+        Le document est construit dans un fichier temporaire du même dossier
+        puis renommé : output_path contient toujours un PDF complet.
+        """
+        directory = os.path.dirname(os.path.abspath(output_path))
+        fd, tmp_path = tempfile.mkstemp(prefix='.facture_', suffix='.pdf.tmp', dir=directory)
+        try:
+            with os.fdopen(fd, 'wb') as stream:
+                self._build_document(invoice_data, stream)
+            os.replace(tmp_path, output_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def render_to(self, invoice, stream):
+        """
+        Rend une facture dans un flux binaire ouvert (BytesIO, fichier, réponse
+        HTTP...) et retourne ce flux ; rien n'est écrit sur le disque.
+
+        `invoice` est un id_facture, lu en base, ou des données déjà chargées
+        (invoice_data_from_row, pages.pdf_batch.fetch_invoices_data) : aucune
+        requête n'est alors faite. Lève LookupError si la facture est
+        introuvable et ValueError si le numéro de TVA du client manque.
+        """
+        if isinstance(invoice, dict):
+            invoice_data = invoice
+        else:
+            invoice_data = self.fetch_invoice_data(invoice)
+            if not invoice_data:
+                raise LookupError(f"Facture avec ID {invoice} introuvable.")
+        if invoice_data['client_ntva'] is None:
+            raise ValueError(CLIENT_NTVA_MISSING)
+
+        self._build_document(invoice_data, stream)
+        return stream
+
+    def render_bytes(self, invoice):
+        """Contenu PDF d'une facture (id_facture ou données chargées, voir render_to)."""
+        return self.render_to(invoice, io.BytesIO()).getvalue()
+
+    def _build_document(self, invoice_data, stream):
+        doc = SimpleDocTemplate(stream, **PAGE_TEMPLATE)
 
         story = []
         story.extend(self._build_header(invoice_data))
@@ -72,73 +242,17 @@ class InvoicePDFGenerator:
 
         doc.build(story)
 
-    def _fetch_invoice_data(self, invoice_id):
+    def fetch_invoice_data(self, invoice_id):
+        """Données de la facture pour render_invoice ; None si introuvable."""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = get_connection(self.db_path)
             cursor = conn.cursor()
-
-            cursor.execute('''
-                SELECT 
-                    Factures.id_facture, Factures.date_emission, Factures.date_echeance, 
-                    Factures.montant_htBICs, Factures.montant_htBICm, Factures.montant_htBNC, 
-                    Factures.tva, Factures.montant_total, Clients.nom, Clients.adresse, 
-                    Clients.pays, Clients.CP, Clients.ntva, Clients.nsiret, 
-                    Info_Personnelle.nom, Info_Personnelle.prenom, Info_Personnelle.adresse, 
-                    Info_Personnelle.CP, Info_Personnelle.pays, Info_Personnelle.nsiret, 
-                    Info_Personnelle.codeape, Info_Personnelle.nss, Info_Personnelle.ntva, 
-                    Info_Personnelle.telephone, Info_Personnelle.email,
-                    Info_Personnelle.rib, Info_Personnelle.iban, Info_Personnelle.bic, 
-                    Factures.mission, Factures.tva_status, Factures.taux_tva, Factures.numero_facture
-                FROM 
-                    Factures 
-                JOIN 
-                    Clients ON Factures.id_client = Clients.id_client
-                LEFT JOIN 
-                    Info_Personnelle ON Info_Personnelle.id_personnelle = (SELECT MAX(id_personnelle) FROM Info_Personnelle)
-                WHERE 
-                    Factures.id_facture = ?
-            ''', (invoice_id,))
-
+            cursor.execute(INVOICE_DATA_QUERY + " WHERE Factures.id_facture = ?", (invoice_id,))
             result = cursor.fetchone()
 
             if result:
-                montant_ht = result[3] + result[4] + result[5]
-                taux_tva = result[30]
-                montant_tva = result[6]
-                numero_facture = result[31]
-
-                return {
-                    'invoice_number': result[0],
-                    'issue_date': result[1],
-                    'due_date': result[2],
-                    'amount_ht': montant_ht,
-                    'tva': result[6],
-                    'total_ttc': result[7],
-                    'client_name': result[8],
-                    'client_address': result[9],
-                    'client_country': result[10],
-                    'client_cp': result[11],
-                    'client_ntva': result[12],
-                    'client_siret': result[13],
-                    'company_name': f"{result[14]} {result[15]}",
-                    'company_address': result[16],
-                    'company_cp': result[17],
-                    'company_country': result[18],
-                    'company_siret': result[19],
-                    'company_ape': result[20],
-                    'company_ss': result[21],
-                    'company_vat': result[22],
-                    'telephone': result[23],
-                    'company_email': result[24],
-                    'rib': result[25],
-                    'iban': result[26],
-                    'bic': result[27],
-                    'mission': result[28],
-                    'tva_status': result[29],
-                    'taux_tva': taux_tva,
-                    'montant_tva': montant_tva,
-                    'numero_facture': numero_facture
-                }
+                # Coordonnées de l'entreprise : profil en cache (dernière ligne d'Info_Personnelle)
+                return invoice_data_from_row(result, get_profile(self.db_path))
             return None
 
         except sqlite3.OperationalError as e:
@@ -146,25 +260,13 @@ class InvoicePDFGenerator:
             return None
 
     def _build_header(self, invoice_data):
-        elements = []
-        elements.append(Paragraph(invoice_data['company_name'], self.styles['Heading1']))
-        elements.append(Paragraph(f"{invoice_data['company_address']}, {invoice_data['company_cp']} {invoice_data['company_country']}", self.styles['Normal']))
-        elements.append(Spacer(1, 5))
-        elements.append(Paragraph(f"{invoice_data['company_email']}", self.styles['Normal']))
-        elements.append(Paragraph(f"{invoice_data['telephone']}", self.styles['Normal']))
-        elements.append(Spacer(1, 5))
-        elements.append(Paragraph(f"<b>SIRET :</b> {invoice_data['company_siret']}", self.styles['Normal']))
-        elements.append(Paragraph(f"<b>APE :</b> {invoice_data['company_ape']}", self.styles['Normal']))
-
-        if invoice_data['company_ss'] is not None:
-            elements.append(Paragraph(f"<b>N° S.S. :</b> {invoice_data['company_ss']}", self.styles['Normal']))
+        # Coordonnées de l'entreprise : mises en page une fois par profil
+        header, vat, _ = company_blocks(invoice_data)
+        elements = header
 
         # Ajouter le numéro de TVA de l'entreprise si TVA active
         if invoice_data['tva_status'] == 1:
-            # Gérer le numéro de TVA avec une variable intermédiaire
-            company_vat = invoice_data.get('company_vat', '')
-            vat_display = company_vat if company_vat else "en cours d'attribution"
-            elements.append(Paragraph(f"<b>N°TVA :</b> {vat_display}", self.styles['Normal']))
+            elements.append(vat)
         
         elements.append(Spacer(1, 100))
         elements.append(Paragraph(f"FACTURE N° {invoice_data['numero_facture']}", self.styles['InvoiceTitle']))
@@ -240,15 +342,8 @@ class InvoicePDFGenerator:
         return elements
 
     def _build_payment_info(self, invoice_data):
-        elements = []
-        elements.append(Paragraph("<b>Paiement à réception :</b>", self.styles['Bold']))
-        if invoice_data['rib']:
-            elements.append(Paragraph(f"RIB : {invoice_data['rib']}", self.styles['Normal']))
-        if invoice_data['iban']:
-            elements.append(Paragraph(f"IBAN : {invoice_data['iban']}", self.styles['Normal']))
-        if invoice_data['bic']:
-            elements.append(Paragraph(f"BIC : {invoice_data['bic']}", self.styles['Normal']))
-        return elements
+        _, _, payment = company_blocks(invoice_data)
+        return payment
 
     def show_alert(self, message):
         """Displays an alert dialog with a message."""
@@ -0,0 +1,5 @@
+#picocompta/__init__.py
+"""
+PicoCompta sans interface graphique : services métier (picocompta.core),
+partagés avec les écrans Kivy, et ligne de commande (python -m picocompta).
+"""
@@ -0,0 +1,6 @@
+#picocompta/__main__.py
+import sys
+from picocompta.cli import main
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
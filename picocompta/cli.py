@@ -0,0 +1,233 @@
+#picocompta/cli.py
+"""
+Ligne de commande de PicoCompta, sans Kivy.
+
+Usage : python -m picocompta [--base CHEMIN] COMMANDE ...
+
+  factures   liste les factures (filtres par dates, client et statut)
+  periodes   chiffres URSSAF et TVA de chaque période d'une année
+  declarer   marque une période déclarée (URSSAF ou TVA), ou déclarée à zéro
+  pdf        génère les factures PDF (voir pages/pdf_batch.py)
+  paiements  importe des paiements depuis un CSV (id_facture;date_paiement)
+  importer   importe des clients ou des factures (CSV ; ou JSON Lines)
+
+Les commandes appellent les services de picocompta.core, partagés avec les
+écrans. Chaque commande n'importe que ce qu'elle utilise (reportlab n'est
+chargé que par « pdf ») : une commande démarre en moins de 200 ms.
+"""
+import argparse
+import contextlib
+import csv
+import os
+import sqlite3
+import sys
+from datetime import date
+
+def _open_database():
+    """Vérifie que la base existe et applique les migrations en attente."""
+    from db.database_utils import get_db_path, init_database
+    db_path = get_db_path()
+    if not os.path.exists(db_path):
+        sys.exit(f"Base de données introuvable : {db_path}")
+    # Les messages d'initialisation ne doivent pas se mêler aux résultats
+    with contextlib.redirect_stdout(sys.stderr):
+        if not init_database(db_path):
+            sys.exit("Impossible d'ouvrir la base de données.")
+
+def _print_table(headers, rows):
+    widths = [max([len(header)] + [len(row[index]) for row in rows]) for index, header in enumerate(headers)]
+    for line in [headers] + rows:
+        print("  ".join(value.ljust(width) for value, width in zip(line, widths)).rstrip())
+
+def cmd_factures(args):
+    from db.money import Money
+    from picocompta.core.invoices import list_invoices
+    rows = list_invoices(args.du, args.au, args.client, args.statut, args.tri, not args.desc, args.limite)
+    headers = ["id", "client", "date", "montant_ht", "tva", "montant_total", "statut", "activite"]
+    lines = [[str(facture_id), client or '', date_emission or '', f"{Money(montant_ht):.2f}",
+              f"{Money(tva):.2f}", f"{Money(montant_total):.2f}", "payée" if status else "impayée",
+              type_activite or '']
+             for facture_id, client, date_emission, montant_ht, tva, montant_total, status, type_activite
+             in rows]
+    if args.csv:
+        writer = csv.writer(sys.stdout, delimiter=';')
+        writer.writerow(headers)
+        writer.writerows(lines)
+    else:
+        _print_table(headers, lines)
+        print(f"{len(lines)} facture(s)")
+
+def cmd_periodes(args):
+    from db.profile import get_profile
+    from picocompta.core.declarations import period_summaries
+    if args.echeance is None:
+        profile = get_profile()
+        echeance = profile.echeance_declaration if profile and profile.echeance_declaration else 3
+    else:
+        echeance = 3 if args.echeance == 'trimestrielle' else 1
+
+    urssaf_lines, tva_lines = [], []
+    for period, urssaf, tva in period_summaries(args.annee, echeance):
+        label = [period['name'], period['start_date'], period['end_date']]
+        urssaf_lines.append(label + [str(urssaf['nb_factures']), f"{urssaf['total_ht']:.2f}",
+                                     f"{urssaf['total_charge']:.2f}", "oui" if urssaf['all_declared'] else "non"])
+        tva_lines.append(label + [str(tva['nb_factures']), f"{tva['total_ht']:.2f}",
+                                  f"{tva['total_tva']:.2f}", "oui" if tva['all_declared'] else "non"])
+
+    print(f"URSSAF {args.annee}")
+    _print_table(["periode", "debut", "fin", "factures", "total_ht", "charges", "declaree"], urssaf_lines)
+    print(f"\nTVA {args.annee}")
+    _print_table(["periode", "debut", "fin", "factures", "total_ht", "tva", "declaree"], tva_lines)
+
+def cmd_declarer(args):
+    from picocompta.core.declarations import declare_period, declare_zero_period
+    if args.zero:
+        declare_zero_period(args.type, args.debut, args.fin)
+        print(f"Période {args.debut} - {args.fin} déclarée à zéro ({args.type}).")
+    else:
+        count = declare_period(args.type, args.debut, args.fin)
+        print(f"{count} facture(s) payée(s) marquée(s) déclarée(s) ({args.type}, {args.debut} - {args.fin}).")
+
+def cmd_pdf(args):
+    from pages.pdf_batch import regenerate_invoices
+
+    def progress(done, total, invoice_id, error):
+        status = "OK" if error is None else f"échec : {error}"
+        print(f"[{done}/{total}] facture {invoice_id} : {status}")
+
+    generated, failed = regenerate_invoices(args.ids or None, args.du, args.au, args.dossier,
+                                            args.processus, progress)
+    print(f"{len(generated)} facture(s) générée(s), {len(failed)} échec(s).")
+    if failed:
+        sys.exit(1)
+
+def _read_payments(stream):
+    """Lit les lignes id_facture;date_paiement ; retourne (paiements, erreurs par ligne)."""
+    payments, errors = [], []
+    reader = csv.DictReader(stream, delimiter=';')
+    if not reader.fieldnames or 'id_facture' not in reader.fieldnames:
+        raise ValueError("en-tête attendu : id_facture;date_paiement")
+    for line_number, row in enumerate(reader, start=2):
+        try:
+            facture_id = int(row['id_facture'])
+            paid_on = date.fromisoformat(row['date_paiement']) if row.get('date_paiement') else date.today()
+        except (TypeError, ValueError) as e:
+            errors.append((line_number, str(e)))
+            continue
+        payments.append((line_number, facture_id, paid_on))
+    return payments, errors
+
+def cmd_paiements(args):
+    from picocompta.core.invoices import mark_invoices_paid
+    try:
+        if args.fichier == '-':
+            payments, errors = _read_payments(sys.stdin)
+        else:
+            with open(args.fichier, newline='', encoding='utf-8-sig') as stream:
+                payments, errors = _read_payments(stream)
+    except (OSError, ValueError) as e:
+        sys.exit(f"Lecture de {args.fichier} impossible : {e}")
+
+    missing = set(mark_invoices_paid([(facture_id, paid_on) for _, facture_id, paid_on in payments]))
+    errors += [(line_number, f"facture {facture_id} introuvable")
+               for line_number, facture_id, _ in payments if facture_id in missing]
+    for line_number, message in sorted(errors):
+        print(f"ligne {line_number} : {message}", file=sys.stderr)
+    print(f"{len(payments) - len(missing)} paiement(s) enregistré(s), {len(errors)} ligne(s) en erreur.")
+    if errors:
+        sys.exit(1)
+
+def cmd_importer(args):
+    from picocompta.core import importer
+    fmt = args.format or importer.detect_format(args.fichier)
+    batch_size = args.paquet or importer.BATCH_SIZE
+    errors = 0
+
+    def report(line_number, message):
+        nonlocal errors
+        errors += 1
+        print(f"ligne {line_number} : {message}", file=sys.stderr)
+
+    with contextlib.ExitStack() as stack:
+        if args.fichier == '-':
+            stream = sys.stdin
+        else:
+            try:
+                stream = stack.enter_context(open(args.fichier, newline='', encoding='utf-8-sig'))
+            except OSError as e:
+                sys.exit(f"Lecture de {args.fichier} impossible : {e}")
+        if args.type == 'clients':
+            records = importer.read_records(stream, fmt, report, importer.CLIENT_REQUIRED)
+            imported, _ = importer.import_clients(records, report, batch_size)
+        else:
+            records = importer.read_records(stream, fmt, report, importer.INVOICE_REQUIRED)
+            imported, _ = importer.import_invoices(records, report, args.creer_clients, batch_size)
+    print(f"{imported} {args.type} importé(e)s, {errors} ligne(s) en erreur.")
+    if errors:
+        sys.exit(1)
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m picocompta',
+                                     description="PicoCompta en ligne de commande.")
+    parser.add_argument('--base', help="chemin de la base (défaut : PICOCOMPTA_DB ou db/picocompta.db)")
+    commands = parser.add_subparsers(dest='commande', required=True, metavar='COMMANDE')
+
+    factures = commands.add_parser('factures', help="liste les factures")
+    factures.add_argument('--du', help="date d'émission minimale (AAAA-MM-JJ)")
+    factures.add_argument('--au', help="date d'émission maximale (AAAA-MM-JJ)")
+    factures.add_argument('--client', help="nom exact du client")
+    factures.add_argument('--statut', choices=('payees', 'impayees'))
+    factures.add_argument('--tri', default='date',
+                          choices=('date', 'client', 'montant_ht', 'montant_total', 'status'))
+    factures.add_argument('--desc', action='store_true', help="ordre décroissant")
+    factures.add_argument('--limite', type=int, default=-1, help="nombre maximal de lignes")
+    factures.add_argument('--csv', action='store_true', help="sortie CSV (séparateur ;)")
+    factures.set_defaults(handler=cmd_factures)
+
+    periodes = commands.add_parser('periodes', help="chiffres URSSAF et TVA par période")
+    periodes.add_argument('annee', type=int, nargs='?', default=date.today().year)
+    periodes.add_argument('--echeance', choices=('mensuelle', 'trimestrielle'),
+                          help="défaut : échéance du profil")
+    periodes.set_defaults(handler=cmd_periodes)
+
+    declarer = commands.add_parser('declarer', help="marque une période déclarée")
+    declarer.add_argument('type', type=str.upper, choices=('URSSAF', 'TVA'))
+    declarer.add_argument('debut', type=date.fromisoformat, help="début de la période (AAAA-MM-JJ)")
+    declarer.add_argument('fin', type=date.fromisoformat, help="fin de la période (AAAA-MM-JJ)")
+    declarer.add_argument('--zero', action='store_true', help="déclaration à zéro")
+    declarer.set_defaults(handler=cmd_declarer)
+
+    pdf = commands.add_parser('pdf', help="génère les factures PDF")
+    pdf.add_argument('ids', nargs='*', type=int, help="id_facture des factures")
+    pdf.add_argument('--du', help="date d'émission minimale (AAAA-MM-JJ)")
+    pdf.add_argument('--au', help="date d'émission maximale (AAAA-MM-JJ)")
+    pdf.add_argument('--processus', type=int, default=None, help="taille du pool (défaut : nombre de cœurs)")
+    pdf.add_argument('--dossier', default=None, help="dossier de sortie (défaut : cache des PDF)")
+    pdf.set_defaults(handler=cmd_pdf)
+
+    paiements = commands.add_parser('paiements', help="importe des paiements (CSV id_facture;date_paiement)")
+    paiements.add_argument('fichier', help="fichier CSV, ou - pour l'entrée standard")
+    paiements.set_defaults(handler=cmd_paiements)
+
+    importer = commands.add_parser('importer', help="importe des clients ou des factures (CSV ; ou JSON Lines)")
+    importer.add_argument('type', choices=('clients', 'factures'))
+    importer.add_argument('fichier', help="fichier CSV ou JSONL, ou - pour l'entrée standard")
+    importer.add_argument('--format', choices=('csv', 'jsonl'),
+                          help="défaut : jsonl pour les extensions .jsonl et .ndjson, csv sinon")
+    importer.add_argument('--creer-clients', action='store_true',
+                          help="crée les clients inconnus au lieu de rejeter leurs factures")
+    importer.add_argument('--paquet', type=int,
+                          help="lignes par transaction (défaut : picocompta.core.importer.BATCH_SIZE)")
+    importer.set_defaults(handler=cmd_importer)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.base:
+        # Même mécanisme que les scripts et benchmarks (db.database_utils.get_db_path)
+        os.environ['PICOCOMPTA_DB'] = args.base
+    _open_database()
+    try:
+        args.handler(args)
+    except (sqlite3.Error, ValueError) as e:
+        sys.exit(f"Erreur : {e}")
@@ -0,0 +1,14 @@
+#picocompta/core/__init__.py
+"""
+Services métier de PicoCompta, sans dépendance à Kivy.
+
+  clients       statistiques clients, recherche par nom
+  declarations  périodes URSSAF/TVA, chiffres et déclarations
+  invoices      création, liste et paiement des factures
+  thresholds    plafonds micro-entreprise et seuils de TVA (fonctions pures)
+
+Les écrans (pages/) et la ligne de commande appellent les mêmes fonctions ;
+celles qui lisent ou écrivent la base acceptent une connexion `conn`
+optionnelle (par défaut celle du thread courant, voir
+db.database_utils.get_connection).
+"""
@@ -0,0 +1,65 @@
+#picocompta/core/clients.py
+"""
+Clients : statistiques de la page de démarrage et recherche par nom.
+"""
+from datetime import date
+from db.database_utils import get_connection
+from db.money import Money
+
+BEST_CLIENT_QUERY = """
+    SELECT
+        c.nom,
+        SUM(f.montant_htBICs + f.montant_htBICm + f.montant_htBNC) as total_ht
+    FROM Factures f
+    JOIN Clients c ON f.id_client = c.id_client
+    {where}
+    GROUP BY c.id_client
+    ORDER BY total_ht DESC
+    LIMIT 1
+"""
+
+# Délai moyen entre émission et paiement (date_status_set), factures payées
+WORST_PAYER_QUERY = """
+    SELECT
+        c.nom,
+        AVG(julianday(f.date_status_set) - julianday(f.date_emission)) as avg_days
+    FROM Factures f
+    JOIN Clients c ON f.id_client = c.id_client
+    WHERE f.status = 1
+    AND f.date_status_set IS NOT NULL
+    GROUP BY c.id_client
+    ORDER BY avg_days DESC
+    LIMIT 1
+"""
+
+FIND_CLIENT_QUERY = "SELECT id_client FROM Clients WHERE nom = ?"
+
+def find_client_id(nom, conn=None):
+    """id_client du client nommé `nom`, ou None s'il n'existe pas."""
+    cursor = (conn or get_connection()).cursor()
+    cursor.execute(FIND_CLIENT_QUERY, (nom,))
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+def client_statistics(today=None, conn=None):
+    """
+    Meilleur client du trimestre en cours et de tous les temps (nom, total HT
+    en Money) et client le plus lent à payer (nom, jours en moyenne) ; None
+    pour chaque indicateur sans données. Lève sqlite3.Error en cas d'échec.
+    """
+    today = today or date.today()
+    quarter_start = date(today.year, 3 * ((today.month - 1) // 3) + 1, 1)
+    cursor = (conn or get_connection()).cursor()
+
+    cursor.execute(BEST_CLIENT_QUERY.format(where="WHERE f.date_emission >= ?"), (quarter_start.isoformat(),))
+    best_quarter = cursor.fetchone()
+    cursor.execute(BEST_CLIENT_QUERY.format(where=""))
+    best_all_time = cursor.fetchone()
+    cursor.execute(WORST_PAYER_QUERY)
+    worst_payer = cursor.fetchone()
+
+    return {
+        'best_client_quarter': (best_quarter[0], Money(best_quarter[1])) if best_quarter else None,
+        'best_client_all_time': (best_all_time[0], Money(best_all_time[1])) if best_all_time else None,
+        'worst_payer': (worst_payer[0], int(worst_payer[1])) if worst_payer else None,
+    }
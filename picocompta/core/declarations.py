@@ -0,0 +1,140 @@
+#picocompta/core/declarations.py
+"""
+Périodes de déclaration URSSAF/TVA et marquage des périodes déclarées.
+"""
+import calendar
+from db.aggregations import aggregate_periods, year_month
+from db.database_utils import get_connection
+from db.money import Money
+from db.rollup import charge_expression
+
+DECLARATION_TYPES = ('URSSAF', 'TVA')
+# Colonne de Factures marquée par la déclaration de chaque type
+DECLARATION_COLUMNS = {
+    'URSSAF': 'status_declaration_URSSAF',
+    'TVA': 'status_declaration_TVA',
+}
+QUARTER_NAMES = ["1er Trimestre", "2ème Trimestre", "3ème Trimestre", "4ème Trimestre"]
+MONTH_NAMES = ["Janvier", "Février", "Mars", "Avril", "Mai", "Juin",
+               "Juillet", "Août", "Septembre", "Octobre", "Novembre", "Décembre"]
+ZERO_DECLARATION_COMMENT = 'Déclaration à zéro'
+
+def months_per_period(echeance_declaration):
+    """3 pour une échéance trimestrielle (echeance_declaration = 3), 1 sinon."""
+    return 3 if echeance_declaration == 3 else 1
+
+def declaration_periods(year, echeance_declaration=3):
+    """
+    Périodes de déclaration de l'année, dans l'ordre : trimestres si
+    echeance_declaration vaut 3, mois sinon. Chaque période est un dict
+    {'name', 'start_date', 'end_date'} (dates AAAA-MM-JJ, bornes incluses).
+    """
+    step = months_per_period(echeance_declaration)
+    periods = []
+    for index, first_month in enumerate(range(1, 13, step)):
+        last_month = first_month + step - 1
+        last_day = calendar.monthrange(year, last_month)[1]
+        periods.append({
+            "name": QUARTER_NAMES[index] if step == 3 else MONTH_NAMES[first_month - 1],
+            "start_date": f"{year}-{first_month:02d}-01",
+            "end_date": f"{year}-{last_month:02d}-{last_day:02d}",
+        })
+    return periods
+
+def period_summaries(year, echeance_declaration=3, conn=None):
+    """
+    Chiffres URSSAF et TVA de chaque période de l'année, en une requête.
+
+    Retourne une liste de (période, urssaf_data, tva_data), voir
+    db.aggregations.aggregate_periods.
+    """
+    periods = declaration_periods(year, echeance_declaration)
+    figures = aggregate_periods(periods, months_per_period(echeance_declaration), conn)
+    return [(period, urssaf, tva) for period, (urssaf, tva) in zip(periods, figures)]
+
+def _period_figures(start_date, end_date, conn):
+    start_year, start_month = year_month(str(start_date))
+    end_year, end_month = year_month(str(end_date))
+    period = {'start_date': str(start_date), 'end_date': str(end_date)}
+    months = (end_year - start_year) * 12 + end_month - start_month + 1
+    return aggregate_periods([period], months, conn)[0]
+
+def urssaf_period_data(start_date, end_date, conn=None):
+    """
+    Chiffres URSSAF des factures payées d'une période de mois entiers :
+    nombre, total HT, charges par type d'activité et total, et all_declared.
+
+    Mêmes chiffres que period_summaries (db.aggregations.aggregate_periods,
+    charges arrondies facture par facture). Montants en Money.
+    """
+    return _period_figures(start_date, end_date, conn)[0]
+
+def tva_period_data(start_date, end_date, conn=None):
+    """Chiffres TVA d'une période de mois entiers (nombre, total HT, TVA, all_declared)."""
+    return _period_figures(start_date, end_date, conn)[1]
+
+# Factures payées d'une période, avec leur charge arrondie comme dans le cumul
+PERIOD_INVOICES_QUERY = f"""
+    SELECT c.nom, f.numero_facture, f.date_status_set,
+           f.montant_ht, f.type_activite, {charge_expression('f')} AS charge
+    FROM Factures f
+    JOIN Clients c ON f.id_client = c.id_client
+    WHERE f.date_emission BETWEEN ? AND ?
+      AND f.status = 1
+    ORDER BY f.date_emission
+"""
+
+def urssaf_period_invoices(start_date, end_date, conn=None):
+    """
+    Détail URSSAF d'une période : (client, numéro, date de paiement, montant
+    HT, type d'activité, charge) par facture payée, montants en Money. La
+    somme des charges est le total_charge de urssaf_period_data.
+    """
+    cursor = (conn or get_connection()).cursor()
+    cursor.execute(PERIOD_INVOICES_QUERY, (str(start_date), str(end_date)))
+    return [(nom, numero_facture, date_status_set, Money(montant_ht), type_activite, Money(charge))
+            for nom, numero_facture, date_status_set, montant_ht, type_activite, charge
+            in cursor.fetchall()]
+
+def _check_type(declaration_type):
+    if declaration_type not in DECLARATION_COLUMNS:
+        raise ValueError(f"Type de déclaration inconnu : {declaration_type} (URSSAF ou TVA)")
+
+def declare_period(declaration_type, start_date, end_date, conn=None):
+    """
+    Marque déclarées (URSSAF ou TVA) les factures payées émises dans la période.
+
+    Retourne le nombre de factures marquées. Lève sqlite3.Error en cas
+    d'échec (la transaction est alors annulée).
+    """
+    _check_type(declaration_type)
+    conn = conn or get_connection()
+    try:
+        cursor = conn.execute(f"""
+            UPDATE Factures
+            SET {DECLARATION_COLUMNS[declaration_type]} = 1
+            WHERE date_emission BETWEEN ? AND ? AND status = 1
+        """, (str(start_date), str(end_date)))
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    return cursor.rowcount
+
+def declare_zero_period(declaration_type, start_date, end_date,
+                        comment=ZERO_DECLARATION_COMMENT, conn=None):
+    """
+    Enregistre une déclaration à zéro pour la période. Lève sqlite3.Error en
+    cas d'échec (la transaction est alors annulée).
+    """
+    _check_type(declaration_type)
+    conn = conn or get_connection()
+    try:
+        conn.execute("""
+            INSERT INTO Declarations_Zero (type, date_debut, date_fin, commentaire)
+            VALUES (?, ?, ?, ?)
+        """, (declaration_type, str(start_date), str(end_date), comment))
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
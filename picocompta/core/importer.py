@@ -0,0 +1,229 @@
+#picocompta/core/importer.py
+"""
+Import en masse de clients et de factures : CSV (séparateur ;) ou JSON Lines.
+
+Les lignes sont lues une à une et enregistrées par paquets de BATCH_SIZE,
+une transaction par paquet. Une ligne invalide est signalée (numéro de ligne
+et message) sans interrompre l'import ; une erreur de la base annule le
+paquet en cours, les paquets précédents restant enregistrés.
+
+Les noms de clients sont résolus par un dictionnaire chargé une fois, les
+taux URSSAF lus une fois par date d'émission d'un paquet et les numéros de
+facture d'un paquet réservés en une seule mise à jour du profil. La mémoire
+est donc bornée par un paquet (BATCH_SIZE lignes, environ 2 Ko chacune) plus
+un nom par client en base, et ne croît pas avec la taille du fichier : de
+l'ordre de 2 Mo pour 500 clients (borne vérifiée par benchmarks/bench_import.py).
+"""
+import csv
+import json
+from datetime import date
+from db.database_utils import get_connection
+from db.money import Money, percent_to_basis_points
+from db.profile import invalidate_profile
+from db.rates import rates_for
+from picocompta.core.invoices import (ACTIVITY_TYPES, INSERT_INVOICE, invoice_amounts, invoice_row,
+                                     reserve_invoice_numbers)
+
+FORMATS = ('csv', 'jsonl')
+BATCH_SIZE = 1000
+
+# Champs de chaque type d'import ; les premiers sont obligatoires
+CLIENT_FIELDS = ('nom', 'adresse', 'CP', 'pays', 'email', 'nsiret', 'ntva')
+CLIENT_REQUIRED = ('nom',)
+INVOICE_FIELDS = ('client', 'date_emission', 'type_activite', 'montant_ht',
+                  'taux_tva', 'mission', 'date_paiement')
+INVOICE_REQUIRED = ('client', 'date_emission', 'type_activite', 'montant_ht')
+
+INSERT_CLIENT = f"""
+    INSERT INTO Clients ({', '.join(CLIENT_FIELDS)})
+    VALUES ({', '.join('?' for _ in CLIENT_FIELDS)})
+"""
+
+def detect_format(path):
+    """'jsonl' pour les extensions .jsonl et .ndjson, 'csv' sinon."""
+    return 'jsonl' if path.lower().endswith(('.jsonl', '.ndjson')) else 'csv'
+
+def read_records(stream, fmt, report, required=()):
+    """
+    Produit (numéro de ligne, dict) pour chaque enregistrement de `stream`.
+
+    Les lignes illisibles sont passées à report(numéro, message) et ignorées.
+    Lève ValueError si l'en-tête CSV n'a pas les colonnes `required`.
+    """
+    if fmt == 'csv':
+        reader = csv.DictReader(stream, delimiter=';')
+        missing = [field for field in required if field not in (reader.fieldnames or ())]
+        if missing:
+            raise ValueError(f"colonnes manquantes dans l'en-tête : {', '.join(missing)}")
+        for row in reader:
+            yield reader.line_num, row
+    elif fmt == 'jsonl':
+        for line_number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                report(line_number, f"JSON invalide : {e.msg}")
+                continue
+            if not isinstance(record, dict):
+                report(line_number, "un objet JSON est attendu")
+                continue
+            yield line_number, record
+    else:
+        raise ValueError(f"Format inconnu : {fmt} ({' ou '.join(FORMATS)})")
+
+def _text(record, field):
+    value = record.get(field)
+    return '' if value is None else str(value).strip()
+
+def _client_names(conn):
+    return {nom: id_client for id_client, nom in conn.execute("SELECT id_client, nom FROM Clients")}
+
+def _in_batches(rows, batch_size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def import_clients(records, report, batch_size=BATCH_SIZE, conn=None):
+    """
+    Enregistre les clients de `records` ((numéro de ligne, dict), voir read_records).
+
+    Un nom vide ou déjà présent (en base ou plus haut dans le fichier) est
+    signalé à report(numéro, message). Retourne (importés, rejetés).
+    """
+    conn = conn or get_connection()
+    known = set(_client_names(conn))
+    rejected = 0
+
+    def rows():
+        nonlocal rejected
+        for line_number, record in records:
+            nom = _text(record, 'nom')
+            if not nom:
+                message = "nom du client manquant"
+            elif nom in known:
+                message = f"client déjà présent : {nom}"
+            else:
+                known.add(nom)
+                yield (nom,) + tuple(_text(record, field) or None for field in CLIENT_FIELDS[1:])
+                continue
+            report(line_number, message)
+            rejected += 1
+
+    imported = 0
+    cursor = conn.cursor()
+    for batch in _in_batches(rows(), batch_size):
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            cursor.executemany(INSERT_CLIENT, batch)
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        imported += len(batch)
+    return imported, rejected
+
+def _parse_invoice(record):
+    """Valeurs d'une ligne de facture ; lève ValueError avec un message lisible."""
+    client = _text(record, 'client')
+    if not client:
+        raise ValueError("client manquant")
+    type_activite = _text(record, 'type_activite')
+    if type_activite not in ACTIVITY_TYPES:
+        raise ValueError(f"type d'activité inconnu : {type_activite!r} ({', '.join(ACTIVITY_TYPES)})")
+    try:
+        date_emission = date.fromisoformat(_text(record, 'date_emission'))
+    except ValueError:
+        raise ValueError(f"date d'émission invalide : {_text(record, 'date_emission')!r} (AAAA-MM-JJ)")
+    date_paiement = _text(record, 'date_paiement')
+    try:
+        date_paiement = date.fromisoformat(date_paiement).isoformat() if date_paiement else None
+    except ValueError:
+        raise ValueError(f"date de paiement invalide : {date_paiement!r} (AAAA-MM-JJ)")
+
+    prix_ht = Money.from_euros(_text(record, 'montant_ht'))
+    if prix_ht <= 0:
+        raise ValueError("le montant HT doit être supérieur à 0")
+    taux_tva = percent_to_basis_points(_text(record, 'taux_tva'))
+    if not 0 <= taux_tva <= 10000:
+        raise ValueError("le taux de TVA doit être compris entre 0 et 100")
+    tva_status = 1 if taux_tva else 0
+    prix_ht, montant_tva, total_ttc = invoice_amounts(prix_ht, taux_tva, tva_status)
+    return (client, type_activite, prix_ht, montant_tva, total_ttc, _text(record, 'mission'),
+            taux_tva, tva_status, date_emission.isoformat(), date_paiement)
+
+def import_invoices(records, report, create_clients=False, batch_size=BATCH_SIZE, conn=None):
+    """
+    Enregistre les factures de `records` ((numéro de ligne, dict), voir read_records).
+
+    Colonnes : client (nom exact), date_emission, type_activite, montant_ht
+    (euros), taux_tva (pourcentage, 0 ou absent : sans TVA), mission et
+    date_paiement (facture payée si renseignée). Les numéros de facture
+    suivent le profil, dans l'ordre du fichier ; les taux URSSAF sont ceux du
+    barème à la date d'émission.
+
+    Un client inconnu est créé (nom seul) si `create_clients`, sinon la ligne
+    est rejetée. Les lignes invalides sont passées à report(numéro, message).
+    Retourne (importées, rejetées) ; lève ValueError s'il n'y a pas de profil.
+    """
+    conn = conn or get_connection()
+    cursor = conn.cursor()
+    if cursor.execute("SELECT COUNT(*) FROM Info_Personnelle").fetchone()[0] == 0:
+        raise ValueError("aucun profil enregistré (Mes Infos)")
+    clients = _client_names(conn)
+    rejected = 0
+
+    def parsed():
+        nonlocal rejected
+        for line_number, record in records:
+            try:
+                invoice = _parse_invoice(record)
+                if invoice[0] not in clients and not create_clients:
+                    raise ValueError(f"client inconnu : {invoice[0]}")
+            except ValueError as e:
+                report(line_number, str(e))
+                rejected += 1
+                continue
+            yield invoice
+
+    imported = 0
+    try:
+        for batch in _in_batches(parsed(), batch_size):
+            created = []
+            rates_cache = {}  # Taux par date d'émission, pour ce paquet
+            try:
+                cursor.execute("BEGIN IMMEDIATE")
+                for client in {invoice[0] for invoice in batch} - clients.keys():
+                    cursor.execute("INSERT INTO Clients (nom) VALUES (?)", (client,))
+                    clients[client] = cursor.lastrowid
+                    created.append(client)
+
+                # Numéros du paquet réservés en une mise à jour
+                premier_numero = reserve_invoice_numbers(cursor, len(batch))
+
+                rows = []
+                for numero_facture, (client, type_activite, prix_ht, montant_tva, total_ttc, mission,
+                                     taux_tva, tva_status, date_emission, date_paiement) \
+                        in enumerate(batch, start=premier_numero):
+                    if date_emission not in rates_cache:
+                        rates_cache[date_emission] = rates_for(date_emission, conn)
+                    rows.append(invoice_row(clients[client], type_activite, prix_ht, montant_tva,
+                                            total_ttc, mission, taux_tva, tva_status, date_emission,
+                                            numero_facture, rates_cache[date_emission], date_paiement))
+                cursor.executemany(INSERT_INVOICE, rows)
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                for client in created:
+                    del clients[client]
+                raise
+            imported += len(batch)
+    finally:
+        invalidate_profile()  # dernier_numero_facture a changé
+    return imported, rejected
@@ -0,0 +1,203 @@
+#picocompta/core/invoices.py
+"""
+Factures : création, liste filtrée et statut de paiement.
+"""
+import json
+from datetime import date
+from db.database_utils import get_connection
+from db.listings import FACTURES_PAGE_QUERY, FACTURE_SORT_KEYS, NO_LIMIT, factures_source
+from db.money import Money
+from db.profile import invalidate_profile
+from db.rates import rates_for
+from picocompta.core.clients import find_client_id
+
+ACTIVITY_TYPES = ('BIC marchandise', 'BIC service', 'BNC')
+
+# Filtres de statut de paiement acceptés par list_invoices
+STATUS_FILTERS = {'payees': 1, 'impayees': 0}
+
+def invoice_amounts(prix_ht, taux_tva, tva_status):
+    """
+    (HT, TVA, TTC) en Money d'une facture de `prix_ht` (Money) ; la TVA au
+    taux `taux_tva` (points de base) n'est due que si tva_status vaut 1.
+    """
+    montant_tva = prix_ht.apply_rate(taux_tva) if tva_status == 1 else Money(0)
+    return prix_ht, montant_tva, prix_ht + montant_tva
+
+# Colonnes renseignées à la création d'une facture (saisie ou import)
+INSERT_INVOICE = """
+    INSERT INTO Factures (
+        id_client, status, date_status_set, date_emission,
+        montant_htBICs, montant_htBICm, montant_htBNC, tva,
+        montant_totalBICs, montant_totalBICm, montant_totalBNC,
+        montant_total, mission, taux_tva, type_activite,
+        tva_status, numero_facture,
+        taux_BICs, taux_BICm, taux_BNC
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+def invoice_row(id_client, type_activite, prix_ht, montant_tva, total_ttc, mission, taux_tva,
+                tva_status, date_emission, numero_facture, rates, date_status_set=None):
+    """
+    Paramètres d'INSERT_INVOICE (montants en centimes) ; la facture est payée
+    si `date_status_set` est renseignée. `rates` vient de db.rates.rates_for.
+    """
+    # Montant HT dans la colonne du type d'activité
+    montant_htBICs = prix_ht if type_activite == 'BIC service' else Money(0)
+    montant_htBICm = prix_ht if type_activite == 'BIC marchandise' else Money(0)
+    montant_htBNC = prix_ht if type_activite == 'BNC' else Money(0)
+    is_prestation = type_activite == 'BIC service'
+    return (
+        id_client, 1 if date_status_set else 0, date_status_set, date_emission,
+        montant_htBICs.cents, montant_htBICm.cents, montant_htBNC.cents, montant_tva.cents,
+        (montant_htBICs + montant_tva).cents if is_prestation else 0,
+        (montant_htBICm + montant_tva).cents if not is_prestation else 0,
+        (montant_htBNC + montant_tva).cents if not is_prestation else 0,
+        total_ttc.cents, mission, taux_tva, type_activite,
+        tva_status,  # Store tva_status as 1 or 0
+        numero_facture,
+        rates['taux_BICs'], rates['taux_BICm'], rates['taux_BNC']
+    )
+
+def reserve_invoice_numbers(cursor, count=1):
+    """
+    Réserve `count` numéros de facture dans le profil de la base de `cursor`
+    et retourne le premier. À appeler dans la transaction d'écriture qui
+    enregistre les factures, pour que deux écritures n'aient pas le même numéro.
+    """
+    cursor.execute("""
+        SELECT COALESCE(dernier_numero_facture, 0) FROM Info_Personnelle
+        WHERE id_personnelle = (SELECT MAX(id_personnelle) FROM Info_Personnelle)
+    """)
+    row = cursor.fetchone()
+    if row is None:
+        raise ValueError("aucun profil enregistré (Mes Infos)")
+    cursor.execute("""
+        UPDATE Info_Personnelle
+        SET dernier_numero_facture = ?
+        WHERE id_personnelle = (SELECT MAX(id_personnelle) FROM Info_Personnelle)
+    """, (row[0] + count,))
+    return row[0] + 1
+
+def create_invoice(client_name, type_activite, prix_ht, montant_tva, total_ttc, mission,
+                   taux_tva, tva_status, date_emission=None, conn=None):
+    """
+    Enregistre une facture impayée datée du jour (ou de `date_emission`) avec
+    le numéro suivant du profil et les taux URSSAF du barème à cette date.
+
+    Le numéro est lu et réservé sur `conn`, dans la transaction de l'INSERT.
+    Les montants sont des Money et `taux_tva` est en points de base. Retourne
+    l'id_facture créé ; lève LookupError si le client n'existe pas et
+    sqlite3.Error en cas d'échec (la transaction est alors annulée).
+    """
+    conn = conn or get_connection()
+    cursor = conn.cursor()
+    id_client = find_client_id(client_name, conn)
+    if id_client is None:
+        raise LookupError(f"Client '{client_name}' not found in the database.")
+
+    # URSSAF rates in force on the issue date (Taux_URSSAF schedule)
+    date_emission = date_emission or date.today()
+    rates = rates_for(date_emission, conn)
+
+    try:
+        if not conn.in_transaction:
+            cursor.execute("BEGIN IMMEDIATE")
+        numero_facture = reserve_invoice_numbers(cursor)
+
+        # Insert the new invoice into the Factures table (amounts in cents)
+        cursor.execute(INSERT_INVOICE, invoice_row(
+            id_client, type_activite, prix_ht, montant_tva, total_ttc, mission, taux_tva,
+            tva_status, date_emission, numero_facture, rates
+        ))
+        id_facture = cursor.lastrowid
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    invalidate_profile()  # dernier_numero_facture a changé
+    return id_facture
+
+def list_invoices(start_date=None, end_date=None, client=None, status=None,
+                  tri='date', ascending=True, limit=NO_LIMIT, conn=None):
+    """
+    Factures filtrées, triées par `tri` (voir db.listings.FACTURE_SORT_KEYS).
+
+    Filtres optionnels : dates d'émission (bornes incluses, AAAA-MM-JJ), nom
+    exact du client et statut ('payees' ou 'impayees'). Les lignes ont les
+    colonnes de db.listings.FACTURE_COLUMNS.
+    """
+    if tri not in FACTURE_SORT_KEYS:
+        raise ValueError(f"Tri inconnu : {tri}")
+    conditions, params = [], {'limit': limit}
+    if start_date:
+        conditions.append("f.date_emission >= :start_date")
+        params['start_date'] = str(start_date)
+    if end_date:
+        conditions.append("f.date_emission <= :end_date")
+        params['end_date'] = str(end_date)
+    if client:
+        conditions.append("c.nom = :client")
+        params['client'] = client
+    if status is not None:
+        if status not in STATUS_FILTERS:
+            raise ValueError(f"Statut inconnu : {status} ({' ou '.join(STATUS_FILTERS)})")
+        conditions.append("f.status = :status")
+        params['status'] = STATUS_FILTERS[status]
+
+    query = FACTURES_PAGE_QUERY.format(
+        source=factures_source(tri),
+        key=FACTURE_SORT_KEYS[tri],
+        order='ASC' if ascending else 'DESC',
+        where=f"WHERE {' AND '.join(conditions)}" if conditions else "",
+    )
+    cursor = (conn or get_connection()).cursor()
+    cursor.execute(query, params)
+    return [row[:-1] for row in cursor.fetchall()]
+
+def set_invoice_status(facture_id, is_paid, paid_on=None, conn=None):
+    """
+    Marque une facture payée (à la date `paid_on`, aujourd'hui par défaut) ou
+    impayée. Retourne la date de paiement enregistrée (None si impayée).
+    Lève sqlite3.Error en cas d'échec (la transaction est alors annulée).
+    """
+    conn = conn or get_connection()
+    date_status_set = str(paid_on or date.today()) if is_paid else None
+    try:
+        conn.execute("""
+            UPDATE Factures
+            SET status = ?, date_status_set = ?
+            WHERE id_facture = ?
+        """, (is_paid, date_status_set, facture_id))
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    return date_status_set
+
+def mark_invoices_paid(payments, conn=None):
+    """
+    Enregistre des paiements [(id_facture, date de paiement)] en une transaction.
+
+    Retourne la liste des id_facture absents de la base, qui ne sont pas
+    modifiés. Lève sqlite3.Error en cas d'échec (rien n'est alors enregistré).
+    """
+    conn = conn or get_connection()
+    payments = [(int(facture_id), str(paid_on)) for facture_id, paid_on in payments]
+    cursor = conn.cursor()
+    try:
+        cursor.execute("BEGIN")
+        cursor.execute("""
+            SELECT value FROM json_each(?)
+            WHERE value NOT IN (SELECT id_facture FROM Factures)
+        """, (json.dumps([facture_id for facture_id, _ in payments]),))
+        missing = [row[0] for row in cursor.fetchall()]
+        cursor.executemany("""
+            UPDATE Factures SET status = 1, date_status_set = ?
+            WHERE id_facture = ?
+        """, [(paid_on, facture_id) for facture_id, paid_on in payments])
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    return missing
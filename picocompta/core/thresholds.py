@@ -0,0 +1,54 @@
+#picocompta/core/thresholds.py
+"""
+Plafonds du régime micro-entreprise et seuils de franchise en base de TVA.
+
+Fonctions pures sur le chiffre d'affaires (Money ou nombres, en euros) ;
+les chiffres eux-mêmes viennent de db.dashboard.dashboard_snapshot.
+"""
+
+# Plafonds de chiffre d'affaires de la micro-entreprise (euros)
+PLAFOND_BIC_MARCHANDISE = 188700
+PLAFOND_SERVICES = 77700
+
+# Seuils de franchise en base de TVA (euros)
+TVA_IMMEDIATE_SALES_THRESHOLD = 101000
+TVA_IMMEDIATE_SERVICES_THRESHOLD = 39100
+TVA_RETRO_SALES_THRESHOLD = 91900
+TVA_RETRO_SALES_MAX = 101000
+TVA_RETRO_SERVICES_THRESHOLD = 36800
+TVA_RETRO_SERVICES_MAX = 39100
+
+def tva_required(turnover, current_year):
+    """
+    Vrai si un seuil de TVA est dépassé : seuils immédiats sur l'année N,
+    seuils rétroactifs sur N-1 et N-2. `turnover` est {année: (ventes, services)}.
+    """
+    sales, services = turnover[current_year]
+    sales_n1, services_n1 = turnover[current_year - 1]
+    sales_n2, services_n2 = turnover[current_year - 2]
+
+    immediate_sales_tva = sales > TVA_IMMEDIATE_SALES_THRESHOLD
+    immediate_services_tva = services > TVA_IMMEDIATE_SERVICES_THRESHOLD
+    retroactive_sales_tva = (
+        TVA_RETRO_SALES_THRESHOLD < sales_n1 <= TVA_RETRO_SALES_MAX and
+        TVA_RETRO_SALES_THRESHOLD < sales_n2 <= TVA_RETRO_SALES_MAX
+    )
+    retroactive_services_tva = (
+        TVA_RETRO_SERVICES_THRESHOLD < services_n1 <= TVA_RETRO_SERVICES_MAX and
+        TVA_RETRO_SERVICES_THRESHOLD < services_n2 <= TVA_RETRO_SERVICES_MAX
+    )
+    return immediate_sales_tva or immediate_services_tva or retroactive_sales_tva or retroactive_services_tva
+
+def _percent(amount, ceiling):
+    return min(100, (float(amount) / ceiling) * 100)
+
+def threshold_progress(total_sales, total_services):
+    """Progression (0 à 100) de l'année vers chaque plafond et seuil immédiat de TVA."""
+    return {
+        'bic_marchandise': _percent(total_sales, PLAFOND_BIC_MARCHANDISE),
+        'services': _percent(total_services, PLAFOND_SERVICES),
+        'tva_vente': _percent(total_sales, TVA_IMMEDIATE_SALES_THRESHOLD),
+        'tva_service': _percent(total_services, TVA_IMMEDIATE_SERVICES_THRESHOLD),
+        # Activité mixte : le total reste soumis au plafond des ventes
+        'mixed_activity': _percent(total_sales + total_services, PLAFOND_BIC_MARCHANDISE),
+    }
@@ -0,0 +1,70 @@
+# startup_profile.py
+"""
+Mesure des phases du démarrage de l'application.
+
+main.py enregistre chaque phase (import de Kivy, style.kv, init_database,
+construction du ScreenManager, première image) avec des horodatages
+time.monotonic() relatifs à l'import de ce module. Si la variable
+d'environnement PICOCOMPTA_STARTUP_PROFILE contient un chemin de fichier,
+le profil y est écrit en JSON à la première image ('-' pour la sortie
+standard). Avec PICOCOMPTA_STARTUP_EXIT=1, l'application s'arrête ensuite,
+ce qu'utilise benchmarks/bench_cold_start.py.
+"""
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+PROFILE_ENV = 'PICOCOMPTA_STARTUP_PROFILE'
+EXIT_ENV = 'PICOCOMPTA_STARTUP_EXIT'
+
+_origin = time.monotonic()
+_phases = []
+
+@contextmanager
+def phase(name):
+    """Enregistre la durée du bloc sous le nom `name`."""
+    start = time.monotonic()
+    try:
+        yield
+    finally:
+        _phases.append({
+            'name': name,
+            'start': start - _origin,
+            'end': time.monotonic() - _origin,
+        })
+
+def mark(name):
+    """Enregistre un instant (phase de durée nulle), par exemple la première image."""
+    now = time.monotonic() - _origin
+    _phases.append({'name': name, 'start': now, 'end': now})
+
+def profile():
+    """Retourne le profil : phases dans l'ordre d'enregistrement et durée totale."""
+    phases = [dict(p, duration=p['end'] - p['start']) for p in _phases]
+    return {
+        'phases': phases,
+        'total': max((p['end'] for p in phases), default=0.0),
+    }
+
+def enabled():
+    return bool(os.environ.get(PROFILE_ENV))
+
+def exit_requested():
+    return os.environ.get(EXIT_ENV) == '1'
+
+def dump():
+    """Écrit le profil en JSON à l'emplacement indiqué par PICOCOMPTA_STARTUP_PROFILE."""
+    target = os.environ.get(PROFILE_ENV)
+    if not target:
+        return
+    data = json.dumps(profile(), indent=2)
+    if target == '-':
+        sys.stdout.write(data + "\n")
+        return
+    try:
+        with open(target, 'w', encoding='utf-8') as output:
+            output.write(data)
+    except OSError as e:
+        print(f"Erreur lors de l'écriture du profil de démarrage : {e}")
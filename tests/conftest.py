@@ -0,0 +1,49 @@
+# tests/conftest.py
+"""
+Fixtures communes : une base temporaire migrée par test (PICOCOMPTA_DB).
+
+Lancer depuis la racine du dépôt : python -m pytest
+"""
+import contextlib
+import io
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from db.database_utils import init_database, get_connection, close_connection
+from db.money import Money
+from db.rates import rates_for
+from picocompta.core.invoices import INSERT_INVOICE, invoice_amounts, invoice_row
+
+@pytest.fixture
+def conn(tmp_path, monkeypatch):
+    """Connexion à une base neuve, migrée, avec un profil et un client (id 1)."""
+    db_path = str(tmp_path / 'picocompta.db')
+    monkeypatch.setenv('PICOCOMPTA_DB', db_path)
+    with contextlib.redirect_stdout(io.StringIO()):
+        assert init_database(db_path)
+    connection = get_connection(db_path)
+    connection.execute("""
+        INSERT INTO Info_Personnelle (nom, prenom, adresse, CP, pays, email, telephone, iban, bic,
+                                      echeance_declaration, dernier_numero_facture, status_tva)
+        VALUES ('Test', 'Profil', '1 rue des Tests', '75001', 'France', 'test@example.org',
+                '0100000000', 'FR7600000000000000000000000', 'TESTFRPP', 3, 0, 0)
+    """)
+    connection.execute("INSERT INTO Clients (nom) VALUES ('Client test')")
+    connection.commit()
+    yield connection
+    close_connection(db_path)
+
+def add_invoice(conn, date_emission, type_activite, montant_ht, taux_tva=0, paid=True, numero=None):
+    """Enregistre une facture (montant HT en centimes) comme create_invoice ; retourne son id."""
+    tva_status = 1 if taux_tva else 0
+    prix_ht, montant_tva, total_ttc = invoice_amounts(Money(montant_ht), taux_tva, tva_status)
+    cursor = conn.execute(INSERT_INVOICE, invoice_row(
+        1, type_activite, prix_ht, montant_tva, total_ttc, 'test', taux_tva, tva_status,
+        date_emission, numero, rates_for(date_emission, conn), date_emission if paid else None))
+    conn.commit()
+    return cursor.lastrowid
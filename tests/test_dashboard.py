@@ -0,0 +1,27 @@
+# tests/test_dashboard.py
+from datetime import datetime
+from conftest import add_invoice
+from db.dashboard import dashboard_snapshot
+from db.money import Money
+from db.profile import load_profile
+
+NOW = datetime(2025, 6, 15)
+
+def test_first_year_adds_turnover_before_the_app(conn):
+    add_invoice(conn, '2025-02-10', 'BIC marchandise', 100000)
+    add_invoice(conn, '2025-03-10', 'BNC', 50000)
+    conn.execute("UPDATE Info_Personnelle SET debut_activite = '2025-01-01', caNm = 1500, caNs = 700")
+    conn.commit()
+
+    profile = load_profile(conn)
+    assert (profile.caNm, profile.caNs) == (1500, 700)
+    sales, services = dashboard_snapshot(NOW, conn)['turnover'][2025]
+    assert sales == Money(100000) + Money.from_euros(1500)
+    assert services == Money(50000) + Money.from_euros(700)
+
+def test_missing_turnover_before_the_app_counts_as_zero(conn):
+    add_invoice(conn, '2025-02-10', 'BNC', 50000)
+    conn.execute("UPDATE Info_Personnelle SET debut_activite = '2025-01-01', caNm = NULL, caNs = NULL")
+    conn.commit()
+
+    assert dashboard_snapshot(NOW, conn)['turnover'][2025] == (Money(0), Money(50000))
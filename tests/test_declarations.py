@@ -0,0 +1,56 @@
+# tests/test_declarations.py
+import sqlite3
+import pytest
+from conftest import add_invoice
+from db.money import Money
+from picocompta.core.declarations import (period_summaries, urssaf_period_data, urssaf_period_invoices,
+                                          tva_period_data, declare_period, declare_zero_period)
+
+# Montants HT (centimes) dont les charges ont des demi-centimes à arrondir
+AMOUNTS = (10003, 20007, 33333, 12345, 9999, 5001)
+
+def test_period_data_matches_year_aggregation(conn):
+    for index, montant_ht in enumerate(AMOUNTS * 4):
+        month = 1 + index % 12
+        activity = ('BNC', 'BIC service', 'BIC marchandise')[index % 3]
+        add_invoice(conn, f"2025-{month:02d}-15", activity, montant_ht, taux_tva=2000 if index % 2 else 0)
+
+    for echeance in (1, 3):
+        for period, urssaf, tva in period_summaries(2025, echeance):
+            assert urssaf_period_data(period['start_date'], period['end_date']) == urssaf
+            assert tva_period_data(period['start_date'], period['end_date']) == tva
+
+def test_period_invoice_charges_add_up_to_period_total(conn):
+    for index, montant_ht in enumerate(AMOUNTS * 2):
+        activity = ('BNC', 'BIC service', 'BIC marchandise')[index % 3]
+        add_invoice(conn, f"2025-{1 + index % 3:02d}-10", activity, montant_ht, paid=index % 4 != 3)
+
+    urssaf = urssaf_period_data('2025-01-01', '2025-03-31')
+    invoices = urssaf_period_invoices('2025-01-01', '2025-03-31')
+    assert len(invoices) == urssaf['nb_factures']
+    assert sum((charge for *_, charge in invoices), Money(0)) == urssaf['total_charge']
+    for activity, total in (('BNC', 'total_bnc'), ('BIC marchandise', 'total_bicm'), ('BIC service', 'total_bics')):
+        charges = [charge for *_, type_activite, charge in invoices if type_activite == activity]
+        assert sum(charges, Money(0)) == urssaf[total]
+
+def test_period_without_invoices(conn):
+    urssaf = urssaf_period_data('2025-04-01', '2025-06-30')
+    assert urssaf['nb_factures'] == 0
+    assert urssaf['all_declared'] is False
+    assert tva_period_data('2025-04-01', '2025-06-30')['nb_factures'] == 0
+
+@pytest.mark.parametrize('declare', (
+    lambda conn: declare_period('URSSAF', '2025-01-01', '2025-03-31', conn),
+    lambda conn: declare_zero_period('URSSAF', '2025-01-01', '2025-03-31', conn=conn),
+))
+def test_failed_declaration_leaves_no_open_transaction(conn, declare):
+    add_invoice(conn, '2025-02-10', 'BNC', 10000)
+    for table in ('Factures', 'Declarations_Zero'):
+        conn.execute(f"""
+            CREATE TEMP TRIGGER echec_{table} BEFORE {'UPDATE' if table == 'Factures' else 'INSERT'} ON {table}
+            BEGIN SELECT RAISE(ABORT, 'écriture refusée'); END
+        """)
+    conn.commit()
+    with pytest.raises(sqlite3.IntegrityError):
+        declare(conn)
+    assert not conn.in_transaction
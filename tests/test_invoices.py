@@ -0,0 +1,52 @@
+# tests/test_invoices.py
+import contextlib
+import io
+import sqlite3
+import pytest
+from datetime import date
+from db.database_utils import init_database, get_connection, close_connection
+from db.money import Money
+from db.profile import get_profile
+from picocompta.core.invoices import create_invoice
+
+def _other_database(tmp_path, dernier_numero_facture):
+    db_path = str(tmp_path / 'autre.db')
+    with contextlib.redirect_stdout(io.StringIO()):
+        init_database(db_path)
+    other = get_connection(db_path)
+    other.execute("""
+        INSERT INTO Info_Personnelle (nom, prenom, adresse, CP, pays, email, telephone, iban, bic,
+                                      echeance_declaration, dernier_numero_facture, status_tva)
+        VALUES ('Autre', 'Profil', 'x', '75000', 'France', 'a@b.c', '0', 'FR76', 'BIC', 3, ?, 0)
+    """, (dernier_numero_facture,))
+    other.execute("INSERT INTO Clients (nom) VALUES ('Client test')")
+    other.commit()
+    return db_path, other
+
+def test_create_invoice_numbers_from_its_own_connection(conn, tmp_path):
+    conn.execute("UPDATE Info_Personnelle SET dernier_numero_facture = 3")
+    conn.commit()
+    assert get_profile().dernier_numero_facture == 3  # profil de la base par défaut en cache
+    db_path, other = _other_database(tmp_path, 50)
+    try:
+        id_facture = create_invoice('Client test', 'BNC', Money(10000), Money(0), Money(10000),
+                                    'Mission', 0, 0, date(2025, 3, 1), conn=other)
+        assert other.execute("SELECT numero_facture FROM Factures WHERE id_facture = ?",
+                             (id_facture,)).fetchone()[0] == 51
+        assert other.execute("SELECT dernier_numero_facture FROM Info_Personnelle").fetchone()[0] == 51
+        assert conn.execute("SELECT dernier_numero_facture FROM Info_Personnelle").fetchone()[0] == 3
+    finally:
+        close_connection(db_path)
+
+def test_create_invoice_rolls_back_on_error(conn):
+    conn.execute("UPDATE Info_Personnelle SET dernier_numero_facture = 7")
+    conn.execute("""
+        CREATE TEMP TRIGGER echec_insertion BEFORE INSERT ON Factures
+        BEGIN SELECT RAISE(ABORT, 'insertion refusée'); END
+    """)
+    conn.commit()
+    with pytest.raises(sqlite3.IntegrityError):
+        create_invoice('Client test', 'BNC', Money(10000), Money(0), Money(10000),
+                       'Mission', 0, 0, date(2025, 3, 1), conn=conn)
+    assert not conn.in_transaction
+    assert conn.execute("SELECT dernier_numero_facture FROM Info_Personnelle").fetchone()[0] == 7
@@ -0,0 +1,74 @@
+# tests/test_listings.py
+import pytest
+from conftest import add_invoice
+from db.listings import (fetch_factures_page, fetch_clients_page, NO_LIMIT, ListingColumns,
+                         FACTURE_COLUMNS, FACTURE_SORT_KEYS)
+
+def paginate(fetch, tri, ascending, limit):
+    rows, after = fetch(tri, ascending, limit=limit)
+    while after is not None:
+        page, after = fetch(tri, ascending, after, limit)
+        rows += page
+    return [row[0] for row in rows]
+
+@pytest.fixture
+def factures_with_null_dates(conn):
+    for index in range(12):
+        add_invoice(conn, f"2025-{1 + index % 4:02d}-15", 'BNC', 10000 + index)
+    # Factures anciennes sans date d'émission, mêlées aux autres par id
+    conn.execute("UPDATE Factures SET date_emission = NULL WHERE id_facture % 3 = 0")
+    conn.commit()
+    return conn
+
+@pytest.mark.parametrize('ascending', (True, False))
+@pytest.mark.parametrize('limit', (1, 2, 3, 5, 100))
+def test_factures_pages_keep_null_sort_keys(factures_with_null_dates, ascending, limit):
+    order = 'ASC' if ascending else 'DESC'
+    expected = [row[0] for row in factures_with_null_dates.execute(
+        f"SELECT id_facture FROM Factures ORDER BY date_emission {order}, id_facture {order}")]
+    assert paginate(fetch_factures_page, 'date', ascending, limit) == expected
+
+@pytest.mark.parametrize('ascending', (True, False))
+def test_factures_no_limit_after_null_cursor(factures_with_null_dates, ascending):
+    first_page, after = fetch_factures_page('date', ascending, limit=2)
+    rest, next_cursor = fetch_factures_page('date', ascending, after, NO_LIMIT)
+    assert next_cursor is None
+    assert len(first_page) + len(rest) == 12
+    assert len({row[0] for row in first_page + rest}) == 12
+
+@pytest.mark.parametrize('ascending', (True, False))
+def test_clients_pages_match_full_sort(conn, ascending):
+    for index in range(7):
+        conn.execute("INSERT INTO Clients (nom) VALUES (?)", (f"Client {index % 3}",))
+    conn.commit()
+    expected = [row[0] for row in fetch_clients_page('nom', ascending, limit=NO_LIMIT)[0]]
+    assert paginate(fetch_clients_page, 'nom', ascending, 2) == expected
+
+def load_listing(first_page, rest):
+    listing = ListingColumns(FACTURE_COLUMNS, 'facture_id', lambda row: dict(zip(FACTURE_COLUMNS, row)))
+    listing.records(listing.extend(first_page))
+    listing.extend(rest)
+    return listing
+
+@pytest.mark.parametrize('tri', sorted(FACTURE_SORT_KEYS))
+@pytest.mark.parametrize('ascending', (True, False))
+def test_partial_list_sorted_in_memory_like_sql(factures_with_null_dates, tri, ascending):
+    # Chemin de trier_par : première page affichée, reste lu en colonnes seulement
+    first_page, after = fetch_factures_page('date', True, limit=3)
+    listing = load_listing(first_page, fetch_factures_page('date', True, after, NO_LIMIT)[0])
+    assert len(listing._records) == 3
+
+    expected = [row[0] for row in fetch_factures_page(tri, ascending, limit=NO_LIMIT)[0]]
+    pages = [listing.sorted_records(tri, ascending, start, start + 5) for start in range(0, 12, 5)]
+    assert [record['facture_id'] for page in pages for record in page] == expected
+
+def test_update_patches_columns_of_rows_not_displayed(factures_with_null_dates):
+    first_page, after = fetch_factures_page('date', True, limit=3)
+    listing = load_listing(first_page, fetch_factures_page('date', True, after, NO_LIMIT)[0])
+    hidden_id = listing.columns['facture_id'][-1]
+    listing.permutation('status')
+
+    # Toutes les factures sont payées : seule la facture modifiée passe en tête
+    assert listing.update(hidden_id, status=0, date_status_set=None) is None
+    first = listing.sorted_records('status', True, 0, 1)[0]
+    assert (first['facture_id'], first['status']) == (hidden_id, 0)
@@ -0,0 +1,48 @@
+# tests/test_migrations.py
+import contextlib
+import io
+from conftest import add_invoice
+from db.database_utils import apply_migrations
+from db.rates import rates_for
+from db.rollup import verify_rollup
+
+def test_null_statuses_become_unpaid_and_undeclared(conn):
+    paid = add_invoice(conn, '2025-02-10', 'BNC', 10000)
+    legacy = add_invoice(conn, '2025-02-11', 'BNC', 20000)
+    conn.execute("""
+        UPDATE Factures
+        SET status = NULL, status_declaration_URSSAF = NULL, status_declaration_TVA = NULL
+        WHERE id_facture = ?
+    """, (legacy,))
+    conn.execute("PRAGMA user_version = 6")
+    conn.commit()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        assert apply_migrations(conn) >= 7
+
+    statuses = {row[0]: row[1:] for row in conn.execute("""
+        SELECT id_facture, status, status_declaration_URSSAF, status_declaration_TVA
+        FROM Factures
+    """)}
+    assert statuses[legacy] == (0, 0, 0)
+    assert statuses[paid] == (1, 0, 0)
+    assert verify_rollup(conn) == []
+
+def test_bnc_rate_changes_after_january_first_2025(conn):
+    first_day = add_invoice(conn, '2025-01-01', 'BNC', 10000)
+    second_day = add_invoice(conn, '2025-01-02', 'BNC', 10000)
+    # Barème tel que la migration 5 l'a créé avant la correction
+    conn.execute("UPDATE Taux_URSSAF SET date_fin = '2024-12-31' WHERE type_activite = 'BNC' AND taux = 2480")
+    conn.execute("UPDATE Taux_URSSAF SET date_debut = '2025-01-01' WHERE type_activite = 'BNC' AND taux = 2640")
+    conn.execute("UPDATE Factures SET taux_BNC = 2640")
+    conn.execute("PRAGMA user_version = 7")
+    conn.commit()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        apply_migrations(conn)
+
+    rates = dict(conn.execute("SELECT id_facture, taux_BNC FROM Factures"))
+    assert rates == {first_day: 2480, second_day: 2640}
+    assert rates_for('2025-01-01', conn)['taux_BNC'] == 2480
+    assert rates_for('2025-01-02', conn)['taux_BNC'] == 2640
+    assert verify_rollup(conn) == []
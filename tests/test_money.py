@@ -0,0 +1,30 @@
+# tests/test_money.py
+from decimal import Decimal
+import pytest
+from db.money import Money
+
+@pytest.mark.parametrize('money, number', [
+    (Money(100), 1),
+    (Money(0), 0),
+    (Money(-250), Decimal('-2.5')),
+    (Money(50), 0.5),
+    (Money(12345), Decimal('123.45')),
+])
+def test_equal_numbers_have_equal_hashes(money, number):
+    assert money == number
+    assert hash(money) == hash(number)
+    assert {money: 'montant'}[number] == 'montant'
+
+def test_comparisons_use_exact_values():
+    assert Money(10) != 0.1  # 0.1 n'est pas exactement représentable en float
+    assert Money(10) == Decimal('0.1')
+    assert Money(1) > 0
+    assert Money(-1) <= 0
+    assert Money(199) < 2
+    assert Money(0) < float('inf')
+    assert Money(0) != float('nan')
+
+def test_money_equality_and_hash():
+    assert Money(100) == Money(100)
+    assert len({Money(100), Money(100), 1, Decimal('1.00')}) == 1
+    assert Money(100) != '1.00'
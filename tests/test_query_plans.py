@@ -0,0 +1,86 @@
+# tests/test_query_plans.py
+"""
+EXPLAIN QUERY PLAN des requêtes fréquentes, sur une base migrée vide.
+
+Les requêtes sont les constantes utilisées par le code (pas des copies) :
+une requête modifiée qui perd son index fait échouer le test.
+"""
+import pytest
+
+from db.aggregations import PERIOD_AGGREGATION_QUERY
+from db.dashboard import COUNTS_QUERY, TURNOVER_QUERY
+from db.listings import FACTURE_SORT_KEYS, CLIENT_SORT_KEYS, factures_page_query, clients_page_query
+from db.rates import RATES_AT_DATE_QUERY
+from picocompta.core.clients import BEST_CLIENT_QUERY, WORST_PAYER_QUERY, FIND_CLIENT_QUERY
+from picocompta.core.declarations import PERIOD_INVOICES_QUERY
+
+# Tables dont le parcours complet est borné (une ligne par mois et par catégorie)
+SMALL_TABLES = ('Factures_Rollup',)
+
+PERIOD_PARAMS = {
+    'step': 3, 'start_date': '2024-01-01', 'end_date': '2024-12-31',
+    'start_year': 2024, 'start_month': 1, 'end_year': 2024, 'end_month': 12,
+}
+PAGE_PARAMS = {'limit': 100, 'after_key': 1, 'after_id': 1,
+               'year_start': '2024-01-01', 'year_end': '2024-12-31'}
+
+HOT_QUERIES = {
+    'aggregate_periods': (PERIOD_AGGREGATION_QUERY, PERIOD_PARAMS),
+    'dashboard_counts': (COUNTS_QUERY, {'start_year': 2024, 'start_month': 1,
+                                        'end_year': 2024, 'end_month': 3}),
+    'dashboard_turnover': (TURNOVER_QUERY, (2022, 2024)),
+    'best_client_quarter': (BEST_CLIENT_QUERY.format(where="WHERE f.date_emission >= ?"), ('2024-01-01',)),
+    'best_client_all_time': (BEST_CLIENT_QUERY.format(where=""), ()),
+    'worst_payer': (WORST_PAYER_QUERY, ()),
+    'find_client_id': (FIND_CLIENT_QUERY, ('client',)),
+    'rates_for': (RATES_AT_DATE_QUERY, {'date': '2024-06-30'}),
+    'period_invoices': (PERIOD_INVOICES_QUERY, ('2024-01-01', '2024-03-31')),
+}
+
+# Index de tri de chaque colonne de Mes Factures, parcouru par les pages suivantes
+FACTURE_SORT_INDEXES = {
+    'client': 'idx_clients_nom',
+    'montant_ht': 'idx_factures_montant_ht',
+    'montant_total': 'idx_factures_montant_total',
+    'status': 'idx_factures_status',
+    'date': 'idx_factures_date',
+}
+
+# Parcours attendus : le meilleur client de tous les temps agrège tous les
+# clients, dont les factures sont lues par idx_factures_client_date
+EXPECTED_SCANS = {'best_client_all_time': ['SCAN c']}
+
+def plan(conn, query, params):
+    return [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + query, params)]
+
+def unindexed_scans(details):
+    """Étapes qui parcourent une table sans index (hors SMALL_TABLES)."""
+    return [detail for detail in details
+            if detail.startswith('SCAN') and 'USING' not in detail and 'CONSTANT ROW' not in detail
+            and detail.split()[1] not in SMALL_TABLES]
+
+@pytest.mark.parametrize('name', HOT_QUERIES)
+def test_hot_query_uses_indexes(conn, name):
+    query, params = HOT_QUERIES[name]
+    details = plan(conn, query, params)
+    assert unindexed_scans(details) == EXPECTED_SCANS.get(name, []), details
+
+@pytest.mark.parametrize('tri', FACTURE_SORT_KEYS)
+@pytest.mark.parametrize('ascending', (True, False))
+@pytest.mark.parametrize('after, continuation', ((None, False), ((1, 1), False), ((None, 1), False), (None, True)))
+def test_factures_page_uses_sort_index(conn, tri, ascending, after, continuation):
+    if tri == 'client' and (continuation or after == (None, 1)):
+        pytest.skip("Clients.nom est NOT NULL : pas de plage de clés NULL")
+    details = plan(conn, factures_page_query(tri, ascending, after, continuation), PAGE_PARAMS)
+    assert not unindexed_scans(details), details
+    assert any(FACTURE_SORT_INDEXES[tri] in detail for detail in details), details
+    if after is not None or continuation:
+        # Les pages suivantes reprennent dans l'index au lieu de relire le début
+        assert any(detail.startswith('SEARCH') and FACTURE_SORT_INDEXES[tri] in detail
+                   for detail in details), details
+
+@pytest.mark.parametrize('tri', CLIENT_SORT_KEYS)
+@pytest.mark.parametrize('after', (None, (1, 1)))
+def test_clients_page_uses_indexes(conn, tri, after):
+    details = plan(conn, clients_page_query(tri, True, after), PAGE_PARAMS)
+    assert not unindexed_scans(details), details
@@ -0,0 +1,24 @@
+# tests/test_startup_imports.py
+"""
+Démarrage de l'application sous python -X importtime (sous-processus).
+
+Le rapport (résumé et journal brut) est écrit dans le tmp_path du test :
+lancer pytest avec --basetemp=DOSSIER pour le conserver comme artefact.
+"""
+import os
+import sys
+
+from conftest import ROOT
+
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+from importtime_report import run_importtime, parse, summarize, forbidden_modules, write_report
+
+def test_startup_does_not_import_pdf_modules(tmp_path):
+    raw = run_importtime(str(tmp_path / 'startup.db'))
+    entries = parse(raw)
+    report_path = tmp_path / 'importtime_report.txt'
+    write_report(report_path, raw, summarize(entries))
+
+    assert any(name == 'main' for name, _, _, _ in entries), "main n'a pas été importé"
+    forbidden = forbidden_modules(entries)
+    assert not forbidden, f"chargés au démarrage : {', '.join(forbidden)} (rapport : {report_path})"